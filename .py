@@ -1,67 +1,65 @@
 import asyncio
-import sqlite3
-from datetime import datetime
 from aiogram import Bot, Dispatcher
 from aiogram.types import ChatMemberUpdated
-from aiogram.filters.chat_member_updated import ChatMemberUpdatedFilter, JOIN_TRANSITION
+from aiogram.filters.chat_member_updated import (
+    ChatMemberUpdatedFilter,
+    JOIN_TRANSITION,
+    LEAVE_TRANSITION,
+)
+
+from tracker_store import JOIN, LEAVE, MemberEvent, MemberEventWriter, now_text
 
 # --- SOZLAMALAR ---
 TOKEN = ""
+BATCH_SIZE = 500  # shuncha hodisa yig'ilsa darhol yoziladi
+FLUSH_INTERVAL = 1.0  # soniya - navbat shu oraliqda bazaga yoziladi
 bot = Bot(token=TOKEN)
 dp = Dispatcher()
 
 # --- BAZA BILAN ISHLASH ---
-def init_db():
-    conn = sqlite3.connect("kanal_a'zolari.db")
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS members (
-            user_id INTEGER PRIMARY KEY,
-            username TEXT,
-            full_name TEXT,
-            joined_date TEXT,
-            channel_id INTEGER
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# Bitta ulanish (WAL) va navbat: hodisalar xotirada yig'iladi va executemany bilan
+# bitta tranzaksiyada yoziladi, handler esa bazani kutmaydi.
+writer = MemberEventWriter(batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL)
+
 
-def save_user(user_id, username, full_name, channel_id):
-    conn = sqlite3.connect("kanal_a'zolari.db")
-    cursor = conn.cursor()
-    now = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-    # INSERT OR IGNORE - agar foydalanuvchi oldin bor bo'lsa, qayta yozmaydi
-    cursor.execute('''
-        INSERT OR IGNORE INTO members (user_id, username, full_name, joined_date, channel_id)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (user_id, username, full_name, now, channel_id))
-    conn.commit()
-    conn.close()
+def to_event(event: ChatMemberUpdated, kind: str) -> MemberEvent:
+    user = event.new_chat_member.user
+    return MemberEvent(
+        user_id=user.id,
+        username=f"@{user.username}" if user.username else "Mavjud emas",
+        full_name=user.full_name,
+        channel_id=event.chat.id,
+        event=kind,
+        date=now_text(),
+    )
 
 # --- KANALGA QO'SHILGANLARNI TUTUVCHI HANDLER ---
 @dp.chat_member(ChatMemberUpdatedFilter(JOIN_TRANSITION))
 async def on_user_joined_channel(event: ChatMemberUpdated):
     # Faqat kanallarni tekshirish (ixtiyoriy)
     if event.chat.type == 'channel':
-        user = event.new_chat_member.user
-        
-        user_id = user.id
-        username = f"@{user.username}" if user.username else "Mavjud emas"
-        full_name = user.full_name
-        channel_id = event.chat.id
-        
-        save_user(user_id, username, full_name, channel_id)
-        print(f"Kanalga yangi odam qo'shildi: {full_name} | ID: {user_id}")
+        writer.record(to_event(event, JOIN))
+
+# --- KANALDAN CHIQQANLARNI TUTUVCHI HANDLER ---
+@dp.chat_member(ChatMemberUpdatedFilter(LEAVE_TRANSITION))
+async def on_user_left_channel(event: ChatMemberUpdated):
+    if event.chat.type == 'channel':
+        writer.record(to_event(event, LEAVE))
 
 # --- ISHGA TUSHIRISH ---
 async def main():
-    init_db()
+    writer.start()
     print("Bot kanallarni kuzatishni boshladi...")
-    # Barcha update'larni (shu jumladan chat_member) olishni yoqish
-    await dp.start_polling(bot, allowed_updates=["chat_member", "message"])
+    try:
+        # Barcha update'larni (shu jumladan chat_member) olishni yoqish
+        await dp.start_polling(bot, allowed_updates=["chat_member", "message"])
+    finally:
+        # To'xtatilganda navbatda qolgan hodisalarni yozib qo'yish
+        await writer.stop()
+        print(f"Jami yozildi: {writer.written}, tashlab yuborildi: {writer.dropped}")
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("Bot to'xtatildi")
\ No newline at end of file
+        print("Bot to'xtatildi")
@@ -1,52 +1,161 @@
 from __future__ import annotations
 
+import asyncio
+
 from telegram import Update
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CallbackQueryHandler,
+    ChatMemberHandler,
     CommandHandler,
     MessageHandler,
     filters,
 )
 
-from config import ADMIN_IDS, BOT_TOKEN
+from config import (
+    ADMIN_IDS,
+    BOT_API_BASE_FILE_URL,
+    BOT_API_BASE_URL,
+    BOT_API_LOCAL_MODE,
+    BOT_TOKEN,
+    CODE_FILTER_ENABLED,
+    METRICS_HOST,
+    METRICS_PORT,
+    PERSISTENCE_ENABLED,
+    SUPERVISOR_WORKERS,
+)
 from db import init_db
-from handlers import admin, common, user
+from handlers import admin, channels, common, user
 from logging_conf import get_logger, setup_logging
+from metrics import MetricsServer, timed
+from repositories import catalog_snapshot, code_filter
+from services import channel_members, delivery_log, invalidation, outbound
+from services.bot_request import build_get_updates_request, build_request
+from services.persistence import SQLitePersistence
 
 logger = get_logger(__name__)
 
 
-def main() -> None:
-    setup_logging()
+metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
 
-    if not BOT_TOKEN:
-        raise RuntimeError("❌ BOT_TOKEN .env faylida yo'q.")
-    if not ADMIN_IDS:
-        logger.warning("⚠️ ADMIN_IDS .env faylida yo'q. Hech kim admin bo'lmaydi!")
 
-    init_db()
+_background: set[asyncio.Task] = set()
+
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+async def _build_code_filter() -> None:
+    try:
+        await asyncio.to_thread(code_filter.known_codes.rebuild)
+    except Exception as exc:
+        logger.error("Kod filtrini qurishda xatolik: %s", exc)
 
-    app.add_handler(CommandHandler("start", user.start))
-    app.add_handler(CommandHandler("admin", admin.admin_command))
-    app.add_handler(CommandHandler("rand", user.random_movies))
-    app.add_handler(CallbackQueryHandler(admin.callbacks))
+
+async def post_init(application: Application) -> None:
+    # Take the change-log baseline before any cache is filled.
+    invalidation.watcher.start()
+    if CODE_FILTER_ENABLED:
+        # Lookups fall back to SQLite until the filter is ready.
+        _background.add(asyncio.create_task(_build_code_filter()))
+    if catalog_snapshot.ENABLED:
+        # Maps the shared file, or builds it if no other worker has yet.
+        catalog_snapshot.snapshot.refresh_soon()
+    outbound.queue.start()
+    delivery_log.writer.start()
+    channel_members.writer.start()
+    if metrics_server:
+        await metrics_server.start()
+
+
+async def post_shutdown(application: Application) -> None:
+    for task in _background:
+        task.cancel()
+    await delivery_log.writer.stop()
+    await channel_members.writer.stop()
+    await invalidation.watcher.stop()
+    await outbound.queue.stop()
+    if metrics_server:
+        await metrics_server.stop()
+
+
+def create_builder(token: str = BOT_TOKEN) -> ApplicationBuilder:
+    builder = (
+        ApplicationBuilder()
+        .token(token)
+        .request(build_request(outbound.queue))
+        .get_updates_request(build_get_updates_request())
+    )
+    if BOT_API_BASE_URL:
+        builder = builder.base_url(BOT_API_BASE_URL)
+    if BOT_API_BASE_FILE_URL:
+        builder = builder.base_file_url(BOT_API_BASE_FILE_URL)
+    if BOT_API_LOCAL_MODE:
+        builder = builder.local_mode(True)
+    if PERSISTENCE_ENABLED:
+        builder = builder.persistence(SQLitePersistence())
+    return builder
+
+
+def build_application(builder: ApplicationBuilder) -> Application:
+    app = builder.post_init(post_init).post_shutdown(post_shutdown).build()
+
+    app.add_handler(CommandHandler("start", timed("start")(user.start)))
+    app.add_handler(CommandHandler("admin", timed("admin_command")(admin.admin_command)))
+    app.add_handler(CommandHandler("rand", timed("random_movies")(user.random_movies)))
+    app.add_handler(CommandHandler("top", timed("top_movies")(user.top_movies)))
+    app.add_handler(CommandHandler("dbaudit", timed("db_audit")(admin.db_audit_command)))
+    app.add_handler(CommandHandler("profile", timed("profile")(admin.profile_command)))
+    app.add_handler(CommandHandler("backup", timed("backup")(admin.backup_command)))
+    app.add_handler(CommandHandler("export", timed("export")(admin.export_command)))
+    app.add_handler(
+        ChatMemberHandler(
+            timed("track_channel_member")(channels.track_channel_member),
+            ChatMemberHandler.CHAT_MEMBER,
+        )
+    )
+    app.add_handler(CallbackQueryHandler(timed("callbacks")(admin.callbacks)))
     app.add_handler(
         MessageHandler(
             filters.VIDEO | filters.PHOTO | filters.Document.ALL,
-            admin.handle_admin_media,
+            timed("handle_admin_media")(admin.handle_admin_media),
             block=False,
         )
     )
     app.add_handler(
         MessageHandler(
             filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE,
-            admin.handle_admin_text,
+            timed("handle_admin_text")(admin.handle_admin_text),
         )
     )
-    app.add_handler(MessageHandler(filters.ALL, common.handle_other_messages))
+    app.add_handler(
+        MessageHandler(filters.ALL, timed("handle_other_messages")(common.handle_other_messages))
+    )
+    return app
+
+
+def main() -> None:
+    setup_logging()
+
+    if not BOT_TOKEN:
+        raise RuntimeError("❌ BOT_TOKEN .env faylida yo'q.")
+    if not ADMIN_IDS:
+        logger.warning("⚠️ ADMIN_IDS .env faylida yo'q. Hech kim admin bo'lmaydi!")
+    if BOT_API_LOCAL_MODE and not BOT_API_BASE_URL:
+        raise RuntimeError("❌ BOT_API_LOCAL_MODE uchun BOT_API_BASE_URL kerak.")
+    if BOT_API_BASE_URL:
+        logger.info(
+            "🛰 Bot API: %s%s", BOT_API_BASE_URL, " (local mode)" if BOT_API_LOCAL_MODE else ""
+        )
+
+    init_db()
+
+    if SUPERVISOR_WORKERS > 1:
+        from services.supervisor import run_supervisor
+
+        logger.info("🚀 Bot %s ta worker bilan ishga tushdi...", SUPERVISOR_WORKERS)
+        run_supervisor(SUPERVISOR_WORKERS)
+        return
+
+    app = build_application(create_builder())
 
     logger.info("🚀 Bot ishga tushdi...")
     logger.info("👥 Adminlar: %s", ADMIN_IDS)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import TYPE_CHECKING, Any, Iterator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if TYPE_CHECKING:
+    from tracker_store import MemberEvent
+
+
+def synthetic_events(count: int, leave_ratio: float, seed: int = 3) -> Iterator[MemberEvent]:
+    from tracker_store import JOIN, LEAVE, MemberEvent, now_text
+
+    rng = random.Random(seed)
+    joined: list[int] = []
+    for idx in range(count):
+        if joined and rng.random() < leave_ratio:
+            user_id = joined.pop(rng.randrange(len(joined)))
+            kind = LEAVE
+        else:
+            user_id = 500000000 + idx
+            joined.append(user_id)
+            kind = JOIN
+        yield MemberEvent(
+            user_id=user_id,
+            username=f"@user{user_id}",
+            full_name=f"User {user_id}",
+            channel_id=-1001234567890,
+            event=kind,
+            date=now_text(),
+        )
+
+
+def run_legacy(path: str, events: list[MemberEvent]) -> dict[str, Any]:
+    from tracker_store import JOIN
+
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS members (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            full_name TEXT,
+            joined_date TEXT,
+            channel_id INTEGER
+        )
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    started = time.perf_counter()
+    for item in events:
+        if item.event != JOIN:
+            continue
+        conn = sqlite3.connect(path)
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO members (user_id, username, full_name, joined_date, channel_id)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (item.user_id, item.username, item.full_name, item.date, item.channel_id),
+        )
+        conn.commit()
+        conn.close()
+    elapsed = time.perf_counter() - started
+    joins = sum(1 for item in events if item.event == JOIN)
+    return {
+        "events": joins,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(joins / elapsed, 1) if elapsed else 0.0,
+        "handler_us_per_event": round(elapsed / max(joins, 1) * 1e6, 1),
+    }
+
+
+async def run_batched(
+    path: str, events: list[MemberEvent], batch_size: int, flush_interval: float
+) -> dict[str, Any]:
+    from tracker_store import MemberEventWriter
+
+    writer = MemberEventWriter(path, batch_size=batch_size, flush_interval=flush_interval)
+    writer.start()
+    started = time.perf_counter()
+    record_seconds = 0.0
+    for idx, item in enumerate(events):
+        record_started = time.perf_counter()
+        writer.record(item)
+        record_seconds += time.perf_counter() - record_started
+        if idx % batch_size == 0:
+            await asyncio.sleep(0)
+    await writer.stop()
+    elapsed = time.perf_counter() - started
+    return {
+        "events": len(events),
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(len(events) / elapsed, 1) if elapsed else 0.0,
+        "handler_us_per_event": round(record_seconds / max(len(events), 1) * 1e6, 2),
+        "written": writer.written,
+        "dropped": writer.dropped,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Channel join tracker write throughput")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--leave-ratio", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--legacy-events", type=int, default=2000)
+    parser.add_argument("--json", help="Natijani shu faylga yozish")
+    args = parser.parse_args()
+
+    events = list(synthetic_events(args.events, args.leave_ratio))
+    with tempfile.TemporaryDirectory(prefix="bench_tracker_") as tmp_dir:
+        result = {
+            "legacy_connect_per_event": run_legacy(
+                os.path.join(tmp_dir, "legacy.db"), events[: args.legacy_events]
+            ),
+        }
+        with redirect_stdout(sys.stderr):
+            result["batched_writer"] = asyncio.run(
+                run_batched(
+                    os.path.join(tmp_dir, "batched.db"),
+                    events,
+                    args.batch_size,
+                    args.flush_interval,
+                )
+            )
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file_obj:
+            file_obj.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ADMIN_ID = 1
+TOKEN = "123456:BENCH"
+SCENARIOS = ("deeplink", "code", "pick", "series", "miss", "broadcast")
+
+
+def _configure_env(db_path: str) -> None:
+    os.environ["DB_PATH"] = db_path
+    os.environ["ADMIN_IDS"] = str(ADMIN_ID)
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("RATE_LIMIT_REQUESTS", "0")
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class UpdateFactory:
+    def __init__(self, users: int, movies: int, series: int) -> None:
+        self.users = users
+        self.movies = movies
+        self.series = series
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._random = random.Random(42)
+
+    def _user(self, user_id: int) -> dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"U{user_id}"}
+
+    def _message(self, user_id: int, text: str) -> dict[str, Any]:
+        message: dict[str, Any] = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return message
+
+    def message(self, user_id: int, text: str) -> dict[str, Any]:
+        return {"update_id": next(self._update_ids), "message": self._message(user_id, text)}
+
+    def callback(self, user_id: int, data: str) -> dict[str, Any]:
+        return {
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._update_ids)),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": self._message(user_id, "menu"),
+            },
+        }
+
+    def random_user(self) -> int:
+        return self._random.randint(2, self.users + 1)
+
+    def random_code(self) -> str:
+        return f"M{self._random.randint(1, self.movies)}"
+
+    def build(self, scenario: str) -> list[dict[str, Any]]:
+        user_id = self.random_user()
+        if scenario == "deeplink":
+            return [self.message(user_id, f"/start cinema_{self.random_code()}")]
+        if scenario == "code":
+            return [self.message(user_id, self.random_code())]
+        if scenario == "pick":
+            return [self.callback(user_id, f"pick:{self.random_code()}")]
+        if scenario == "series":
+            return [self.message(user_id, f"S{self._random.randint(1, max(self.series, 1))}")]
+        if scenario == "miss":
+            return [self.message(user_id, f"NOPE{self._random.randint(1, 10**6)}")]
+        if scenario == "broadcast":
+            return [
+                self.callback(ADMIN_ID, "broadcast"),
+                self.message(ADMIN_ID, "📢 Yangi kino!"),
+            ]
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def seed_database(users: int, movies: int, series: int, episodes: int, channels: int) -> None:
+    from db import executemany, init_db
+
+    init_db()
+    executemany(
+        "INSERT OR IGNORE INTO movies (code, name, type, file_id, desc) VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"M{idx}", f"Kino {idx}", "video", f"FILE{idx}", "Tavsif")
+            for idx in range(1, movies + 1)
+        ],
+    )
+    executemany(
+        """
+        INSERT OR IGNORE INTO movies (code, name, type, file_id, desc, parent_code)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (f"S{sid}E{ep}", f"Serial {sid}-{ep}", "video", f"FILE-S{sid}E{ep}", "Qism", f"S{sid}")
+            for sid in range(1, series + 1)
+            for ep in range(1, episodes + 1)
+        ],
+    )
+    executemany(
+        "INSERT OR IGNORE INTO users (user_id, first_name) VALUES (?, ?)",
+        [(uid, f"U{uid}") for uid in range(1, users + 2)],
+    )
+    executemany(
+        "INSERT OR IGNORE INTO force_channels (channel_id, channel_link) VALUES (?, ?)",
+        [(f"@channel{idx}", f"https://t.me/channel{idx}") for idx in range(channels)],
+    )
+
+
+async def run_load(args: argparse.Namespace) -> dict[str, Any]:
+    from telegram import Update
+
+    import app as bot_app
+    import metrics
+    from benchmarks.fake_bot_api import FakeApiConfig, FakeBotApi
+
+    api = FakeBotApi(
+        FakeApiConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            chat_rps=args.chat_rps,
+            global_rps=args.global_rps,
+        )
+    )
+    await api.start()
+    application = bot_app.build_application(
+        bot_app.create_builder(TOKEN)
+        .base_url(api.base_url)
+        .base_file_url(api.base_file_url)
+    )
+    factory = UpdateFactory(args.users, args.movies, args.series)
+    pairs = (item.split("=") for item in args.mix.split(","))
+    weights = {name: float(value) for name, value in pairs}
+    names = list(weights)
+    rng = random.Random(7)
+
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def drive(scenario: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            for payload in factory.build(scenario):
+                await application.process_update(Update.de_json(payload, application.bot))
+            latencies[scenario].append((time.perf_counter() - start) * 1000)
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.bot.get_me()
+        api.stats.requests.clear()
+        db_ops_before = metrics.db_seconds.total_count()
+        plan = rng.choices(names, weights=[weights[name] for name in names], k=args.updates)
+        started = time.perf_counter()
+        await asyncio.gather(*(drive(scenario) for scenario in plan))
+        elapsed = time.perf_counter() - started
+        db_ops = metrics.db_seconds.total_count() - db_ops_before
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+    await api.stop()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "updates": args.updates,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 3),
+        "updates_per_second": round(args.updates / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(all_latencies, 0.5), 2),
+            "p95": round(_percentile(all_latencies, 0.95), 2),
+            "p99": round(_percentile(all_latencies, 0.99), 2),
+        },
+        "per_scenario": {
+            name: {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 0.5), 2),
+                "p99_ms": round(_percentile(values, 0.99), 2),
+            }
+            for name, values in latencies.items()
+        },
+        "db_ops_per_update": round(db_ops / args.updates, 2),
+        "api_calls_per_update": round(api.stats.total() / args.updates, 2),
+        "api_calls": dict(api.stats.requests),
+        "flood_limited": api.stats.flood_limited,
+        "injected_errors": api.stats.errors,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline load test against a fake Bot API")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--series", type=int, default=20)
+    parser.add_argument("--episodes", type=int, default=12)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument(
+        "--mix",
+        default="deeplink=3,code=4,pick=3,series=1,miss=1,broadcast=0",
+        help=f"scenario=weight pairs; scenarios: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chat-rps", type=float, default=0.0)
+    parser.add_argument("--global-rps", type=float, default=0.0)
+    parser.add_argument(
+        "--outbound-rate", type=float, default=0.0, help="OUTBOUND_RATE for the bot (0 = off)"
+    )
+    parser.add_argument("--db", help="SQLite path (default: temporary file)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="bench_load_"), "bench.db")
+    os.environ["OUTBOUND_RATE"] = str(args.outbound_rate)
+    _configure_env(db_path)
+    logging.basicConfig(level=logging.ERROR, force=True)
+
+    seed_database(args.users, args.movies, args.series, args.episodes, args.channels)
+    result = asyncio.run(run_load(args))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file_obj:
+            file_obj.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
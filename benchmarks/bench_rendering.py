@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup  # noqa: E402
+
+from config import PROMO_CHANNEL  # noqa: E402
+from keyboards import main_menu_keyboard, movie_action_keyboard  # noqa: E402
+from rendering import render_caption, render_movie_list  # noqa: E402
+from repositories.movies import Movie, MovieListItem  # noqa: E402
+
+
+def _items(count: int) -> list[MovieListItem]:
+    return [
+        MovieListItem(
+            code=f"A{idx}",
+            name=f"Kino {idx}",
+            desc="Tavsif",
+            type="video",
+            views=idx * 7,
+            parent_code=None,
+        )
+        for idx in range(count)
+    ]
+
+
+def legacy_list(items: list[MovieListItem]) -> str:
+    text = "🎲 Tasodifiy kinolar:\n\n"
+    for idx, item in enumerate(items, start=1):
+        name = item.name or item.desc
+        text += f"{idx}. {name} | 👁️ {item.views} - 🆔 {item.code}\n"
+        if idx == 9:
+            text += f"\n📢 {PROMO_CHANNEL} kanaliga obuna bo'ling.\n\n"
+    return text
+
+
+def legacy_caption(movie: Movie, code: str) -> str:
+    name = movie.name or movie.desc or "Nom mavjud emas"
+    desc = movie.desc or ""
+    return (
+        f"🎬 {name}\n\n"
+        f"🆔 Kod: {code}\n"
+        f"📝 {desc}\n"
+        f"📥 Yuklab olingan: {movie.views + 1}\n\n"
+        f"@PrimeKin0Bot - 🎬 Eng zo'r kino va seriallar shu yerda"
+    )
+
+
+def legacy_main_menu() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton("🔍 Kod bo'yicha qidirish", callback_data="search_movie"),
+                InlineKeyboardButton("🎲 Tasodifiy kinolar", callback_data="random_movies"),
+            ],
+            [
+                InlineKeyboardButton("💎 Premium", callback_data="buy_premium"),
+                InlineKeyboardButton("📞 Admin", callback_data="contact_admin"),
+            ],
+        ]
+    )
+
+
+def _measure(fn: Callable[[], object], number: int) -> tuple[float, int]:
+    fn()
+    seconds = timeit.timeit(fn, number=number)
+    tracemalloc.start()
+    peak = 0
+    for _ in range(100):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return seconds / number * 1e6, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render layer micro-benchmark")
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=40)
+    args = parser.parse_args()
+
+    items = _items(args.items)
+    movie = Movie(
+        code="A1",
+        name="Kino",
+        type="video",
+        file_id="file",
+        desc="Tavsif",
+        parent_code=None,
+        views=41,
+    )
+    cases = [
+        (
+            "list",
+            lambda: legacy_list(items),
+            lambda: render_movie_list("🎲 Tasodifiy kinolar:\n\n", items),
+        ),
+        ("caption", lambda: legacy_caption(movie, "A1"), lambda: render_caption(movie, "A1")),
+        ("main_menu_keyboard", legacy_main_menu, main_menu_keyboard),
+        (
+            "movie_action_keyboard",
+            lambda: movie_action_keyboard.__wrapped__("A1"),
+            lambda: movie_action_keyboard("A1"),
+        ),
+    ]
+
+    print(f"{'case':<22}{'old us':>10}{'new us':>10}{'old peak B':>12}{'new peak B':>12}")
+    for name, old, new in cases:
+        old_us, old_bytes = _measure(old, args.number)
+        new_us, new_bytes = _measure(new, args.number)
+        print(f"{name:<22}{old_us:>10.2f}{new_us:>10.2f}{old_bytes:>12}{new_bytes:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = "10000,100000,1000000"
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "primekino_bench")
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _time_case(fn: Callable[[], Any], iterations: int) -> dict[str, float]:
+    fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    median = _percentile(samples, 0.5)
+    return {
+        "iterations": iterations,
+        "median_us": round(median, 1),
+        "p95_us": round(_percentile(samples, 0.95), 1),
+        "ops_per_second": round(1e6 / median, 1) if median else 0.0,
+    }
+
+
+def _cases(size: int) -> list[tuple[str, Callable[[], Any], float]]:
+    from db import fetchall, init_db
+    from repositories import catalog_snapshot, code_filter, force_channels, movies, users
+
+    # Cached datasets may predate newer migrations (change log triggers).
+    init_db()
+    rng = random.Random(5)
+    code_filter.known_codes.rebuild()
+    if catalog_snapshot.ENABLED:
+        catalog_snapshot.snapshot.refresh()
+    movie_codes = [row["code"] for row in fetchall("SELECT code FROM movies LIMIT 5000")]
+    parents = [
+        row["parent_code"]
+        for row in fetchall(
+            "SELECT DISTINCT parent_code FROM movies WHERE parent_code IS NOT NULL LIMIT 500"
+        )
+    ]
+    user_ids = [row["user_id"] for row in fetchall("SELECT user_id FROM users LIMIT 5000")]
+    premium_rows = fetchall("SELECT user_id FROM users WHERE is_premium = 1 LIMIT 500")
+    premium_ids = [row["user_id"] for row in premium_rows] or user_ids
+    scratch = iter(range(10**9))
+
+    def add_delete_movie() -> None:
+        code = f"BENCH{next(scratch)}"
+        movies.add_movie(code, "Bench", "video", "FILE", "Bench", None)
+        movies.delete_movie(code)
+
+    def premium_cycle() -> None:
+        user_id = rng.choice(user_ids)
+        users.set_user_premium(user_id, 1)
+        users.remove_user_premium(user_id)
+
+    def update_movie_desc() -> None:
+        movies.update_movie_field(rng.choice(movie_codes), "desc", f"Tavsif {rng.random()}")
+
+    def upsert_user() -> None:
+        user = SimpleNamespace(id=rng.choice(user_ids), username="bench", first_name="Bench")
+        users.upsert_user(user)
+
+    def channel_cycle() -> None:
+        channel = f"@bench{next(scratch)}"
+        force_channels.add_force_channel(channel, "https://t.me/bench")
+        force_channels.remove_force_channel_by_channel_id(channel)
+
+    # (name, callable, relative iteration weight)
+    return [
+        ("movies.get_movie.hit", lambda: movies.get_movie(rng.choice(movie_codes)), 1.0),
+        ("movies.get_movie.miss", lambda: movies.get_movie(f"NOPE{rng.random()}"), 1.0),
+        ("movies.get_children", lambda: movies.get_children(rng.choice(parents or ["-"])), 1.0),
+        ("movies.resolve_code.hit", lambda: movies.resolve_code(rng.choice(movie_codes)), 1.0),
+        (
+            "movies.resolve_code.parent",
+            lambda: movies.resolve_code(rng.choice(parents or ["-"])),
+            1.0,
+        ),
+        ("movies.resolve_code.miss", lambda: movies.resolve_code(f"NOPE{rng.random()}"), 1.0),
+        ("movies.list_movies.limit50", lambda: movies.list_movies(50), 0.5),
+        ("movies.get_random_movies", lambda: movies.get_random_movies(15), 0.1),
+        ("movies.get_top_movies", lambda: movies.get_top_movies(10), 0.5),
+        ("movies.get_trending_movies", lambda: movies.get_trending_movies(24, 10), 0.5),
+        ("movies.movie_stats", movies.movie_stats, 1.0),
+        ("movies.increment_views", lambda: movies.increment_views(rng.choice(movie_codes)), 0.5),
+        ("movies.update_movie_field", update_movie_desc, 0.5),
+        ("movies.add_delete_movie", add_delete_movie, 0.25),
+        ("users.upsert_user", upsert_user, 0.5),
+        ("users.is_user_premium", lambda: users.is_user_premium(rng.choice(premium_ids)), 1.0),
+        ("users.get_user_count", users.get_user_count, 1.0),
+        ("users.get_premium_stats", users.get_premium_stats, 1.0),
+        ("users.set_remove_premium", premium_cycle, 0.25),
+        ("users.get_all_user_ids", users.get_all_user_ids, 2000 / max(size, 2000) * 0.05),
+        ("force_channels.get_force_channels", force_channels.get_force_channels, 1.0),
+        ("force_channels.add_remove", channel_cycle, 0.25),
+    ]
+
+
+def run_worker(size: int, repeat: int, only: Optional[str]) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for name, fn, weight in _cases(size):
+        if only and only not in name:
+            continue
+        results[name] = _time_case(fn, max(3, int(repeat * weight)))
+    return results
+
+
+def _run_size(args: argparse.Namespace, size: int) -> dict[str, Any]:
+    from benchmarks.datasets import DatasetSpec
+
+    spec = DatasetSpec.for_size(size)
+    path = os.path.join(args.data_dir, spec.file_name())
+    if not os.path.exists(path):
+        subprocess.run(
+            [sys.executable, "-c", _GENERATE_SNIPPET, args.data_dir, str(size)],
+            check=True,
+            cwd=ROOT,
+        )
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--worker",
+        "--size",
+        str(size),
+        "--repeat",
+        str(args.repeat),
+    ]
+    if args.only:
+        command += ["--only", args.only]
+    env = {**os.environ, "DB_PATH": path, "DB_PROFILE": "0"}
+    if args.dsn:
+        # The SQLite dataset is the source of truth; it is copied into Postgres for each run.
+        subprocess.run(
+            [sys.executable, "-m", "storage.migrate", path, "--dsn", args.dsn], check=True, cwd=ROOT
+        )
+        env.update(DB_BACKEND="postgres", DATABASE_URL=args.dsn)
+    output = subprocess.run(
+        command, check=True, capture_output=True, text=True, env=env, cwd=ROOT
+    )
+    return json.loads(output.stdout)
+
+
+_GENERATE_SNIPPET = (
+    "import sys; sys.path.insert(0, '.');"
+    "from benchmarks.datasets import DatasetSpec, ensure_dataset;"
+    "ensure_dataset(sys.argv[1], DatasetSpec.for_size(int(sys.argv[2])))"
+)
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any]
+) -> list[tuple[str, str, float, float, float]]:
+    rows = []
+    for size, cases in current["results"].items():
+        base_cases = baseline.get("results", {}).get(size, {})
+        for name, stats in cases.items():
+            base = base_cases.get(name)
+            if not base or not base.get("median_us"):
+                continue
+            ratio = stats["median_us"] / base["median_us"]
+            rows.append((size, name, base["median_us"], stats["median_us"], ratio))
+    return rows
+
+
+def format_comparison(rows: list[tuple[str, str, float, float, float]], threshold: float) -> str:
+    lines = [f"{'size':>8}  {'case':<36}{'base us':>11}{'now us':>11}{'ratio':>8}"]
+    for size, name, base, now, ratio in rows:
+        flag = "  ⚠️ REGRESSION" if ratio > threshold else ""
+        lines.append(f"{size:>8}  {name:<36}{base:>11.1f}{now:>11.1f}{ratio:>8.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Repository micro-benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--only", help="Faqat nomida shu matn bor caselar")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--json", help="Natijani shu faylga yozish")
+    parser.add_argument("--baseline", help="Solishtirish uchun oldingi natija JSON")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--dsn", help="PostgreSQL DSN: caselar DB_BACKEND=postgres bilan")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.size, args.repeat, args.only)))
+        return
+
+    result: dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "backend": "postgres" if args.dsn else "sqlite",
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "timestamp": int(time.time()),
+        },
+        "results": {},
+    }
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        result["results"][str(size)] = _run_size(args, size)
+        for name, stats in result["results"][str(size)].items():
+            print(
+                f"{size:>8}  {name:<36}{stats['median_us']:>11.1f} us"
+                f"{stats['p95_us']:>11.1f} us p95",
+                file=sys.stderr,
+            )
+
+    output = json.dumps(result, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file_obj:
+            file_obj.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file_obj:
+            baseline = json.load(file_obj)
+        rows = compare(result, baseline)
+        print(format_comparison(rows, args.threshold), file=sys.stderr)
+        if args.fail_on_regression and any(row[4] > args.threshold for row in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
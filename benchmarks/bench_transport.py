@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+async def run_pool(args: argparse.Namespace, pool_size: int, base_url: str) -> dict[str, Any]:
+    from telegram import Bot
+    from telegram.error import TelegramError
+
+    from benchmarks.bench_load import TOKEN, _percentile
+    from services.bot_request import build_request
+
+    options: dict[str, Any] = {"connection_pool_size": pool_size, "pool_timeout": args.pool_timeout}
+    if args.keepalive is not None:
+        options["keepalive"] = args.keepalive
+    if args.keepalive_expiry is not None:
+        options["keepalive_expiry"] = args.keepalive_expiry
+    if args.http2:
+        options["http_version"] = "2"
+    bot = Bot(TOKEN, base_url=base_url, request=build_request(**options))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def send(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await bot.send_message(2 + index % args.chats, "bench")
+            except TelegramError:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async with bot:
+        await asyncio.gather(*(send(index) for index in range(min(pool_size, args.requests))))
+        latencies.clear()
+        errors = 0
+        started = time.perf_counter()
+        await asyncio.gather(*(send(index) for index in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    return {
+        "pool_size": pool_size,
+        "requests": args.requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.5), 2),
+        "p99_ms": round(_percentile(latencies, 0.99), 2),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bot API requests/s by HTTP connection pool size")
+    parser.add_argument("--pool-sizes", default="1,4,16,64,256")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--pool-timeout", type=float, default=30.0)
+    parser.add_argument("--keepalive", type=int, help="Max idle connections kept (0 = pool size)")
+    parser.add_argument("--keepalive-expiry", type=float, help="Idle connection lifetime, seconds")
+    parser.add_argument(
+        "--http2", action="store_true", help="Prior-knowledge h2c; the fake API is HTTP/1.1 only"
+    )
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    from benchmarks.bench_workers import _free_port, _start_fake_api
+
+    logging.basicConfig(level=logging.ERROR, force=True)
+    port = _free_port()
+    api = _start_fake_api(port, args.latency_ms)
+    base_url = f"http://127.0.0.1:{port}/bot"
+    try:
+        runs = [
+            asyncio.run(run_pool(args, int(size), base_url))
+            for size in args.pool_sizes.split(",")
+        ]
+    finally:
+        api.terminate()
+        api.wait(5)
+
+    result = {
+        "latency_ms": args.latency_ms,
+        "concurrency": args.concurrency,
+        "http2": args.http2,
+        "runs": runs,
+    }
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file_obj:
+            file_obj.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_fake_api(port: int, latency_ms: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "benchmarks", "fake_bot_api.py"),
+            "--port",
+            str(port),
+            "--latency-ms",
+            str(latency_ms),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Fake Bot API ishga tushmadi")
+
+
+def _delivered() -> int:
+    from db import fetchone
+
+    return fetchone("SELECT COALESCE(SUM(views), 0) AS total FROM movies")["total"]
+
+
+def _reset_views() -> None:
+    from db import run_in_transaction
+
+    def op(conn) -> None:
+        conn.execute("UPDATE movies SET views = 0")
+        conn.execute("DELETE FROM view_rollups")
+        conn.execute("DELETE FROM deliveries")
+
+    run_in_transaction(op)
+
+
+def run_workers(workers: int, updates: list[dict[str, Any]], timeout: float) -> dict[str, Any]:
+    from benchmarks.bench_load import TOKEN
+    from services.supervisor import Supervisor
+
+    _reset_views()
+    supervisor = Supervisor(workers, TOKEN)
+    started = time.perf_counter()
+    supervisor.start()
+    try:
+        if not supervisor.wait_ready(120):
+            raise RuntimeError("Workerlar tayyor bo'lmadi")
+        startup = time.perf_counter() - started
+        started = time.perf_counter()
+        for update in updates:
+            supervisor.dispatch(update)
+        deadline = time.monotonic() + timeout
+        delivered = 0
+        while time.monotonic() < deadline:
+            delivered = _delivered()
+            if delivered >= len(updates):
+                break
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - started
+    finally:
+        supervisor.stop()
+    return {
+        "workers": workers,
+        "startup_seconds": round(startup, 2),
+        "updates": len(updates),
+        "delivered": delivered,
+        "seconds": round(elapsed, 3),
+        "updates_per_second": round(delivered / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Supervisor throughput by worker count")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--updates", type=int, default=4000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    from benchmarks.bench_load import UpdateFactory, _configure_env, seed_database
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_workers_"), "bench.db")
+    _configure_env(db_path)
+    os.environ["CODE_FILTER_ENABLED"] = "0"
+    os.environ["PERSISTENCE_ENABLED"] = "0"
+    os.environ["DUPLICATE_REQUEST_WINDOW"] = "0"
+    logging.basicConfig(level=logging.ERROR, force=True)
+    seed_database(args.users, args.movies, series=0, episodes=0, channels=0)
+
+    factory = UpdateFactory(args.users, args.movies, series=0)
+    updates = [payload for _ in range(args.updates) for payload in factory.build("code")]
+
+    port = _free_port()
+    api = _start_fake_api(port, args.latency_ms)
+    # Spawned workers read the endpoint from config like a normal start.
+    os.environ["BOT_API_BASE_URL"] = f"http://127.0.0.1:{port}/bot"
+    os.environ["BOT_API_BASE_FILE_URL"] = f"http://127.0.0.1:{port}/file/bot"
+    try:
+        runs = [
+            run_workers(int(count), updates, args.timeout)
+            for count in args.workers.split(",")
+        ]
+    finally:
+        api.terminate()
+        api.wait(5)
+
+    base = runs[0]["updates_per_second"] or 1.0
+    for run in runs:
+        run["speedup"] = round(run["updates_per_second"] / base, 2)
+    result = {"cpu_count": os.cpu_count(), "runs": runs}
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file_obj:
+            file_obj.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
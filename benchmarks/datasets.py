@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CHUNK_SIZE = 50000
+CONTENT_TYPES = ("video", "video", "video", "document", "photo")
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    movies: int
+    users: int
+    series_ratio: float = 0.05
+    min_episodes: int = 8
+    max_episodes: int = 40
+    premium_ratio: float = 0.05
+    expired_premium_ratio: float = 0.3
+    channels: int = 3
+    seed: int = 1
+
+    @classmethod
+    def for_size(cls, size: int) -> "DatasetSpec":
+        return cls(movies=size, users=size)
+
+    def file_name(self) -> str:
+        return f"bench_m{self.movies}_u{self.users}_s{self.seed}.db"
+
+
+def _chunks(rows: Iterator[tuple], size: int = CHUNK_SIZE) -> Iterator[list[tuple]]:
+    chunk: list[tuple] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def movie_rows(spec: DatasetSpec) -> Iterator[tuple]:
+    rng = random.Random(spec.seed)
+    created = datetime(2024, 1, 1)
+    produced = 0
+    series_id = 0
+    while produced < spec.movies:
+        if rng.random() < spec.series_ratio:
+            series_id += 1
+            parent = f"S{series_id}"
+            episodes = rng.randint(spec.min_episodes, spec.max_episodes)
+            for ep in range(1, episodes + 1):
+                if produced >= spec.movies:
+                    return
+                produced += 1
+                created += timedelta(seconds=30)
+                yield (
+                    f"{parent}E{ep}",
+                    f"Serial {series_id} - {ep}-qism",
+                    "video",
+                    f"BAACAgIAAxkBAAI{produced:012d}",
+                    f"Serial {series_id} tavsifi",
+                    parent,
+                    rng.randint(0, 5000),
+                    created.isoformat(sep=" "),
+                )
+        else:
+            produced += 1
+            created += timedelta(seconds=30)
+            yield (
+                f"K{produced}",
+                f"Kino {produced}",
+                rng.choice(CONTENT_TYPES),
+                f"BAACAgIAAxkBAAI{produced:012d}",
+                f"Kino {produced} tavsifi",
+                None,
+                rng.randint(0, 20000),
+                created.isoformat(sep=" "),
+            )
+
+
+def user_rows(spec: DatasetSpec) -> Iterator[tuple]:
+    rng = random.Random(spec.seed + 1)
+    now = datetime.now()
+    for idx in range(1, spec.users + 1):
+        user_id = 100000000 + idx
+        is_premium = 0
+        premium_until = None
+        if rng.random() < spec.premium_ratio:
+            is_premium = 1
+            if rng.random() < spec.expired_premium_ratio:
+                premium_until = (now - timedelta(days=rng.randint(1, 90))).isoformat()
+            else:
+                premium_until = (now + timedelta(days=rng.randint(1, 365))).isoformat()
+        yield (user_id, f"user{idx}", f"User {idx}", is_premium, premium_until)
+
+
+def generate(path: str, spec: DatasetSpec) -> str:
+    os.environ["DB_PATH"] = path
+    from db import ensure_stats_counters, init_db
+
+    init_db()
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        with conn:
+            for chunk in _chunks(movie_rows(spec)):
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO movies
+                        (code, name, type, file_id, desc, parent_code, views, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    chunk,
+                )
+            for chunk in _chunks(user_rows(spec)):
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO users
+                        (user_id, username, first_name, is_premium, premium_until)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    chunk,
+                )
+            conn.executemany(
+                "INSERT OR IGNORE INTO force_channels (channel_id, channel_link) VALUES (?, ?)",
+                [(f"@kanal{idx}", f"https://t.me/kanal{idx}") for idx in range(spec.channels)],
+            )
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    ensure_stats_counters()
+    return path
+
+
+def ensure_dataset(data_dir: str, spec: DatasetSpec) -> str:
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, spec.file_name())
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate(path, spec)
+        print(
+            f"dataset {path}: {spec.movies} movies, {spec.users} users "
+            f"({time.perf_counter() - started:.1f}s)",
+            file=sys.stderr,
+        )
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetic catalog/users dataset generator")
+    parser.add_argument("path")
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--premium-ratio", type=float, default=0.05)
+    parser.add_argument("--series-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        raise SystemExit(f"{args.path} allaqachon mavjud")
+    generate(
+        args.path,
+        DatasetSpec(
+            movies=args.movies,
+            users=args.users,
+            premium_ratio=args.premium_ratio,
+            series_ratio=args.series_ratio,
+            seed=args.seed,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+import urllib.parse
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from pathlib import Path
+from typing import Any, Optional
+
+BOT_USER = {
+    "id": 1000000001,
+    "is_bot": True,
+    "first_name": "Fake",
+    "username": "fake_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+}
+
+_MESSAGE_METHODS = {
+    "sendMessage",
+    "sendVideo",
+    "sendDocument",
+    "sendPhoto",
+    "editMessageText",
+    "forwardMessage",
+}
+
+
+@dataclass
+class FakeApiConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    chat_rps: float = 0.0
+    global_rps: float = 0.0
+    member_status: str = "member"
+    seed: int = 0
+    # Emulates `telegram-bot-api --local`: files live on disk and getFile returns absolute paths.
+    local_dir: Optional[str] = None
+
+
+@dataclass
+class FakeApiStats:
+    requests: Counter = field(default_factory=Counter)
+    flood_limited: int = 0
+    errors: int = 0
+    connections: int = 0
+
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+
+class FakeBotApi:
+    def __init__(
+        self,
+        config: Optional[FakeApiConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config or FakeApiConfig()
+        self.host = host
+        self.port = port
+        self.stats = FakeApiStats()
+        self.files: dict[str, bytes] = {}
+        self.updates: deque[dict[str, Any]] = deque()
+        self._random = random.Random(self.config.seed)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._chat_windows: dict[str, deque[float]] = defaultdict(deque)
+        self._global_window: deque[float] = deque()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._updates_ready = asyncio.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        return f"http://{self.host}:{self.port}/file/bot"
+
+    def push_updates(self, updates: list[dict[str, Any]]) -> None:
+        self.updates.extend(updates)
+        self._updates_ready.set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = b""
+                length = int(headers.get("content-length", "0") or 0)
+                if length:
+                    body = await reader.readexactly(length)
+                method, path = request_line.decode("latin-1").split()[:2]
+                status, payload, content_type = await self._dispatch(method, path, headers, body)
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        "Connection: keep-alive\r\n\r\n"
+                    ).encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(
+        self, method: str, path: str, headers: dict[str, str], body: bytes
+    ) -> tuple[str, bytes, str]:
+        path = urllib.parse.urlsplit(path).path
+        if path.startswith("/file/bot"):
+            file_path = path.split("/", 3)[-1]
+            content = self.files.get(file_path)
+            if content is None:
+                return "404 Not Found", b"", "application/octet-stream"
+            return "200 OK", content, "application/octet-stream"
+
+        api_method = path.rsplit("/", 1)[-1]
+        params = _parse_params(headers.get("content-type", ""), body)
+        self.stats.requests[api_method] += 1
+
+        delay = self.config.latency_ms + self._random.uniform(0, self.config.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if self._is_flood_limited(str(params.get("chat_id", ""))):
+            self.stats.flood_limited += 1
+            return _error(429, "Too Many Requests: retry after 1", {"retry_after": 1})
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.stats.errors += 1
+            if self._random.random() < 0.5:
+                return _error(400, "Bad Request: chat not found")
+            return _error(500, "Internal Server Error")
+
+        if api_method == "getUpdates" and not self.updates:
+            # Long polling: hold the request until updates arrive or the timeout expires.
+            self._updates_ready.clear()
+            try:
+                await asyncio.wait_for(
+                    self._updates_ready.wait(), timeout=float(params.get("timeout") or 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        result = self._result(api_method, params)
+        data = json.dumps({"ok": True, "result": result}).encode("utf-8")
+        return "200 OK", data, "application/json"
+
+    def _is_flood_limited(self, chat_id: str) -> bool:
+        now = time.monotonic()
+        if self.config.global_rps and _window_hit(self._global_window, now, self.config.global_rps):
+            return True
+        if self.config.chat_rps and chat_id:
+            return _window_hit(self._chat_windows[chat_id], now, self.config.chat_rps)
+        return False
+
+    def _message(self, params: dict[str, Any]) -> dict[str, Any]:
+        chat_id = int(params.get("chat_id") or 0)
+        message: dict[str, Any] = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        return message
+
+    def _file(self, params: dict[str, Any], key: str) -> dict[str, Any]:
+        value = params.get(key)
+        if self.config.local_dir and isinstance(value, str) and value.startswith("file://"):
+            with open(urllib.parse.unquote(urllib.parse.urlsplit(value).path), "rb") as file_obj:
+                value = file_obj.read()
+        if isinstance(value, bytes):
+            unique = f"F{next(self._file_ids)}"
+            file_path = f"{key}s/{unique}"
+            self.files[file_path] = value
+            if self.config.local_dir:
+                self._local_path(file_path).write_bytes(value)
+            return {"file_id": unique, "file_unique_id": unique, "file_size": len(value)}
+        file_id = str(value or "file")
+        return {"file_id": file_id, "file_unique_id": file_id}
+
+    def _local_path(self, file_path: str) -> Path:
+        path = Path(os.path.abspath(self.config.local_dir), file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _result(self, api_method: str, params: dict[str, Any]) -> Any:
+        if api_method == "getMe":
+            return BOT_USER
+        if api_method == "getUpdates":
+            offset = int(params.get("offset") or 0)
+            while self.updates and self.updates[0]["update_id"] < offset:
+                self.updates.popleft()
+            limit = int(params.get("limit") or 100)
+            return [self.updates.popleft() for _ in range(min(limit, len(self.updates)))]
+        if api_method == "getChatMember":
+            return {
+                "status": self.config.member_status,
+                "user": {"id": int(params.get("user_id") or 0), "is_bot": False, "first_name": "U"},
+            }
+        if api_method == "copyMessage":
+            return {"message_id": next(self._message_ids)}
+        if api_method == "getFile":
+            file_id = str(params.get("file_id", ""))
+            for file_path, content in self.files.items():
+                if file_path.endswith(f"/{file_id}"):
+                    if self.config.local_dir:
+                        file_path = str(self._local_path(file_path))
+                    return {
+                        "file_id": file_id,
+                        "file_unique_id": file_id,
+                        "file_size": len(content),
+                        "file_path": file_path,
+                    }
+            return {"file_id": file_id, "file_unique_id": file_id, "file_path": f"files/{file_id}"}
+        if api_method in _MESSAGE_METHODS:
+            message = self._message(params)
+            if api_method == "sendVideo":
+                video = self._file(params, "video")
+                message["video"] = {**video, "width": 1, "height": 1, "duration": 1}
+            elif api_method == "sendDocument":
+                message["document"] = self._file(params, "document")
+            elif api_method == "sendPhoto":
+                message["photo"] = [{**self._file(params, "photo"), "width": 1, "height": 1}]
+            return message
+        return True
+
+
+def _window_hit(window: deque[float], now: float, rps: float) -> bool:
+    while window and now - window[0] >= 1.0:
+        window.popleft()
+    if len(window) >= rps:
+        return True
+    window.append(now)
+    return False
+
+
+def _error(
+    code: int, description: str, parameters: Optional[dict[str, Any]] = None
+) -> tuple[str, bytes, str]:
+    payload: dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+    if parameters:
+        payload["parameters"] = parameters
+    reason = {400: "Bad Request", 429: "Too Many Requests", 500: "Internal Server Error"}[code]
+    return f"{code} {reason}", json.dumps(payload).encode("utf-8"), "application/json"
+
+
+def _parse_params(content_type: str, body: bytes) -> dict[str, Any]:
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser().parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+        )
+        params: dict[str, Any] = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = part.get_payload(decode=True) or b""
+            params[name] = payload if part.get_filename() else payload.decode("utf-8")
+        return params
+    return {key: values[-1] for key, values in urllib.parse.parse_qs(body.decode("utf-8")).items()}
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    api = FakeBotApi(
+        FakeApiConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            chat_rps=args.chat_rps,
+            global_rps=args.global_rps,
+            local_dir=args.local_dir,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+    await api.start()
+    print(f"Fake Bot API: {api.base_url}<token>/<method>")
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chat-rps", type=float, default=0.0)
+    parser.add_argument("--global-rps", type=float, default=0.0)
+    parser.add_argument("--local-dir", help="Serve files from this directory like --local mode")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from typing import Iterable, Optional, Sequence
+
+# Layout: header | string table (UTF-8) | records sorted by code bytes.
+# Only stdlib imports, so bot.py and maintenance scripts can read the file too.
+MAGIC = b"PKCAT001"
+HEADER = struct.Struct("<8sQQQQ")  # magic, change seq, built_at, count, records offset
+RECORD = struct.Struct("<q12I")  # views, then (offset, length) for each of STRING_FIELDS
+CODE_REF = struct.Struct("<II")
+NO_VALUE = 0xFFFFFFFF
+
+FIELDS = ("code", "name", "type", "file_id", "desc", "parent_code", "views")
+STRING_FIELDS = FIELDS[:-1]
+INTERNED = {"type", "parent_code"}
+
+CatalogRow = tuple[str, str, str, str, str, Optional[str], int]
+
+
+def write_catalog(path: str, rows: Iterable[Sequence[object]], seq: int = 0) -> int:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    records = bytearray()
+    interned: dict[bytes, int] = {}
+    count = 0
+    previous: Optional[bytes] = None
+    try:
+        with open(tmp, "wb") as out:
+            out.write(bytes(HEADER.size))
+            offset = HEADER.size
+            for row in rows:
+                refs: list[int] = []
+                for name, value in zip(STRING_FIELDS, row):
+                    if value is None:
+                        refs += (NO_VALUE, 0)
+                        continue
+                    data = str(value).encode("utf-8")
+                    start = interned.get(data) if name in INTERNED else None
+                    if start is None:
+                        start = offset
+                        out.write(data)
+                        offset += len(data)
+                        if name in INTERNED:
+                            interned[data] = start
+                    refs += (start, len(data))
+                code = str(row[0]).encode("utf-8")
+                if previous is not None and code <= previous:
+                    raise ValueError(f"Kodlar tartiblanmagan yoki takrorlangan: {row[0]}")
+                previous = code
+                records += RECORD.pack(int(row[6] or 0), *refs)
+                count += 1
+                if offset >= NO_VALUE:
+                    raise ValueError("Katalog satrlari 4 GB dan oshdi")
+            padding = -offset % 8
+            out.write(bytes(padding))
+            records_offset = offset + padding
+            out.write(records)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, seq, int(time.time()), count, records_offset))
+            out.flush()
+            os.fsync(out.fileno())
+        # Readers keep their mapping of the old inode; new opens see the new file.
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return count
+
+
+class CatalogFile:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as file_obj:
+            self.inode = os.fstat(file_obj.fileno()).st_ino
+            self._map = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.seq, self.built_at, self.count, self._records = HEADER.unpack_from(self._map)
+        if magic != MAGIC or self._records + self.count * RECORD.size > len(self._map):
+            self._map.close()
+            raise ValueError(f"Katalog fayli buzilgan: {path}")
+
+    def get(self, code: str) -> Optional[CatalogRow]:
+        key = code.encode("utf-8")
+        data, base, size = self._map, self._records + 8, RECORD.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, length = CODE_REF.unpack_from(data, base + mid * size)
+            probe = data[start : start + length]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return self._decode(mid)
+        return None
+
+    def _decode(self, index: int) -> CatalogRow:
+        data = self._map
+        views, *refs = RECORD.unpack_from(data, self._records + index * RECORD.size)
+        values: list[Optional[str]] = []
+        for pos in range(0, len(refs), 2):
+            start, length = refs[pos], refs[pos + 1]
+            values.append(None if start == NO_VALUE else data[start : start + length].decode())
+        return (*values, views)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def open_catalog(path: str) -> Optional[CatalogFile]:
+    try:
+        return CatalogFile(path)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
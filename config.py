@@ -8,6 +8,9 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 DB_PATH = os.getenv("DB_PATH", "bot.db")
+# sqlite (default) yoki postgres - postgres uchun DATABASE_URL va asyncpg kerak
+DB_BACKEND = os.getenv("DB_BACKEND", "sqlite").lower()
+DATABASE_URL = os.getenv("DATABASE_URL", "")
 FORCE_SUB_LINK = os.getenv("FORCE_SUB_LINK", "")
 
 # Admin ID'lar - vergul bilan ajratilgan
@@ -20,6 +23,117 @@ RANDOM_LIST_LIMIT = int(os.getenv("RANDOM_LIST_LIMIT", "15"))
 MOVIE_LIST_LIMIT = int(os.getenv("MOVIE_LIST_LIMIT", "50"))
 BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
 BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "50"))
+# Bot API yuborishlari uchun umumiy navbat: parallel so'rovlar va xabar/s limiti.
+# Limit default o'chiq (0); Telegram umumiy limiti ~30/s, yoqish uchun OUTBOUND_RATE=30
+OUTBOUND_RATE = float(os.getenv("OUTBOUND_RATE", "0"))
+OUTBOUND_BURST = int(os.getenv("OUTBOUND_BURST", "10"))
+OUTBOUND_CONCURRENCY = int(os.getenv("OUTBOUND_CONCURRENCY", "64"))
 
 DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "30"))
 DB_MAX_RETRIES = int(os.getenv("DB_MAX_RETRIES", "5"))
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "2"))
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
+PG_STATEMENT_CACHE_SIZE = int(os.getenv("PG_STATEMENT_CACHE_SIZE", "256"))
+
+# Kod bo'yicha keshlanadigan kino tugmalari soni
+KEYBOARD_CACHE_SIZE = int(os.getenv("KEYBOARD_CACHE_SIZE", "4096"))
+
+TOP_LIST_LIMIT = int(os.getenv("TOP_LIST_LIMIT", "10"))
+TRENDING_WINDOW_HOURS = int(os.getenv("TRENDING_WINDOW_HOURS", "24"))
+HOURLY_ROLLUP_RETENTION_HOURS = int(os.getenv("HOURLY_ROLLUP_RETENTION_HOURS", "168"))
+
+DELIVERY_FLUSH_INTERVAL = float(os.getenv("DELIVERY_FLUSH_INTERVAL", "2"))
+DELIVERY_BATCH_SIZE = int(os.getenv("DELIVERY_BATCH_SIZE", "500"))
+DELIVERY_QUEUE_MAX = int(os.getenv("DELIVERY_QUEUE_MAX", "100000"))
+DELIVERY_RETENTION_DAYS = int(os.getenv("DELIVERY_RETENTION_DAYS", "14"))
+DELIVERY_COMPACT_INTERVAL = float(os.getenv("DELIVERY_COMPACT_INTERVAL", "3600"))
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+DB_PROFILE = os.getenv("DB_PROFILE", "0").lower() in {"1", "true", "yes"}
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "50"))
+DB_PROFILE_SAMPLES = int(os.getenv("DB_PROFILE_SAMPLES", "1024"))
+
+PROFILE_DEFAULT_SECONDS = int(os.getenv("PROFILE_DEFAULT_SECONDS", "30"))
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "600"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+PERSISTENCE_ENABLED = os.getenv("PERSISTENCE_ENABLED", "1").lower() in {"1", "true", "yes"}
+PERSISTENCE_FLUSH_INTERVAL = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "10"))
+
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "8"))
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "10"))
+RATE_LIMIT_MAX_USERS = int(os.getenv("RATE_LIMIT_MAX_USERS", "100000"))
+
+DUPLICATE_REQUEST_WINDOW = float(os.getenv("DUPLICATE_REQUEST_WINDOW", "2"))
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_REPORT_LIMIT = int(os.getenv("IMPORT_REPORT_LIMIT", "10"))
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.01"))
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "5"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+
+BATCH_UPLOAD_IDLE_SECONDS = float(os.getenv("BATCH_UPLOAD_IDLE_SECONDS", "3"))
+
+CHANNEL_MEMBERS_FLUSH_INTERVAL = float(os.getenv("CHANNEL_MEMBERS_FLUSH_INTERVAL", "2"))
+CHANNEL_MEMBERS_BATCH_SIZE = int(os.getenv("CHANNEL_MEMBERS_BATCH_SIZE", "500"))
+CHANNEL_MEMBERS_TTL = int(os.getenv("CHANNEL_MEMBERS_TTL", str(7 * 86400)))
+
+CODE_FILTER_ENABLED = os.getenv("CODE_FILTER_ENABLED", "1").lower() in {"1", "true", "yes"}
+CODE_FILTER_ERROR_RATE = float(os.getenv("CODE_FILTER_ERROR_RATE", "0.01"))
+CODE_FILTER_MIN_CAPACITY = int(os.getenv("CODE_FILTER_MIN_CAPACITY", "100000"))
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1").lower() in {"1", "true", "yes"}
+PREMIUM_CACHE_SIZE = int(os.getenv("PREMIUM_CACHE_SIZE", "100000"))
+CHANGE_POLL_INTERVAL = float(os.getenv("CHANGE_POLL_INTERVAL", "1"))
+CHANGE_LOG_RETENTION = int(os.getenv("CHANGE_LOG_RETENTION", "86400"))
+
+CATALOG_SNAPSHOT_ENABLED = (
+    os.getenv("CATALOG_SNAPSHOT_ENABLED", "1").lower() in {"1", "true", "yes"}
+)
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", f"{DB_PATH}.catalog")
+CATALOG_SNAPSHOT_MAX_AGE = float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", "300"))
+CATALOG_SNAPSHOT_REBUILD_DELAY = float(os.getenv("CATALOG_SNAPSHOT_REBUILD_DELAY", "5"))
+
+# 0/1 - bitta jarayon; N > 1 - supervisor N ta worker jarayonini ishga tushiradi
+SUPERVISOR_WORKERS = int(os.getenv("SUPERVISOR_WORKERS", "0"))
+SUPERVISOR_POLL_TIMEOUT = int(os.getenv("SUPERVISOR_POLL_TIMEOUT", "30"))
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Bot API HTTP transport; GET_UPDATES_* faqat long-polling so'rovi uchun
+BOT_API_POOL_SIZE = int(os.getenv("BOT_API_POOL_SIZE", "256"))
+# 0 - pool hajmi bilan teng
+BOT_API_KEEPALIVE = int(os.getenv("BOT_API_KEEPALIVE", "0"))
+BOT_API_KEEPALIVE_EXPIRY = float(os.getenv("BOT_API_KEEPALIVE_EXPIRY", "5"))
+BOT_API_HTTP2 = os.getenv("BOT_API_HTTP2", "0").lower() in {"1", "true", "yes"}
+BOT_API_CONNECT_TIMEOUT = float(os.getenv("BOT_API_CONNECT_TIMEOUT", "5"))
+BOT_API_READ_TIMEOUT = float(os.getenv("BOT_API_READ_TIMEOUT", "5"))
+BOT_API_WRITE_TIMEOUT = float(os.getenv("BOT_API_WRITE_TIMEOUT", "5"))
+BOT_API_POOL_TIMEOUT = float(os.getenv("BOT_API_POOL_TIMEOUT", "1"))
+# Metod bo'yicha read timeout: "sendVideo=30,getChatMember=3"
+BOT_API_METHOD_TIMEOUTS = {
+    name.strip(): float(value)
+    for name, value in (
+        item.split("=", 1) for item in os.getenv("BOT_API_METHOD_TIMEOUTS", "").split(",")
+        if "=" in item
+    )
+}
+GET_UPDATES_POOL_SIZE = int(os.getenv("GET_UPDATES_POOL_SIZE", "1"))
+GET_UPDATES_HTTP2 = os.getenv("GET_UPDATES_HTTP2", "0").lower() in {"1", "true", "yes"}
+GET_UPDATES_CONNECT_TIMEOUT = float(os.getenv("GET_UPDATES_CONNECT_TIMEOUT", "5"))
+# Long-polling timeout'i ustiga qo'shiladi
+GET_UPDATES_READ_TIMEOUT = float(os.getenv("GET_UPDATES_READ_TIMEOUT", "5"))
+GET_UPDATES_POOL_TIMEOUT = float(os.getenv("GET_UPDATES_POOL_TIMEOUT", "1"))
+
+# O'z telegram-bot-api serveringiz, masalan http://127.0.0.1:8081/bot (bo'sh - api.telegram.org)
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL", "")
+BOT_API_BASE_FILE_URL = os.getenv("BOT_API_BASE_FILE_URL", "")
+# Server --local bilan ishlasa: fayllar diskdan o'qiladi/yoziladi, 2000 MB gacha yuklash
+BOT_API_LOCAL_MODE = os.getenv("BOT_API_LOCAL_MODE", "0").lower() in {"1", "true", "yes"}
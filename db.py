@@ -5,83 +5,164 @@ import os
 import sqlite3
 import time
 from contextlib import contextmanager
-from typing import Callable, Iterable, Optional, Sequence, TypeVar
-
-from config import DB_MAX_RETRIES, DB_PATH, DB_TIMEOUT
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+import metrics
+from config import (
+    DATABASE_URL,
+    DB_BACKEND,
+    DB_MAX_RETRIES,
+    DB_PATH,
+    DB_TIMEOUT,
+    PG_POOL_MAX_SIZE,
+    PG_POOL_MIN_SIZE,
+    PG_STATEMENT_CACHE_SIZE,
+)
+from db_profiler import profiler
 from logging_conf import get_logger
+from storage.base import Backend
+from storage.sqlite import SQLiteBackend
 
 logger = get_logger(__name__)
 
 T = TypeVar("T")
 
 
-def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
-    conn.execute("PRAGMA foreign_keys=ON")
-    return conn
+def create_backend(name: str = DB_BACKEND) -> Backend:
+    if name == "postgres":
+        from storage.postgres import PostgresBackend
+
+        return PostgresBackend(
+            DATABASE_URL,
+            min_size=PG_POOL_MIN_SIZE,
+            max_size=PG_POOL_MAX_SIZE,
+            statement_cache_size=PG_STATEMENT_CACHE_SIZE,
+            timeout=DB_TIMEOUT,
+        )
+    if name != "sqlite":
+        raise ValueError(f"Noma'lum DB_BACKEND: {name}")
+    return SQLiteBackend(DB_PATH, DB_TIMEOUT)
+
+
+backend = create_backend()
+ERRORS = backend.errors
+
+
+def open_connection() -> sqlite3.Connection:
+    return backend.connect()
 
 
 @contextmanager
-def db_session() -> Iterable[sqlite3.Connection]:
-    conn = _connect()
-    try:
+def db_session(snapshot: bool = False) -> Iterator[sqlite3.Connection]:
+    with backend.session(snapshot) as conn:
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
 
 
-def _run_with_retry(op: Callable[[sqlite3.Connection], T]) -> T:
+def _run_with_retry(op: Callable[[sqlite3.Connection], T], name: str = "transaction") -> T:
+    labels = {"op": name}
+    with metrics.track(metrics.db_seconds, metrics.db_errors, labels):
+        return _retry_loop(op)
+
+
+def _retry_loop(op: Callable[[sqlite3.Connection], T]) -> T:
     delay = 0.05
     for attempt in range(DB_MAX_RETRIES):
         try:
             with db_session() as conn:
                 return op(conn)
-        except sqlite3.OperationalError as exc:
-            if "locked" in str(exc).lower() and attempt < DB_MAX_RETRIES - 1:
+        except Exception as exc:
+            if backend.is_retryable(exc) and attempt < DB_MAX_RETRIES - 1:
                 time.sleep(delay)
                 delay *= 2
                 continue
             raise
 
 
+def run_in_transaction(op: Callable[[sqlite3.Connection], T]) -> T:
+    return _run_with_retry(op)
+
+
 def execute(query: str, params: Sequence[object] = ()) -> int:
     def op(conn: sqlite3.Connection) -> int:
-        cur = conn.execute(query, params)
-        return cur.rowcount
+        return profiler.run(query, params, lambda: conn.execute(query, params).rowcount, int)
 
-    return _run_with_retry(op)
+    return _run_with_retry(op, "execute")
 
 
 def executemany(query: str, params_seq: Iterable[Sequence[object]]) -> int:
     def op(conn: sqlite3.Connection) -> int:
-        cur = conn.executemany(query, params_seq)
-        return cur.rowcount
+        return profiler.run(query, (), lambda: conn.executemany(query, params_seq).rowcount, int)
 
-    return _run_with_retry(op)
+    return _run_with_retry(op, "executemany")
 
 
 def fetchone(query: str, params: Sequence[object] = ()) -> Optional[sqlite3.Row]:
     def op(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
-        return conn.execute(query, params).fetchone()
+        return profiler.run(
+            query,
+            params,
+            lambda: conn.execute(query, params).fetchone(),
+            lambda row: int(row is not None),
+        )
 
-    return _run_with_retry(op)
+    return _run_with_retry(op, "fetchone")
 
 
 def fetchall(query: str, params: Sequence[object] = ()) -> list[sqlite3.Row]:
     def op(conn: sqlite3.Connection) -> list[sqlite3.Row]:
-        return conn.execute(query, params).fetchall()
+        return profiler.run(query, params, lambda: conn.execute(query, params).fetchall(), len)
 
-    return _run_with_retry(op)
+    return _run_with_retry(op, "fetchall")
+
+
+def iter_rows(
+    query: str, params: Sequence[object] = (), chunk_size: int = 1000
+) -> Iterator[sqlite3.Row]:
+    with db_session() as conn:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+
+def copy_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[object]],
+) -> int:
+    return backend.copy_rows(conn, table, columns, rows)
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    return backend.data_version(conn)
+
+
+def backup_to(
+    target_path: str,
+    pages: int,
+    sleep: float,
+    progress: Optional[Callable[[int, int, int], object]] = None,
+) -> None:
+    if backend.path is None:
+        raise RuntimeError("Onlayn backup faqat SQLite uchun; Postgres uchun pg_dump ishlating")
+    source = open_connection()
+    try:
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        finally:
+            target.close()
+    finally:
+        source.close()
 
 
 def init_db() -> None:
+    if backend.name != "sqlite":
+        backend.init_schema()
+        return
     with db_session() as conn:
         conn.execute(
             """
@@ -119,9 +200,68 @@ def init_db() -> None:
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS view_rollups (
+                period TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (period, bucket, code)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                ok INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS delivery_daily (
+                day INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                deliveries INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                users INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, code)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS channel_members (
+                channel_id TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (channel_id, user_id)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS persistence (
+                kind TEXT NOT NULL,
+                key INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (kind, key)
+            ) WITHOUT ROWID
+            """
+        )
     ensure_columns()
+    ensure_indexes()
     migrate_force_channels_id()
     migrate_legacy_json()
+    ensure_stats_counters()
+    ensure_change_log()
 
 
 def _table_columns(conn: sqlite3.Connection, table: str) -> set[str]:
@@ -146,6 +286,171 @@ def ensure_columns() -> None:
             conn.execute("ALTER TABLE users ADD COLUMN premium_until TEXT")
 
 
+def ensure_indexes() -> None:
+    with db_session() as conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_movies_views ON movies (views DESC)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_movies_parent ON movies (parent_code, created_at)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_movies_created ON movies (created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_ts ON deliveries (ts)")
+
+
+_COUNTER_BUMP = """
+    INSERT INTO stats_counters (name, value) VALUES ({name}, {delta})
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+"""
+
+_STATS_TRIGGERS = {
+    "trg_stats_movies_insert": f"""
+        AFTER INSERT ON movies BEGIN
+            {_COUNTER_BUMP.format(name="'movies'", delta=1)}
+            {_COUNTER_BUMP.format(name="'movies:' || NEW.type", delta=1)}
+        END
+    """,
+    "trg_stats_movies_delete": f"""
+        AFTER DELETE ON movies BEGIN
+            {_COUNTER_BUMP.format(name="'movies'", delta=-1)}
+            {_COUNTER_BUMP.format(name="'movies:' || OLD.type", delta=-1)}
+        END
+    """,
+    "trg_stats_movies_type": f"""
+        AFTER UPDATE OF type ON movies WHEN OLD.type IS NOT NEW.type BEGIN
+            {_COUNTER_BUMP.format(name="'movies:' || OLD.type", delta=-1)}
+            {_COUNTER_BUMP.format(name="'movies:' || NEW.type", delta=1)}
+        END
+    """,
+    "trg_stats_users_insert": f"""
+        AFTER INSERT ON users BEGIN
+            {_COUNTER_BUMP.format(name="'users'", delta=1)}
+            {_COUNTER_BUMP.format(name="'premium_users'", delta="(NEW.is_premium = 1)")}
+        END
+    """,
+    "trg_stats_users_delete": f"""
+        AFTER DELETE ON users BEGIN
+            {_COUNTER_BUMP.format(name="'users'", delta=-1)}
+            {_COUNTER_BUMP.format(name="'premium_users'", delta="-(OLD.is_premium = 1)")}
+        END
+    """,
+    "trg_stats_users_premium": f"""
+        AFTER UPDATE OF is_premium ON users
+        WHEN (OLD.is_premium = 1) IS NOT (NEW.is_premium = 1) BEGIN
+            {_COUNTER_BUMP.format(
+                name="'premium_users'",
+                delta="(NEW.is_premium = 1) - (OLD.is_premium = 1)",
+            )}
+        END
+    """,
+}
+
+
+def ensure_stats_counters() -> None:
+    with db_session() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+            """
+        )
+        for trigger, body in _STATS_TRIGGERS.items():
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger} {body}")
+        conn.execute("DELETE FROM stats_counters")
+        conn.execute(
+            """
+            INSERT INTO stats_counters (name, value)
+            SELECT 'movies', COUNT(*) FROM movies
+            UNION ALL
+            SELECT 'movies:' || type, COUNT(*) FROM movies GROUP BY type
+            UNION ALL
+            SELECT 'users', COUNT(*) FROM users
+            UNION ALL
+            SELECT 'premium_users', COUNT(*) FROM users WHERE is_premium = 1
+            """
+        )
+
+
+def _log_change(entity: str, key: str) -> str:
+    # Every logged key takes the next sequence number of its entity; NULL keys are skipped.
+    return f"""
+        INSERT INTO change_seq (entity, seq) SELECT '{entity}', 1 WHERE {key} IS NOT NULL
+        ON CONFLICT(entity) DO UPDATE SET seq = seq + 1;
+        INSERT INTO change_log (entity, seq, key, ts)
+        SELECT entity, seq, {key}, CAST(strftime('%s', 'now') AS INTEGER)
+        FROM change_seq WHERE entity = '{entity}' AND {key} IS NOT NULL;
+    """
+
+
+_CHANGE_TRIGGERS = {
+    "trg_changes_movies_insert": f"""
+        AFTER INSERT ON movies BEGIN
+            {_log_change("movies", "NEW.code")}
+        END
+    """,
+    "trg_changes_movies_update": f"""
+        AFTER UPDATE OF name, type, file_id, desc, parent_code ON movies BEGIN
+            {_log_change("movies", "NEW.code")}
+        END
+    """,
+    "trg_changes_movies_delete": f"""
+        AFTER DELETE ON movies BEGIN
+            {_log_change("movies", "OLD.code")}
+        END
+    """,
+    "trg_changes_channels_insert": f"""
+        AFTER INSERT ON force_channels BEGIN
+            {_log_change("force_channels", "NEW.channel_id")}
+        END
+    """,
+    "trg_changes_channels_update": f"""
+        AFTER UPDATE ON force_channels BEGIN
+            {_log_change("force_channels", "NEW.channel_id")}
+        END
+    """,
+    "trg_changes_channels_delete": f"""
+        AFTER DELETE ON force_channels BEGIN
+            {_log_change("force_channels", "OLD.channel_id")}
+        END
+    """,
+    "trg_changes_premium_insert": f"""
+        AFTER INSERT ON users WHEN NEW.is_premium = 1 BEGIN
+            {_log_change("premium", "NEW.user_id")}
+        END
+    """,
+    "trg_changes_premium_update": f"""
+        AFTER UPDATE OF is_premium, premium_until ON users BEGIN
+            {_log_change("premium", "NEW.user_id")}
+        END
+    """,
+}
+
+
+def ensure_change_log() -> None:
+    with db_session() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_seq (
+                entity TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS change_log (
+                entity TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                PRIMARY KEY (entity, seq)
+            ) WITHOUT ROWID
+            """
+        )
+        for trigger, body in _CHANGE_TRIGGERS.items():
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger} {body}")
+
+
 def migrate_force_channels_id() -> None:
     with db_session() as conn:
         columns = _table_columns(conn, "force_channels")
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, TypeVar
+
+from config import DB_PROFILE, DB_PROFILE_SAMPLES, DB_SLOW_QUERY_MS
+from logging_conf import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r"\s+")
+_DB_HELPERS = {"execute", "executemany", "fetchone", "fetchall", "iter_rows"}
+_REPOSITORIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "repositories")
+
+
+def normalize_sql(query: str) -> str:
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def redact_params(params: Sequence[object]) -> str:
+    return "(" + ", ".join(f"<{type(value).__name__}>" for value in params) + ")"
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+@dataclass(frozen=True)
+class StatementStats:
+    sql: str
+    count: int
+    total_ms: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+    rows: int
+
+
+class _Series:
+    __slots__ = ("count", "total", "max", "rows", "samples")
+
+    def __init__(self, samples: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples: deque[float] = deque(maxlen=samples)
+
+
+class QueryProfiler:
+    def __init__(
+        self,
+        *,
+        enabled: bool = DB_PROFILE,
+        slow_ms: float = DB_SLOW_QUERY_MS,
+        samples: int = DB_PROFILE_SAMPLES,
+    ) -> None:
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.samples = samples
+        self._series: dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        query: str,
+        params: Sequence[object],
+        fn: Callable[[], T],
+        row_count: Callable[[T], int],
+    ) -> T:
+        if not self.enabled:
+            return fn()
+        start = time.perf_counter()
+        result = fn()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.record(query, params, elapsed_ms, row_count(result))
+        return result
+
+    def record(
+        self,
+        query: str,
+        params: Sequence[object],
+        elapsed_ms: float,
+        rows: int,
+    ) -> None:
+        sql = normalize_sql(query)
+        with self._lock:
+            series = self._series.get(sql)
+            if series is None:
+                series = self._series[sql] = _Series(self.samples)
+            series.count += 1
+            series.total += elapsed_ms
+            series.max = max(series.max, elapsed_ms)
+            series.rows += max(rows, 0)
+            series.samples.append(elapsed_ms)
+        if elapsed_ms >= self.slow_ms:
+            logger.warning(
+                "🐢 Sekin so'rov %.1f ms (%s qator): %s %s",
+                elapsed_ms,
+                rows,
+                sql,
+                redact_params(params),
+            )
+
+    def statements(self) -> list[str]:
+        with self._lock:
+            return list(self._series)
+
+    def snapshot(self) -> list[StatementStats]:
+        with self._lock:
+            items = [(sql, series, sorted(series.samples)) for sql, series in self._series.items()]
+        result = [
+            StatementStats(
+                sql=sql,
+                count=series.count,
+                total_ms=series.total,
+                p50_ms=_percentile(samples, 0.5),
+                p99_ms=_percentile(samples, 0.99),
+                max_ms=series.max,
+                rows=series.rows,
+            )
+            for sql, series, samples in items
+        ]
+        result.sort(key=lambda item: item.total_ms, reverse=True)
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+profiler = QueryProfiler()
+
+
+def discover_repository_queries(directory: str = _REPOSITORIES_DIR) -> list[str]:
+    queries: list[str] = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".py"):
+            continue
+        with open(os.path.join(directory, filename), "r", encoding="utf-8") as file_obj:
+            tree = ast.parse(file_obj.read(), filename=filename)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or not node.args:
+                continue
+            func = node.func
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            first = node.args[0]
+            if name in _DB_HELPERS and isinstance(first, ast.Constant):
+                if isinstance(first.value, str):
+                    queries.append(normalize_sql(first.value))
+    return list(dict.fromkeys(queries))
+
+
+@dataclass(frozen=True)
+class PlanFinding:
+    sql: str
+    plan: list[str]
+    full_scans: list[str]
+    error: Optional[str] = None
+
+
+def explain_query(conn: sqlite3.Connection, sql: str, tables: set[str]) -> PlanFinding:
+    params = [None] * sql.count("?")
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error as exc:
+        return PlanFinding(sql=sql, plan=[], full_scans=[], error=str(exc))
+    plan = [row[3] for row in rows]
+    full_scans = []
+    for detail in plan:
+        parts = detail.split()
+        if len(parts) >= 2 and parts[0] == "SCAN" and "USING" not in parts:
+            if parts[1] in tables:
+                full_scans.append(parts[1])
+    return PlanFinding(sql=sql, plan=plan, full_scans=full_scans)
+
+
+def audit_queries(conn: sqlite3.Connection, queries: Sequence[str]) -> list[PlanFinding]:
+    tables = {
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    }
+    return [explain_query(conn, sql, tables) for sql in queries]
+
+
+def audit_supported() -> bool:
+    from db import backend
+
+    # EXPLAIN QUERY PLAN and sqlite_master are SQLite-only.
+    return backend.name == "sqlite"
+
+
+def run_audit() -> list[PlanFinding]:
+    from db import db_session
+
+    if not audit_supported():
+        raise RuntimeError("Query plan audit faqat SQLite uchun")
+    queries = list(dict.fromkeys(discover_repository_queries() + profiler.statements()))
+    with db_session() as conn:
+        return audit_queries(conn, queries)
+
+
+def format_audit(findings: Sequence[PlanFinding], *, verbose: bool = False) -> str:
+    lines = []
+    flagged = [item for item in findings if item.full_scans or item.error]
+    lines.append(f"🔎 {len(findings)} ta so'rov tekshirildi, {len(flagged)} tasida muammo.\n")
+    for item in findings if verbose else flagged:
+        if item.error:
+            status = f"❌ {item.error}"
+        elif item.full_scans:
+            status = "⚠️ FULL SCAN: " + ", ".join(item.full_scans)
+        else:
+            status = "✅"
+        lines.append(f"{status}\n  {item.sql}")
+        lines.extend(f"    {detail}" for detail in item.plan)
+    return "\n".join(lines) + "\n"
+
+
+def format_stats(stats: Sequence[StatementStats], limit: int = 20) -> str:
+    if not stats:
+        return "DB profiling ma'lumotlari yo'q (DB_PROFILE=1 bilan yoqing).\n"
+    lines = ["count   total_ms   p50_ms   p99_ms   max_ms     rows  sql"]
+    for item in stats[:limit]:
+        lines.append(
+            f"{item.count:>5} {item.total_ms:>10.1f} {item.p50_ms:>8.2f} {item.p99_ms:>8.2f} "
+            f"{item.max_ms:>8.2f} {item.rows:>8}  {item.sql[:120]}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Repository so'rovlari uchun query plan audit")
+    parser.add_argument("--verbose", action="store_true", help="Barcha rejalarni chiqarish")
+    parser.add_argument("--strict", action="store_true", help="Full scan bo'lsa exit code 1")
+    args = parser.parse_args()
+
+    from db import init_db
+
+    init_db()
+    if not audit_supported():
+        raise SystemExit("Query plan audit faqat SQLite uchun (DB_BACKEND=sqlite)")
+    findings = run_audit()
+    print(format_audit(findings, verbose=args.verbose), end="")
+    if args.strict and any(item.full_scans or item.error for item in findings):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,47 @@
 from __future__ import annotations
 
 import asyncio
+import io
+import os
+import tempfile
+import time
 import urllib.parse
+from pathlib import Path
+from typing import Optional
 
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram import InputFile, Update
 from telegram.ext import ContextTypes
 
-from config import BROADCAST_CHUNK_SIZE, BROADCAST_CONCURRENCY, MOVIE_LIST_LIMIT
+import db_profiler
+from config import (
+    BOT_API_LOCAL_MODE,
+    BROADCAST_CHUNK_SIZE,
+    BROADCAST_CONCURRENCY,
+    MOVIE_LIST_LIMIT,
+    PROFILE_DEFAULT_SECONDS,
+    PROFILE_MAX_SECONDS,
+    TOP_LIST_LIMIT,
+    TRENDING_WINDOW_HOURS,
+)
 from handlers import common, user as user_handlers
 from keyboards import (
     admin_delete_channels_keyboard,
     admin_delete_movies_keyboard,
     admin_panel_keyboard,
+    back_to_admin_keyboard,
+    batch_upload_keyboard,
     edit_fields_keyboard,
+    premium_actions_keyboard,
     premium_prices_keyboard,
 )
 from logging_conf import get_logger
-from repositories import force_channels, movies, users
+from rendering import (
+    render_admin_movie_list,
+    render_delivery_report,
+    render_top_report,
+)
+from repositories import deliveries, force_channels, movies, stats, users
+from services import backup, batch_upload, catalog_import, delivery_log, outbound, profiling
 
 logger = get_logger(__name__)
 
@@ -35,9 +60,171 @@ async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     await update.message.reply_text("✅ Admin paneli:", reply_markup=admin_panel_keyboard())
 
 
+async def db_audit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not common.is_admin(update.effective_user.id):
+        await update.message.reply_text("❌ Sizda admin huquqi yo'q.")
+        return
+    if not db_profiler.audit_supported():
+        await update.message.reply_text("ℹ️ DB audit faqat SQLite uchun (EXPLAIN QUERY PLAN).")
+        return
+
+    findings = await asyncio.to_thread(db_profiler.run_audit)
+    report = (
+        db_profiler.format_stats(db_profiler.profiler.snapshot())
+        + "\n"
+        + db_profiler.format_audit(findings, verbose=True)
+    )
+    flagged = sum(1 for item in findings if item.full_scans or item.error)
+    await update.message.reply_document(
+        InputFile(io.BytesIO(report.encode("utf-8")), filename="db_audit.txt"),
+        caption=f"🔎 DB audit: {len(findings)} ta so'rov, {flagged} tasida full scan/xatolik.",
+    )
+
+
+@outbound.prioritized(outbound.Priority.ADMIN)
+async def _run_profile(
+    chat_id: int, seconds: int, mode: str, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    try:
+        report = await profiling.profile_for(seconds, mode)
+    except Exception as exc:
+        logger.error("Profilingda xatolik: %s", exc)
+        await context.bot.send_message(chat_id, "❌ Profilingda xatolik yuz berdi.")
+        return
+    await context.bot.send_document(
+        chat_id,
+        InputFile(io.BytesIO(report.encode("utf-8")), filename=f"profile_{mode}.txt"),
+        caption=f"🧪 Profil tayyor ({mode}, {seconds}s).",
+    )
+
+
+async def start_profile(
+    chat_id: int, seconds: int, mode: str, context: ContextTypes.DEFAULT_TYPE
+) -> str:
+    if profiling.is_running():
+        return "⚠️ Profiling allaqachon ishlayapti."
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+    context.application.create_task(_run_profile(chat_id, seconds, mode, context))
+    return f"🧪 Profiling boshlandi: {mode}, {seconds} soniya. Hisobot hujjat sifatida keladi."
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not common.is_admin(update.effective_user.id):
+        await update.message.reply_text("❌ Sizda admin huquqi yo'q.")
+        return
+
+    seconds = PROFILE_DEFAULT_SECONDS
+    mode = "cprofile"
+    for arg in context.args or []:
+        if arg.isdigit():
+            seconds = int(arg)
+        elif arg in profiling.MODES:
+            mode = arg
+        else:
+            await update.message.reply_text(
+                "⚠️ Foydalanish: /profile [soniya] [cprofile|sample]"
+            )
+            return
+
+    text = await start_profile(update.effective_chat.id, seconds, mode, context)
+    await update.message.reply_text(text)
+
+
+UPLOAD_LIMIT_MB = 2000 if BOT_API_LOCAL_MODE else 50
+UPLOAD_LIMIT_BYTES = UPLOAD_LIMIT_MB * 1024 * 1024
+
+
+async def _send_file(
+    chat_id: int, path: str, caption: str, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    if os.path.getsize(path) > UPLOAD_LIMIT_BYTES:
+        await context.bot.send_message(
+            chat_id,
+            f"{caption}\n\n⚠️ Fayl {UPLOAD_LIMIT_MB} MB dan katta, serverda saqlandi:\n{path}",
+        )
+        return
+    if BOT_API_LOCAL_MODE:
+        # The local server reads the file from disk itself; nothing is uploaded.
+        await context.bot.send_document(chat_id, Path(path), caption=caption)
+        return
+    with open(path, "rb") as file_obj:
+        await context.bot.send_document(
+            chat_id,
+            InputFile(file_obj, filename=os.path.basename(path)),
+            caption=caption,
+        )
+
+
+@outbound.prioritized(outbound.Priority.ADMIN)
+async def _run_backup(chat_id: int, context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        result = await asyncio.to_thread(backup.create_backup)
+    except Exception as exc:
+        logger.error("Backupda xatolik: %s", exc)
+        await context.bot.send_message(chat_id, "❌ Backupda xatolik yuz berdi.")
+        return
+    caption = (
+        f"💾 Backup tayyor: {backup.format_size(result.size)}, "
+        f"{result.pages} sahifa, {result.seconds:.1f}s"
+    )
+    await _send_file(chat_id, result.path, caption, context)
+
+
+@outbound.prioritized(outbound.Priority.ADMIN)
+async def _run_export(chat_id: int, fmt: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        result = await asyncio.to_thread(backup.export_catalog, fmt=fmt)
+    except Exception as exc:
+        logger.error("Eksportda xatolik: %s", exc)
+        await context.bot.send_message(chat_id, "❌ Eksportda xatolik yuz berdi.")
+        return
+    caption = (
+        f"📤 Eksport ({fmt}): {result.counts.get('movies', 0)} kino, "
+        f"{result.counts.get('users', 0)} user, {backup.format_size(result.size)}"
+    )
+    await _send_file(chat_id, result.path, caption, context)
+
+
+async def backup_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not common.is_admin(update.effective_user.id):
+        await update.message.reply_text("❌ Sizda admin huquqi yo'q.")
+        return
+
+    context.application.create_task(_run_backup(update.effective_chat.id, context))
+    await update.message.reply_text("💾 Backup boshlandi. Fayl tayyor bo'lgach yuboriladi.")
+
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not common.is_admin(update.effective_user.id):
+        await update.message.reply_text("❌ Sizda admin huquqi yo'q.")
+        return
+
+    fmt = (context.args or ["jsonl"])[0].lower()
+    if fmt not in backup.EXPORT_FORMATS:
+        await update.message.reply_text("⚠️ Foydalanish: /export [jsonl|csv]")
+        return
+    context.application.create_task(_run_export(update.effective_chat.id, fmt, context))
+    await update.message.reply_text(f"📤 Eksport ({fmt}) boshlandi.")
+
+
+def _throttled_callback(data: str) -> Optional[str]:
+    if data.startswith("pick:") or data.startswith("pick_"):
+        return "handle_pick_callback"
+    if data == "random_movies":
+        return "handle_random_movies"
+    return None
+
+
 async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     logger.info("Callback received: %s", query.data if query else "none")
+    throttle_name = _throttled_callback(query.data or "")
+    if throttle_name:
+        limited, notify = common.rate_limited(update, throttle_name)
+        if limited:
+            # The query's only answer; dropped floods cost no DB write.
+            await query.answer(common.THROTTLED_TEXT if notify else None)
+            return
     await query.answer()
     users.upsert_user(query.from_user)
     user_id = query.from_user.id
@@ -56,6 +243,8 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return await common.main_menu(update, context)
     if data == "random_movies":
         return await user_handlers.handle_random_movies(update, context)
+    if data == "top_movies":
+        return await user_handlers.handle_top_movies(update, context)
 
     if data == "buy_premium":
         await common.safe_edit_or_send(
@@ -75,12 +264,6 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         months = int(data.split(":", 1)[1])
         prices = {1: 5000, 3: 14000, 6: 27000, 12: 50000}
         price = prices.get(months, 5000)
-        premium_actions = InlineKeyboardMarkup(
-            [
-                [InlineKeyboardButton("📞 Admin", callback_data="contact_admin")],
-                [InlineKeyboardButton("◀️ Orqaga", callback_data="buy_premium")],
-            ]
-        )
         await common.safe_edit_or_send(
             query,
             context,
@@ -89,7 +272,7 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             f"To'lov uchun admin bilan bog'laning:\n"
             f"🆔 Sizning ID: {user_id}\n\n"
             "To'lov qilgandan keyin adminlarga xabar bering.",
-            reply_markup=premium_actions,
+            reply_markup=premium_actions_keyboard(),
         )
         return
 
@@ -97,12 +280,6 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         months = int(data.split("_")[2])
         prices = {1: 5000, 3: 14000, 6: 27000, 12: 50000}
         price = prices.get(months, 5000)
-        premium_actions = InlineKeyboardMarkup(
-            [
-                [InlineKeyboardButton("📞 Admin", callback_data="contact_admin")],
-                [InlineKeyboardButton("◀️ Orqaga", callback_data="buy_premium")],
-            ]
-        )
         await common.safe_edit_or_send(
             query,
             context,
@@ -111,7 +288,7 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             f"To'lov uchun admin bilan bog'laning:\n"
             f"🆔 Sizning ID: {user_id}\n\n"
             "To'lov qilgandan keyin adminlarga xabar bering.",
-            reply_markup=premium_actions,
+            reply_markup=premium_actions_keyboard(),
         )
         return
 
@@ -124,6 +301,29 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await common.safe_edit_or_send(query, context, "📝 Yangi kino kodi (masalan: A123):")
         return
 
+    if data == "batch_upload":
+        context.user_data["admin_mode"] = "batch_parent"
+        await common.safe_edit_or_send(
+            query, context, "🎞 Serialning asosiy (parent) kodini yuboring (masalan: S12):"
+        )
+        return
+
+    if data == "batch_done":
+        context.user_data["admin_mode"] = None
+        finished = await batch_upload.finish_session(user_id)
+        if finished:
+            session, result = finished
+            text = (
+                f"🏁 Serial yuklash tugadi ({session.parent_code}).\n"
+                f"✅ Jami qo'shildi: {session.total_added}"
+            )
+            if result.skipped:
+                text += f"\n⚠️ Mavjud kodlar o'tkazib yuborildi: {', '.join(result.skipped)}"
+        else:
+            text = "ℹ️ Serial yuklash rejimi faol emas."
+        await common.safe_edit_or_send(query, context, text, reply_markup=admin_panel_keyboard())
+        return
+
     if data == "edit_movie":
         context.user_data["admin_mode"] = "edit_code"
         context.user_data.pop("edit_code", None)
@@ -163,24 +363,19 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not rows:
             await common.safe_edit_or_send(query, context, "⚠️ Hozircha kino yo'q.")
             return
-        text = "📋 Kinolar ro'yxati (yangi → eski):\n\n"
-        for item in rows[:MOVIE_LIST_LIMIT]:
-            name = item.name or (item.desc[:30] if item.desc else "")
-            text += f"🆔 {item.code} - {name} | 👁️ {item.views}\n"
-        if len(rows) > MOVIE_LIST_LIMIT:
-            text += f"\n...va yana {len(rows) - MOVIE_LIST_LIMIT} ta kino"
-        await common.safe_edit_or_send(query, context, text)
+        await common.safe_edit_or_send(
+            query, context, render_admin_movie_list(rows, MOVIE_LIST_LIMIT)
+        )
         return
 
     if data == "admin_stats":
-        total, counts = movies.movie_stats()
-        user_count = users.get_user_count()
-        premium_stats = users.get_premium_stats()
+        admin_stats = stats.get_admin_stats()
+        counts = admin_stats.movie_types
         stats_text = (
             "📊 Admin statistikasi\n\n"
-            f"👥 Foydalanuvchilar: {user_count}\n"
-            f"💎 Premium: {premium_stats.premium_count}\n"
-            f"📁 Jami kinolar: {total}\n"
+            f"👥 Foydalanuvchilar: {admin_stats.user_count}\n"
+            f"💎 Premium: {admin_stats.premium_count}\n"
+            f"📁 Jami kinolar: {admin_stats.movie_count}\n"
             f"🎥 Videolar: {counts.get('video', 0)}\n"
             f"📄 Hujjatlar: {counts.get('document', 0)}\n"
             f"🖼 Rasmlar: {counts.get('photo', 0)}\n"
@@ -189,6 +384,72 @@ async def callbacks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await common.safe_edit_or_send(query, context, stats_text)
         return
 
+    if data == "admin_top":
+        await common.safe_edit_or_send(
+            query,
+            context,
+            render_top_report(
+                [
+                    (
+                        f"🔥 Oxirgi {TRENDING_WINDOW_HOURS} soat",
+                        movies.get_trending_movies(TRENDING_WINDOW_HOURS, TOP_LIST_LIMIT),
+                    ),
+                    ("📅 Oxirgi 7 kun", movies.get_top_movies_for_days(7, TOP_LIST_LIMIT)),
+                    ("🏆 Umumiy", movies.get_top_movies(TOP_LIST_LIMIT)),
+                ]
+            ),
+            reply_markup=back_to_admin_keyboard(),
+        )
+        return
+
+    if data == "admin_deliveries":
+        now = int(time.time())
+        await delivery_log.writer.flush()
+        await common.safe_edit_or_send(
+            query,
+            context,
+            render_delivery_report(
+                deliveries.get_summary(now - 86400),
+                deliveries.get_hourly_counts(now - 86400),
+                deliveries.get_top_codes(now - 86400, TOP_LIST_LIMIT),
+                deliveries.get_top_users(now - 86400, TOP_LIST_LIMIT),
+                deliveries.get_daily_totals(now // 86400 * 86400 - 6 * 86400),
+            ),
+            reply_markup=back_to_admin_keyboard(),
+        )
+        return
+
+    if data == "admin_profile":
+        chat_id = query.message.chat_id if query.message else user_id
+        text = await start_profile(chat_id, PROFILE_DEFAULT_SECONDS, "cprofile", context)
+        await common.safe_edit_or_send(query, context, text, reply_markup=back_to_admin_keyboard())
+        return
+
+    if data == "admin_import":
+        context.user_data["admin_mode"] = "import"
+        await common.safe_edit_or_send(
+            query,
+            context,
+            "📥 Katalog importi\n\n"
+            "CSV yoki JSONL faylni hujjat sifatida yuboring.\n"
+            "Ustunlar: code, name, type, file_id, desc, parent_code, views\n"
+            "(majburiy: code, name, file_id; type default video).",
+            reply_markup=back_to_admin_keyboard(),
+        )
+        return
+
+    if data == "admin_backup":
+        chat_id = query.message.chat_id if query.message else user_id
+        context.application.create_task(_run_backup(chat_id, context))
+        await common.safe_edit_or_send(
+            query,
+            context,
+            "💾 Backup boshlandi. Fayl tayyor bo'lgach yuboriladi.\n"
+            "Eksport uchun: /export [jsonl|csv]",
+            reply_markup=back_to_admin_keyboard(),
+        )
+        return
+
     if data == "user_stats":
         premium_stats = users.get_premium_stats()
         await common.safe_edit_or_send(
@@ -367,6 +628,47 @@ async def handle_admin_text(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("⚠️ Iltimos, video fayl yuboring.")
         return
 
+    if mode == "batch_parent":
+        parent_code = common.normalize_code(update.message.text)
+        if not parent_code:
+            await update.message.reply_text("⚠️ Kod bo'sh bo'lmasligi kerak.")
+            return
+        context.user_data["batch_parent"] = parent_code
+        context.user_data["admin_mode"] = "batch_prefix"
+        await update.message.reply_text(
+            f"🔢 Qism kodlari prefiksini yuboring (masalan: {parent_code}E → "
+            f"{parent_code}E1, {parent_code}E2, ...).\n"
+            f"'-' yuborsangiz: {parent_code}E"
+        )
+        return
+
+    if mode == "batch_prefix":
+        parent_code = context.user_data.get("batch_parent")
+        if not parent_code:
+            context.user_data["admin_mode"] = None
+            await update.message.reply_text("⚠️ Xatolik yuz berdi. Qaytadan boshlang.")
+            return
+        raw_prefix = update.message.text.strip()
+        prefix = f"{parent_code}E" if raw_prefix in {"", "-"} else common.normalize_code(raw_prefix)
+        context.user_data["batch_prefix"] = prefix
+        context.user_data["admin_mode"] = "batch_collect"
+        await batch_upload.finish_session(user_id)
+        _start_batch_session(user_id, update.effective_chat.id, context)
+        first = await asyncio.to_thread(batch_upload.first_free_episode, parent_code, prefix)
+        await update.message.reply_text(
+            "📤 Endi qismlarni ketma-ket yuboring yoki forward qiling (albom ham bo'ladi).\n"
+            f"Kodlar {prefix}{first} dan boshlab avtomatik beriladi.\n"
+            "Yuborish to'xtagach qisqa xulosa keladi. Tugatish uchun pastdagi tugmani bosing.",
+            reply_markup=batch_upload_keyboard(),
+        )
+        return
+
+    if mode == "batch_collect":
+        await update.message.reply_text(
+            "⚠️ Video yoki hujjat yuboring.", reply_markup=batch_upload_keyboard()
+        )
+        return
+
     if mode == "delete":
         code = common.normalize_code(update.message.text)
         deleted = movies.delete_movie(code)
@@ -576,6 +878,14 @@ async def handle_admin_media(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
 
     mode = context.user_data.get("admin_mode")
+    if mode == "import":
+        await import_catalog(update, context)
+        return
+
+    if mode == "batch_collect":
+        await queue_batch_item(update, context)
+        return
+
     if mode == "add_file":
         message = update.message
         file_id = None
@@ -622,6 +932,81 @@ async def handle_admin_media(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
 
 
+def _start_batch_session(
+    user_id: int, chat_id: int, context: ContextTypes.DEFAULT_TYPE
+) -> batch_upload.BatchUploadSession:
+    async def notify(text: str) -> None:
+        await context.bot.send_message(chat_id, text, reply_markup=batch_upload_keyboard())
+
+    return batch_upload.start_session(
+        user_id,
+        context.user_data["batch_parent"],
+        context.user_data["batch_prefix"],
+        notify,
+    )
+
+
+async def queue_batch_item(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    message = update.message
+    if message.video:
+        file_id, content_type = message.video.file_id, "video"
+    elif message.document:
+        file_id, content_type = message.document.file_id, "document"
+    else:
+        await message.reply_text("⚠️ Video yoki hujjat yuboring.")
+        return
+
+    user_id = update.effective_user.id
+    session = batch_upload.get_session(user_id)
+    if session is None:
+        if not context.user_data.get("batch_parent") or not context.user_data.get("batch_prefix"):
+            context.user_data["admin_mode"] = None
+            await message.reply_text("⚠️ Xatolik yuz berdi. Qaytadan boshlang.")
+            return
+        session = _start_batch_session(user_id, update.effective_chat.id, context)
+    session.add(
+        batch_upload.PendingItem(
+            message_id=message.message_id,
+            file_id=file_id,
+            content_type=content_type,
+            caption=message.caption or "",
+        )
+    )
+
+
+async def import_catalog(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    document = update.message.document
+    if not document or not catalog_import.is_supported(document.file_name or ""):
+        await update.message.reply_text("⚠️ Iltimos, .csv yoki .jsonl fayl yuboring.")
+        return
+
+    context.user_data["admin_mode"] = None
+    await update.message.reply_text("⏳ Import boshlandi...")
+    with tempfile.TemporaryDirectory(prefix="import_") as tmp_dir:
+        source_path = os.path.join(tmp_dir, "source")
+        errors_path = os.path.join(tmp_dir, "errors.csv")
+        try:
+            tg_file = await document.get_file()
+            await tg_file.download_to_drive(source_path)
+            report = await asyncio.to_thread(
+                catalog_import.import_file, source_path, document.file_name, errors_path
+            )
+        except Exception as exc:
+            logger.error("Importda xatolik: %s", exc)
+            await update.message.reply_text("❌ Importda xatolik yuz berdi.")
+            return
+
+        await update.message.reply_text(
+            catalog_import.format_report(report), reply_markup=admin_panel_keyboard()
+        )
+        if report.failed:
+            with open(errors_path, "rb") as file_obj:
+                await update.message.reply_document(
+                    InputFile(file_obj, filename="import_errors.csv"),
+                    caption=f"❌ Xato qatorlar: {report.failed}",
+                )
+
+
 async def broadcast_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not common.is_admin(update.effective_user.id):
         return
@@ -655,7 +1040,8 @@ async def broadcast_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
     for i in range(0, len(user_ids), BROADCAST_CHUNK_SIZE):
         chunk = user_ids[i : i + BROADCAST_CHUNK_SIZE]
-        results = await asyncio.gather(*(send_one(uid) for uid in chunk))
+        with outbound.priority(outbound.Priority.BROADCAST):
+            results = await asyncio.gather(*(send_one(uid) for uid in chunk))
         sent += sum(1 for r in results if r)
         failed += sum(1 for r in results if not r)
 
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from repositories import force_channels
+from services import channel_members
+
+
+async def track_channel_member(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    change = update.chat_member
+    if change is None:
+        return
+    channel_id = channel_members.resolve_channel_id(
+        force_channels.get_force_channels(), change.chat.id, change.chat.username
+    )
+    if channel_id is None:
+        return
+    member = change.new_chat_member
+    channel_members.writer.record(
+        channel_id, member.user.id, member.status, int(change.date.timestamp())
+    )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Awaitable, Callable, Optional
+import functools
 import re
 
 from telegram import Update
@@ -9,8 +10,9 @@ from telegram.ext import ContextTypes
 from config import ADMIN_IDS
 from keyboards import force_sub_keyboard, main_menu_keyboard
 from logging_conf import get_logger
+from metrics import throttled_updates
 from repositories import force_channels, users
-from services import force_subscribe
+from services import force_subscribe, outbound, rate_limit
 
 logger = get_logger(__name__)
 
@@ -19,6 +21,41 @@ def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
 
 
+Handler = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[Any]]
+
+THROTTLED_TEXT = "⏳ Juda ko'p so'rov yuborildi. Birozdan keyin qayta urinib ko'ring."
+
+
+def rate_limited(update: Update, name: str) -> tuple[bool, bool]:
+    user = update.effective_user
+    if not user or is_admin(user.id):
+        return False, False
+    allowed, first_drop = rate_limit.limiter.hit(user.id)
+    if allowed:
+        return False, False
+    throttled_updates.inc(labels={"handler": name})
+    return True, first_drop
+
+
+def throttled(name: str) -> Callable[[Handler], Handler]:
+    def decorator(func: Handler) -> Handler:
+        @functools.wraps(func)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Any:
+            limited, notify = rate_limited(update, name)
+            if limited:
+                if notify:
+                    if update.callback_query:
+                        await update.callback_query.answer(THROTTLED_TEXT)
+                    elif update.effective_message:
+                        await update.effective_message.reply_text(THROTTLED_TEXT)
+                return None
+            return await func(update, context)
+
+        return wrapper
+
+    return decorator
+
+
 def normalize_code(value: str) -> str:
     return value.strip().upper()
 
@@ -68,6 +105,15 @@ async def search_movie(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     await safe_edit_or_send(query, context, "🔍 Kino kodini kiriting:")
 
 
+@outbound.prioritized(outbound.Priority.ADMIN)
+async def notify_admins(context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
+    for admin_id in ADMIN_IDS:
+        try:
+            await context.bot.send_message(admin_id, text)
+        except Exception as exc:
+            logger.error("Adminga xabar yuborishda xatolik: %s", exc)
+
+
 async def contact_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
@@ -78,19 +124,15 @@ async def contact_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         return
 
     user = query.from_user
-    for admin_id in ADMIN_IDS:
-        try:
-            await context.bot.send_message(
-                admin_id,
-                (
-                    "📞 Yangi bog'lanish so'rovi\n\n"
-                    f"👤 Foydalanuvchi: {user.first_name}\n"
-                    f"🆔 ID: {user.id}\n"
-                    f"📱 Username: @{user.username if user.username else 'mavjud emas'}"
-                ),
-            )
-        except Exception as exc:
-            logger.error("Adminga xabar yuborishda xatolik: %s", exc)
+    await notify_admins(
+        context,
+        (
+            "📞 Yangi bog'lanish so'rovi\n\n"
+            f"👤 Foydalanuvchi: {user.first_name}\n"
+            f"🆔 ID: {user.id}\n"
+            f"📱 Username: @{user.username if user.username else 'mavjud emas'}"
+        ),
+    )
 
     await safe_edit_or_send(
         query,
@@ -104,7 +146,7 @@ async def handle_check_sub(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await query.answer()
     user_id = query.from_user.id
     subscribed = await force_subscribe.is_user_subscribed(
-        user_id, context, is_admin=is_admin(user_id)
+        user_id, context, is_admin=is_admin(user_id), recheck_unsubscribed=True
     )
 
     if subscribed:
@@ -3,11 +3,14 @@ from __future__ import annotations
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from config import PROMO_CHANNEL, RANDOM_LIST_LIMIT
+from config import RANDOM_LIST_LIMIT, TOP_LIST_LIMIT, TRENDING_WINDOW_HOURS
 from handlers import common
 from keyboards import force_sub_keyboard, main_menu_keyboard, numbered_keyboard
+from metrics import timed
+from rendering import render_movie_list
 from repositories import force_channels, movies, users
 from services import force_subscribe, sender
+from services.coalesce import coalescer
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     users.upsert_user(update.effective_user)
@@ -32,6 +35,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text(text, reply_markup=main_menu_keyboard())
 
 
+@common.throttled("handle_user_code")
 async def handle_user_code(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     users.upsert_user(update.effective_user)
     raw_text = update.message.text or ""
@@ -43,6 +47,7 @@ async def handle_user_code(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     await handle_code_entry(update.effective_user.id, update.effective_chat.id, code, context)
 
 
+@timed("handle_code_entry")
 async def handle_code_entry(
     user_id: int,
     chat_id: int,
@@ -69,27 +74,25 @@ async def handle_code_entry(
 async def process_code_request(
     chat_id: int, code: str, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
-    movie = movies.get_movie(code)
-    if movie:
-        await sender.send_movie_to_chat(chat_id, movie, code, context)
-        return
+    await coalescer.run((chat_id, code), lambda: _deliver_code(chat_id, code, context))
+
 
-    children = movies.get_children(code)
-    if children:
-        text = "📺 Qismlar ro'yxati (eski → yangi):\n\n"
-        for idx, item in enumerate(children, start=1):
-            name = item.name or item.desc
-            text += f"{idx}. {name} | 👁️ {item.views} - 🆔 {item.code}\n"
-            if idx == 9:
-                text += f"\n📢 {PROMO_CHANNEL} kanaliga obuna bo'ling.\n\n"
+async def _deliver_code(chat_id: int, code: str, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    lookup = movies.resolve_code(code)
+    if lookup.movie:
+        return await sender.send_movie_to_chat(chat_id, lookup.movie, code, context)
+
+    if lookup.children:
+        text = render_movie_list("📺 Qismlar ro'yxati (eski → yangi):\n\n", lookup.children)
         await context.bot.send_message(
             chat_id,
             text,
-            reply_markup=numbered_keyboard(children),
+            reply_markup=numbered_keyboard(lookup.children),
         )
-        return
+        return True
 
-    await sender.send_movie_by_code(chat_id, code, context)
+    await sender.send_not_found(chat_id, code, context)
+    return True
 
 
 async def handle_random_movies(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -102,16 +105,12 @@ async def handle_random_movies(update: Update, context: ContextTypes.DEFAULT_TYP
         await query.edit_message_text("⚠️ Hozircha kino yo'q.")
         return
 
-    text = "🎲 Tasodifiy kinolar:\n\n"
-    for idx, item in enumerate(rows, start=1):
-        name = item.name or item.desc
-        text += f"{idx}. {name} | 👁️ {item.views} - 🆔 {item.code}\n"
-        if idx == 9:
-            text += f"\n📢 {PROMO_CHANNEL} kanaliga obuna bo'ling.\n\n"
+    text = render_movie_list("🎲 Tasodifiy kinolar:\n\n", rows)
 
     await query.edit_message_text(text, reply_markup=numbered_keyboard(rows))
 
 
+@common.throttled("random_movies")
 async def random_movies(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     users.upsert_user(update.effective_user)
     rows = movies.get_random_movies(RANDOM_LIST_LIMIT)
@@ -119,12 +118,39 @@ async def random_movies(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("⚠️ Hozircha kino yo'q.")
         return
 
-    text = "🎲 Tasodifiy kinolar:\n\n"
-    for idx, item in enumerate(rows, start=1):
-        name = item.name or item.desc
-        text += f"{idx}. {name} | 👁️ {item.views} - 🆔 {item.code}\n"
-        if idx == 9:
-            text += f"\n📢 {PROMO_CHANNEL} kanaliga obuna bo'ling.\n\n"
+    text = render_movie_list("🎲 Tasodifiy kinolar:\n\n", rows)
+
+    await update.message.reply_text(text, reply_markup=numbered_keyboard(rows))
+
+
+def _top_movies_text() -> tuple[str, list[movies.MovieListItem]]:
+    rows = movies.get_trending_movies(TRENDING_WINDOW_HOURS, TOP_LIST_LIMIT)
+    if rows:
+        header = f"🔥 Oxirgi {TRENDING_WINDOW_HOURS} soatdagi top kinolar:\n\n"
+        return render_movie_list(header, rows), rows
+    rows = movies.get_top_movies(TOP_LIST_LIMIT)
+    return render_movie_list("🔥 Eng ko'p ko'rilgan kinolar:\n\n", rows), rows
+
+
+async def handle_top_movies(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    await query.answer()
+    users.upsert_user(query.from_user)
+
+    text, rows = _top_movies_text()
+    if not rows:
+        await query.edit_message_text("⚠️ Hozircha kino yo'q.")
+        return
+
+    await query.edit_message_text(text, reply_markup=numbered_keyboard(rows))
+
+
+async def top_movies(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    users.upsert_user(update.effective_user)
+    text, rows = _top_movies_text()
+    if not rows:
+        await update.message.reply_text("⚠️ Hozircha kino yo'q.")
+        return
 
     await update.message.reply_text(text, reply_markup=numbered_keyboard(rows))
 
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Iterable
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
-from config import SHARE_BOT_USERNAME
+from config import KEYBOARD_CACHE_SIZE, SHARE_BOT_USERNAME
 from repositories.force_channels import ForceChannel
 from repositories.movies import MovieListItem
 
@@ -13,61 +14,83 @@ def _get_item_code(item) -> str:
     return getattr(item, "code", None) or item["code"]
 
 
+_MAIN_MENU_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("🔍 Kod bo'yicha qidirish", callback_data="search_movie"),
+            InlineKeyboardButton("🎲 Tasodifiy kinolar", callback_data="random_movies"),
+        ],
+        [InlineKeyboardButton("🔥 Top", callback_data="top_movies")],
+        [
+            InlineKeyboardButton("💎 Premium", callback_data="buy_premium"),
+            InlineKeyboardButton("📞 Admin", callback_data="contact_admin"),
+        ],
+    ]
+)
+
+
 def main_menu_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
+    return _MAIN_MENU_KEYBOARD
+
+
+_ADMIN_PANEL_KEYBOARD = InlineKeyboardMarkup(
+    [
         [
-            [
-                InlineKeyboardButton("🔍 Kod bo'yicha qidirish", callback_data="search_movie"),
-                InlineKeyboardButton("🎲 Tasodifiy kinolar", callback_data="random_movies"),
-            ],
-            [
-                InlineKeyboardButton("💎 Premium", callback_data="buy_premium"),
-                InlineKeyboardButton("📞 Admin", callback_data="contact_admin"),
-            ],
-        ]
-    )
+            InlineKeyboardButton("➕ Kino qo'shish", callback_data="add_movie"),
+            InlineKeyboardButton("✏️ Kino tahrirlash", callback_data="edit_movie"),
+        ],
+        [InlineKeyboardButton("🎞 Serial yuklash (ko'p qism)", callback_data="batch_upload")],
+        [
+            InlineKeyboardButton("🗑 Kino o'chirish", callback_data="delete_movie"),
+            InlineKeyboardButton("📋 Kinolar ro'yxati", callback_data="list_movies"),
+        ],
+        [
+            InlineKeyboardButton("📊 Statistika", callback_data="admin_stats"),
+            InlineKeyboardButton("👥 Foydalanuvchilar", callback_data="user_stats"),
+        ],
+        [
+            InlineKeyboardButton("📦 Yetkazishlar", callback_data="admin_deliveries"),
+            InlineKeyboardButton("🧪 Profil", callback_data="admin_profile"),
+        ],
+        [
+            InlineKeyboardButton("📥 Import (CSV/JSONL)", callback_data="admin_import"),
+            InlineKeyboardButton("💾 Backup", callback_data="admin_backup"),
+        ],
+        [
+            InlineKeyboardButton("➕ Kanal qo'shish", callback_data="add_channel"),
+            InlineKeyboardButton("🗑 Kanal o'chirish", callback_data="delete_channel"),
+        ],
+        [
+            InlineKeyboardButton("💎 Premium berish", callback_data="give_premium"),
+            InlineKeyboardButton("🚫 Premium olish", callback_data="remove_premium"),
+        ],
+        [
+            InlineKeyboardButton("📢 Xabar yuborish", callback_data="broadcast"),
+            InlineKeyboardButton("🔥 Top kinolar", callback_data="admin_top"),
+        ],
+        [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")],
+    ]
+)
 
 
 def admin_panel_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
+    return _ADMIN_PANEL_KEYBOARD
+
+
+_NOT_FOUND_KEYBOARD = InlineKeyboardMarkup(
+    [
         [
-            [
-                InlineKeyboardButton("➕ Kino qo'shish", callback_data="add_movie"),
-                InlineKeyboardButton("✏️ Kino tahrirlash", callback_data="edit_movie"),
-            ],
-            [
-                InlineKeyboardButton("🗑 Kino o'chirish", callback_data="delete_movie"),
-                InlineKeyboardButton("📋 Kinolar ro'yxati", callback_data="list_movies"),
-            ],
-            [
-                InlineKeyboardButton("📊 Statistika", callback_data="admin_stats"),
-                InlineKeyboardButton("👥 Foydalanuvchilar", callback_data="user_stats"),
-            ],
-            [
-                InlineKeyboardButton("➕ Kanal qo'shish", callback_data="add_channel"),
-                InlineKeyboardButton("🗑 Kanal o'chirish", callback_data="delete_channel"),
-            ],
-            [
-                InlineKeyboardButton("💎 Premium berish", callback_data="give_premium"),
-                InlineKeyboardButton("🚫 Premium olish", callback_data="remove_premium"),
-            ],
-            [InlineKeyboardButton("📢 Xabar yuborish", callback_data="broadcast")],
-            [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")],
-        ]
-    )
+            InlineKeyboardButton("🔍 Boshqa kod", callback_data="search_movie"),
+            InlineKeyboardButton("📞 Admin", callback_data="contact_admin"),
+        ],
+        [InlineKeyboardButton("💎 Premium", callback_data="buy_premium")],
+        [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")],
+    ]
+)
 
 
 def not_found_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton("🔍 Boshqa kod", callback_data="search_movie"),
-                InlineKeyboardButton("📞 Admin", callback_data="contact_admin"),
-            ],
-            [InlineKeyboardButton("💎 Premium", callback_data="buy_premium")],
-            [InlineKeyboardButton("🏠 Bosh menyu", callback_data="main_menu")],
-        ]
-    )
+    return _NOT_FOUND_KEYBOARD
 
 
 def numbered_keyboard(items: Iterable[MovieListItem], prefix: str = "pick") -> InlineKeyboardMarkup:
@@ -102,18 +125,43 @@ def force_sub_keyboard(channels: Iterable[ForceChannel]) -> InlineKeyboardMarkup
     return InlineKeyboardMarkup(buttons)
 
 
+_PREMIUM_PRICES_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [InlineKeyboardButton("💎 1 oy - 5,000 so'm", callback_data="premium:1")],
+        [InlineKeyboardButton("💎 3 oy - 14,000 so'm", callback_data="premium:3")],
+        [InlineKeyboardButton("💎 6 oy - 27,000 so'm", callback_data="premium:6")],
+        [InlineKeyboardButton("💎 12 oy - 50,000 so'm", callback_data="premium:12")],
+        [InlineKeyboardButton("◀️ Orqaga", callback_data="main_menu")],
+    ]
+)
+
+
 def premium_prices_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        [
-            [InlineKeyboardButton("💎 1 oy - 5,000 so'm", callback_data="premium:1")],
-            [InlineKeyboardButton("💎 3 oy - 14,000 so'm", callback_data="premium:3")],
-            [InlineKeyboardButton("💎 6 oy - 27,000 so'm", callback_data="premium:6")],
-            [InlineKeyboardButton("💎 12 oy - 50,000 so'm", callback_data="premium:12")],
-            [InlineKeyboardButton("◀️ Orqaga", callback_data="main_menu")],
-        ]
-    )
+    return _PREMIUM_PRICES_KEYBOARD
+
+
+_BACK_TO_ADMIN_KEYBOARD = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("◀️ Orqaga", callback_data="back_to_admin")]]
+)
+
 
+def back_to_admin_keyboard() -> InlineKeyboardMarkup:
+    return _BACK_TO_ADMIN_KEYBOARD
 
+
+_PREMIUM_ACTIONS_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [InlineKeyboardButton("📞 Admin", callback_data="contact_admin")],
+        [InlineKeyboardButton("◀️ Orqaga", callback_data="buy_premium")],
+    ]
+)
+
+
+def premium_actions_keyboard() -> InlineKeyboardMarkup:
+    return _PREMIUM_ACTIONS_KEYBOARD
+
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def movie_action_keyboard(code: str, include_menu: bool = True) -> InlineKeyboardMarkup:
     normalized_code = code.upper()
     from urllib.parse import quote
@@ -154,20 +202,32 @@ def admin_delete_channels_keyboard(channels: Iterable[ForceChannel]) -> InlineKe
     return InlineKeyboardMarkup(buttons)
 
 
-def edit_fields_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
+_BATCH_UPLOAD_KEYBOARD = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("✅ Tugatish", callback_data="batch_done")]]
+)
+
+
+def batch_upload_keyboard() -> InlineKeyboardMarkup:
+    return _BATCH_UPLOAD_KEYBOARD
+
+
+_EDIT_FIELDS_KEYBOARD = InlineKeyboardMarkup(
+    [
         [
-            [
-                InlineKeyboardButton("📝 Nom", callback_data="editfield:name"),
-                InlineKeyboardButton("📄 Tavsif", callback_data="editfield:desc"),
-            ],
-            [
-                InlineKeyboardButton("📁 File ID", callback_data="editfield:file_id"),
-                InlineKeyboardButton("🎞 Turi", callback_data="editfield:type"),
-            ],
-            [
-                InlineKeyboardButton("🔗 Parent kod", callback_data="editfield:parent_code"),
-            ],
-            [InlineKeyboardButton("◀️ Orqaga", callback_data="back_to_admin")],
-        ]
-    )
+            InlineKeyboardButton("📝 Nom", callback_data="editfield:name"),
+            InlineKeyboardButton("📄 Tavsif", callback_data="editfield:desc"),
+        ],
+        [
+            InlineKeyboardButton("📁 File ID", callback_data="editfield:file_id"),
+            InlineKeyboardButton("🎞 Turi", callback_data="editfield:type"),
+        ],
+        [
+            InlineKeyboardButton("🔗 Parent kod", callback_data="editfield:parent_code"),
+        ],
+        [InlineKeyboardButton("◀️ Orqaga", callback_data="back_to_admin")],
+    ]
+)
+
+
+def edit_fields_keyboard() -> InlineKeyboardMarkup:
+    return _EDIT_FIELDS_KEYBOARD
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from logging_conf import get_logger
+
+logger = get_logger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[dict[str, str]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = list(key)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Optional[dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, labels: Optional[dict[str, str]] = None) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(key)} {value:g}" for key, value in items)
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: dict[LabelKey, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Optional[dict[str, str]] = None) -> None:
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # bucket counts..., +Inf count, sum
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def count(self, labels: Optional[dict[str, str]] = None) -> int:
+        series = self._series.get(_label_key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def total_count(self) -> int:
+        with self._lock:
+            return int(sum(sum(series[:-1]) for series in self._series.values()))
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, observed in zip(self.buckets, series):
+                cumulative += observed
+                le = _format_labels(key, ("le", f"{bound:g}"))
+                lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            cumulative += series[len(self.buckets)]
+            le = _format_labels(key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Counter(name, help_text)
+            return metric
+
+    def histogram(self, name: str, help_text: str) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, help_text)
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+handler_seconds = registry.histogram("bot_handler_seconds", "Handler latency in seconds")
+handler_errors = registry.counter("bot_handler_errors_total", "Handler exceptions")
+db_seconds = registry.histogram("bot_db_query_seconds", "SQLite operation latency in seconds")
+db_errors = registry.counter("bot_db_errors_total", "SQLite operation failures")
+api_seconds = registry.histogram("bot_telegram_api_seconds", "Bot API call latency in seconds")
+api_errors = registry.counter("bot_telegram_api_errors_total", "Bot API call failures")
+throttled_updates = registry.counter(
+    "bot_throttled_updates_total", "Updates dropped by the per-user rate limiter"
+)
+membership_checks = registry.counter(
+    "bot_membership_checks_total", "Force-subscribe checks by source (table or api)"
+)
+coalesced_requests = registry.counter(
+    "bot_coalesced_requests_total", "Duplicate code requests collapsed or suppressed"
+)
+cache_invalidations = registry.counter(
+    "bot_cache_invalidations_total", "Cache keys invalidated from the change log by entity"
+)
+code_lookups = registry.counter(
+    "bot_code_lookups_total", "Code lookups by result (filtered, movie, children, miss)"
+)
+catalog_lookups = registry.counter(
+    "bot_catalog_snapshot_lookups_total", "Catalog snapshot lookups by result (hit, miss, fallback)"
+)
+outbound_wait_seconds = registry.histogram(
+    "bot_outbound_queue_wait_seconds", "Time Bot API calls waited in the outbound queue by class"
+)
+outbound_seconds = registry.histogram(
+    "bot_outbound_seconds", "Bot API call latency including queue wait by class"
+)
+
+
+@contextmanager
+def track(
+    histogram: Histogram,
+    errors: Optional[Counter],
+    labels: dict[str, str],
+) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        if errors is not None:
+            errors.inc(labels=labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, labels)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    labels = {"handler": name}
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with track(handler_seconds, handler_errors, labels):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track(handler_seconds, handler_errors, labels):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class MetricsServer:
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        logger.info("📈 Metrics: http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else ""
+            if len(parts) > 1 and parts[0] == "GET" and path.split("?", 1)[0] == "/metrics":
+                status = "200 OK"
+                body = registry.render().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status = "404 Not Found"
+                body = b"not found\n"
+                content_type = "text/plain; charset=utf-8"
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except Exception as exc:
+            logger.debug("Metrics so'rovida xatolik: %s", exc)
+        finally:
+            writer.close()
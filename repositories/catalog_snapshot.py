@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterable, Optional
+
+from catalog_store import CatalogFile, CatalogRow, open_catalog, write_catalog
+from config import (
+    CATALOG_SNAPSHOT_ENABLED,
+    CATALOG_SNAPSHOT_MAX_AGE,
+    CATALOG_SNAPSHOT_PATH,
+    CATALOG_SNAPSHOT_REBUILD_DELAY,
+)
+from db import db_session
+from logging_conf import get_logger
+from metrics import catalog_lookups
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# Needs flock, and a mapped file that can be os.replace'd under readers (not on Windows).
+ENABLED = CATALOG_SNAPSHOT_ENABLED and fcntl is not None
+
+
+class CatalogSnapshot:
+    def __init__(
+        self,
+        path: str = CATALOG_SNAPSHOT_PATH,
+        *,
+        max_age: float = CATALOG_SNAPSHOT_MAX_AGE,
+        rebuild_delay: float = CATALOG_SNAPSHOT_REBUILD_DELAY,
+    ) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.rebuild_delay = rebuild_delay
+        self._file: Optional[CatalogFile] = None
+        # Codes changed since the mapped file was built, with the mark of their last change;
+        # those lookups go to SQLite.
+        self._dirty: dict[str, int] = {}
+        self._mark = 0
+        # Views recorded by this process since the mapped file was built.
+        self._views: dict[str, int] = {}
+        self._generation = 0
+        self._refreshing = False
+        self._again = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._file is not None
+
+    def lookup(self, code: str) -> tuple[bool, Optional[CatalogRow]]:
+        catalog = self._file
+        if catalog is None or code in self._dirty:
+            catalog_lookups.inc(labels={"result": "fallback"})
+            return False, None
+        if not self._refreshing and time.time() - catalog.built_at > self.max_age:
+            # An old file is refreshed in the background in case an invalidation was missed.
+            self.refresh_soon()
+        row = catalog.get(code)
+        catalog_lookups.inc(labels={"result": "hit" if row else "miss"})
+        return True, row
+
+    def views(self, code: str, base: int) -> int:
+        return base + self._views.get(code, 0)
+
+    def add_view(self, code: str) -> None:
+        with self._lock:
+            self._views[code] = self._views.get(code, 0) + 1
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> None:
+        with self._lock:
+            if keys is None:
+                self._file = None
+                self._generation += 1
+            else:
+                self._mark += 1
+                self._dirty.update(dict.fromkeys(keys, self._mark))
+        self.refresh_soon()
+
+    def refresh_soon(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                self._again = True
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_loop, name="catalog-snapshot", daemon=True).start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as exc:
+                logger.error("Katalog snapshotini yangilashda xatolik: %s", exc)
+            with self._lock:
+                if not self._again:
+                    self._refreshing = False
+                    return
+                self._again = False
+            # Bursts of changes (imports, series uploads) collapse into one more rebuild.
+            time.sleep(self.rebuild_delay)
+
+    def refresh(self) -> CatalogFile:
+        with self._lock:
+            mark = self._mark
+            generation = self._generation
+            views = dict(self._views)
+        started = time.time()
+        catalog, rebuilt = self._build_or_open()
+        with self._lock:
+            # Codes changed after the build started may be missing from the file: keep them.
+            self._dirty = {code: seen for code, seen in self._dirty.items() if seen > mark}
+            if generation == self._generation:
+                self._file = catalog
+                # A file built after this refresh started already counts the views taken
+                # above; built_at has whole seconds, so an opened file needs a later second.
+                if rebuilt or catalog.built_at > started:
+                    for code, count in views.items():
+                        left = self._views.get(code, 0) - count
+                        if left > 0:
+                            self._views[code] = left
+                        else:
+                            self._views.pop(code, None)
+        return catalog
+
+    def _build_or_open(self) -> tuple[CatalogFile, bool]:
+        # One process rebuilds; the others wait on the lock and map the fresh file.
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # The change seq and the rows come from the same read snapshot.
+            with db_session(snapshot=True) as conn:
+                row = conn.execute(
+                    "SELECT seq FROM change_seq WHERE entity = 'movies'"
+                ).fetchone()
+                seq = row["seq"] if row else 0
+                current = open_catalog(self.path)
+                if current and current.seq == seq and time.time() - current.built_at < self.max_age:
+                    return current, False
+                if current:
+                    current.close()
+                started = time.perf_counter()
+                count = write_catalog(
+                    self.path,
+                    conn.execute(
+                        """
+                        SELECT code, name, type, file_id, desc, parent_code, views
+                        FROM movies ORDER BY code
+                        """
+                    ),
+                    seq,
+                )
+            logger.info(
+                "Katalog snapshoti yozildi: %s kod, %.2fs", count, time.perf_counter() - started
+            )
+            return CatalogFile(self.path), True
+
+
+snapshot = CatalogSnapshot()
+
+
+def lookup(code: str) -> tuple[bool, Optional[CatalogRow]]:
+    if not ENABLED:
+        return False, None
+    return snapshot.lookup(code)
+
+
+def add_view(code: str) -> None:
+    if ENABLED:
+        snapshot.add_view(code)
+
+
+def invalidate(keys: Optional[Iterable[str]] = None) -> None:
+    if ENABLED:
+        snapshot.invalidate(keys)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+
+from db import backend, execute
+
+
+@dataclass(frozen=True)
+class Change:
+    entity: str
+    seq: int
+    key: str
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    return backend.data_version(conn)
+
+
+def get_versions(conn: sqlite3.Connection) -> dict[str, int]:
+    return {row["entity"]: row["seq"] for row in conn.execute("SELECT entity, seq FROM change_seq")}
+
+
+def read_changes(
+    conn: sqlite3.Connection, entity: str, after_seq: int, limit: int
+) -> list[Change]:
+    rows = conn.execute(
+        """
+        SELECT entity, seq, key FROM change_log
+        WHERE entity = ? AND seq > ?
+        ORDER BY seq
+        LIMIT ?
+        """,
+        (entity, after_seq, limit),
+    ).fetchall()
+    return [Change(row["entity"], row["seq"], row["key"]) for row in rows]
+
+
+def prune(before_ts: int) -> int:
+    return execute("DELETE FROM change_log WHERE ts < ?", (before_ts,))
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from db import executemany, fetchall
+
+
+@dataclass(frozen=True)
+class MemberStatus:
+    channel_id: str
+    user_id: int
+    status: str
+    updated_at: int
+
+
+def upsert_statuses(rows: Iterable[MemberStatus]) -> int:
+    return executemany(
+        """
+        INSERT INTO channel_members (channel_id, user_id, status, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(channel_id, user_id) DO UPDATE SET
+            status = excluded.status,
+            updated_at = excluded.updated_at
+        WHERE excluded.updated_at >= channel_members.updated_at
+        """,
+        [(row.channel_id, row.user_id, row.status, row.updated_at) for row in rows],
+    )
+
+
+def get_statuses(user_id: int, channel_ids: Sequence[str]) -> dict[str, MemberStatus]:
+    if not channel_ids:
+        return {}
+    placeholders = ",".join("?" * len(channel_ids))
+    rows = fetchall(
+        f"""
+        SELECT channel_id, user_id, status, updated_at
+        FROM channel_members
+        WHERE channel_id IN ({placeholders}) AND user_id = ?
+        """,
+        (*channel_ids, user_id),
+    )
+    return {
+        row["channel_id"]: MemberStatus(
+            channel_id=row["channel_id"],
+            user_id=row["user_id"],
+            status=row["status"],
+            updated_at=row["updated_at"],
+        )
+        for row in rows
+    }
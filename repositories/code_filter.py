@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from typing import Iterable, Optional
+
+from config import CODE_FILTER_ENABLED, CODE_FILTER_ERROR_RATE, CODE_FILTER_MIN_CAPACITY
+from db import fetchall, fetchone, iter_rows
+from logging_conf import get_logger
+
+logger = get_logger(__name__)
+
+PARENT_LOOKUP_CHUNK = 500
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _seed(self, value: str) -> tuple[int, int]:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, value: str) -> None:
+        bits, size = self._bits, self.size
+        pos, step = self._seed(value)
+        for _ in range(self.hashes):
+            pos %= size
+            bits[pos >> 3] |= 1 << (pos & 7)
+            pos += step
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        bits, size = self._bits, self.size
+        pos, step = self._seed(value)
+        for _ in range(self.hashes):
+            pos %= size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            pos += step
+        return True
+
+    @property
+    def overfilled(self) -> bool:
+        return self.count > self.capacity
+
+
+class KnownCodes:
+    def __init__(
+        self,
+        error_rate: float = CODE_FILTER_ERROR_RATE,
+        min_capacity: int = CODE_FILTER_MIN_CAPACITY,
+    ) -> None:
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self._bloom: Optional[BloomFilter] = None
+        self._pending: Optional[list[str]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def might_contain(self, code: str) -> bool:
+        bloom = self._bloom
+        return bloom is None or code in bloom
+
+    def add(self, *codes: Optional[str]) -> None:
+        values = [code for code in codes if code]
+        if not values:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(values)
+            bloom = self._bloom
+            if bloom is None:
+                return
+            for code in values:
+                bloom.add(code)
+            if not bloom.overfilled:
+                return
+            # Too full for the target error rate; serve from the DB until rebuilt.
+            self._bloom = None
+        self.rebuild_soon()
+
+    def rebuild_soon(self) -> None:
+        threading.Thread(target=self.rebuild, name="code-filter", daemon=True).start()
+
+    def rebuild(self) -> int:
+        with self._lock:
+            if self._pending is not None:
+                return 0
+            self._pending = []
+        try:
+            row = fetchone("SELECT COUNT(*) AS cnt FROM movies")
+            bloom = BloomFilter(max(self.min_capacity, 2 * row["cnt"]), self.error_rate)
+            for row in iter_rows(
+                """
+                SELECT code FROM movies
+                UNION ALL
+                SELECT DISTINCT parent_code FROM movies WHERE parent_code IS NOT NULL
+                """
+            ):
+                bloom.add(row["code"])
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for code in self._pending:
+                bloom.add(code)
+            self._pending = None
+            self._bloom = bloom
+        logger.info(
+            "Kod filtri qurildi: %s kod, %s KB, %s hash",
+            bloom.count,
+            len(bloom._bits) // 1024,
+            bloom.hashes,
+        )
+        return bloom.count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._bloom = None
+
+
+known_codes = KnownCodes()
+
+
+def invalidate(keys: Optional[Iterable[str]] = None) -> None:
+    # Deleted codes stay in the filter; new codes and parents only need to be added.
+    if not CODE_FILTER_ENABLED:
+        return
+    if keys is None:
+        known_codes.reset()
+        known_codes.rebuild_soon()
+        return
+    codes = list(keys)
+    known_codes.add(*codes)
+    # The change log only carries movie codes; their series parents are looked up here.
+    for start in range(0, len(codes), PARENT_LOOKUP_CHUNK):
+        chunk = codes[start : start + PARENT_LOOKUP_CHUNK]
+        rows = fetchall(
+            f"""
+            SELECT DISTINCT parent_code FROM movies
+            WHERE code IN ({",".join("?" * len(chunk))}) AND parent_code IS NOT NULL
+            """,
+            chunk,
+        )
+        known_codes.add(*(row["parent_code"] for row in rows))
+
+
+def might_exist(code: str) -> bool:
+    return not CODE_FILTER_ENABLED or known_codes.might_contain(code)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Iterable
+
+from db import copy_rows, fetchall, fetchone, run_in_transaction
+
+DAY_SECONDS = 86400
+
+
+@dataclass(frozen=True)
+class DeliveryEvent:
+    ts: int
+    chat_id: int
+    code: str
+    ok: bool
+
+
+@dataclass(frozen=True)
+class DeliverySummary:
+    deliveries: int
+    failures: int
+    users: int
+
+
+def insert_deliveries(events: Iterable[DeliveryEvent]) -> int:
+    rows = [(event.ts, event.chat_id, event.code, int(event.ok)) for event in events]
+
+    def op(conn: sqlite3.Connection) -> int:
+        return copy_rows(conn, "deliveries", ("ts", "chat_id", "code", "ok"), rows)
+
+    return run_in_transaction(op)
+
+
+def compact_deliveries(before_ts: int) -> int:
+    cutoff = before_ts // DAY_SECONDS * DAY_SECONDS
+
+    def op(conn: sqlite3.Connection) -> int:
+        conn.execute(
+            f"""
+            INSERT INTO delivery_daily (day, code, deliveries, failures, users)
+            SELECT ts / {DAY_SECONDS} * {DAY_SECONDS}, code, SUM(ok), SUM(1 - ok),
+                   COUNT(DISTINCT chat_id)
+            FROM deliveries
+            WHERE ts < ?
+            GROUP BY ts / {DAY_SECONDS}, code
+            ON CONFLICT(day, code) DO UPDATE SET
+                deliveries = delivery_daily.deliveries + excluded.deliveries,
+                failures = delivery_daily.failures + excluded.failures,
+                users = CASE
+                    WHEN excluded.users > delivery_daily.users THEN excluded.users
+                    ELSE delivery_daily.users
+                END
+            """,
+            (cutoff,),
+        )
+        return conn.execute("DELETE FROM deliveries WHERE ts < ?", (cutoff,)).rowcount
+
+    return run_in_transaction(op)
+
+
+def get_summary(since_ts: int) -> DeliverySummary:
+    row = fetchone(
+        """
+        SELECT COALESCE(SUM(ok), 0) AS ok_cnt,
+               COALESCE(SUM(1 - ok), 0) AS fail_cnt,
+               COUNT(DISTINCT chat_id) AS users
+        FROM deliveries WHERE ts >= ?
+        """,
+        (since_ts,),
+    )
+    if not row:
+        return DeliverySummary(deliveries=0, failures=0, users=0)
+    return DeliverySummary(
+        deliveries=int(row["ok_cnt"]),
+        failures=int(row["fail_cnt"]),
+        users=int(row["users"]),
+    )
+
+
+def get_hourly_counts(since_ts: int) -> list[tuple[int, int]]:
+    rows = fetchall(
+        """
+        SELECT ts / 3600 * 3600 AS hour, SUM(ok) AS cnt
+        FROM deliveries WHERE ts >= ?
+        GROUP BY hour ORDER BY hour ASC
+        """,
+        (since_ts,),
+    )
+    return [(int(row["hour"]), int(row["cnt"])) for row in rows]
+
+
+def get_top_codes(since_ts: int, limit: int) -> list[tuple[str, int]]:
+    rows = fetchall(
+        """
+        SELECT code, SUM(ok) AS cnt
+        FROM deliveries WHERE ts >= ?
+        GROUP BY code ORDER BY cnt DESC LIMIT ?
+        """,
+        (since_ts, limit),
+    )
+    return [(row["code"], int(row["cnt"])) for row in rows]
+
+
+def get_top_users(since_ts: int, limit: int) -> list[tuple[int, int]]:
+    rows = fetchall(
+        """
+        SELECT chat_id, SUM(ok) AS cnt
+        FROM deliveries WHERE ts >= ?
+        GROUP BY chat_id ORDER BY cnt DESC LIMIT ?
+        """,
+        (since_ts, limit),
+    )
+    return [(int(row["chat_id"]), int(row["cnt"])) for row in rows]
+
+
+def get_daily_totals(since_ts: int) -> list[tuple[int, int]]:
+    rows = fetchall(
+        """
+        SELECT day, SUM(cnt) AS cnt FROM (
+            SELECT day, deliveries AS cnt FROM delivery_daily WHERE day >= ?
+            UNION ALL
+            SELECT ts / ? * ? AS day, ok AS cnt FROM deliveries WHERE ts >= ?
+        ) AS merged
+        GROUP BY day ORDER BY day ASC
+        """,
+        (since_ts, DAY_SECONDS, DAY_SECONDS, since_ts),
+    )
+    return [(int(row["day"]), int(row["cnt"])) for row in rows]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Iterable, Optional
 
+from config import CACHE_ENABLED
 from db import execute, fetchall
 
 
@@ -12,26 +14,48 @@ class ForceChannel:
     channel_link: str
 
 
+_cache: Optional[tuple[ForceChannel, ...]] = None
+_generation = 0
+
+
+def invalidate_cache(keys: Optional[Iterable[str]] = None) -> None:
+    global _cache, _generation
+    _generation += 1
+    _cache = None
+
+
 def add_force_channel(channel_id: str, channel_link: str) -> None:
     execute(
-        "INSERT OR IGNORE INTO force_channels (channel_id, channel_link) VALUES (?, ?)",
+        """
+        INSERT INTO force_channels (channel_id, channel_link) VALUES (?, ?)
+        ON CONFLICT(channel_id) DO NOTHING
+        """,
         (channel_id, channel_link),
     )
+    invalidate_cache()
 
 
 def remove_force_channel_by_id(channel_id: int) -> int:
-    return execute("DELETE FROM force_channels WHERE id = ?", (channel_id,))
+    removed = execute("DELETE FROM force_channels WHERE id = ?", (channel_id,))
+    invalidate_cache()
+    return removed
 
 
 def remove_force_channel_by_channel_id(channel_id: str) -> int:
-    return execute("DELETE FROM force_channels WHERE channel_id = ?", (channel_id,))
+    removed = execute("DELETE FROM force_channels WHERE channel_id = ?", (channel_id,))
+    invalidate_cache()
+    return removed
 
 
 def get_force_channels() -> list[ForceChannel]:
+    global _cache
+    if CACHE_ENABLED and _cache is not None:
+        return list(_cache)
+    generation = _generation
     rows = fetchall(
         "SELECT id, channel_id, channel_link FROM force_channels ORDER BY created_at ASC"
     )
-    return [
+    channels = [
         ForceChannel(
             id=row["id"],
             channel_id=row["channel_id"],
@@ -39,3 +63,7 @@ def get_force_channels() -> list[ForceChannel]:
         )
         for row in rows
     ]
+    # Skip the store if an invalidation raced with the read.
+    if CACHE_ENABLED and generation == _generation:
+        _cache = tuple(channels)
+    return channels
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
+import sqlite3
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
-from db import execute, fetchall, fetchone
+from catalog_store import CatalogRow
+from config import HOURLY_ROLLUP_RETENTION_HOURS
+from db import copy_rows, execute, fetchall, fetchone, iter_rows, run_in_transaction
+from metrics import code_lookups
+from repositories import catalog_snapshot, code_filter, stats
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+# Under SQLite's 999 bound-variable limit (builds before 3.32).
+CODE_LOOKUP_CHUNK = 500
+
+_last_pruned_hour: Optional[int] = None
 
 
 @dataclass(frozen=True)
@@ -27,6 +40,12 @@ class MovieListItem:
     parent_code: Optional[str]
 
 
+@dataclass(frozen=True)
+class CodeLookup:
+    movie: Optional[Movie]
+    children: list[MovieListItem]
+
+
 def _row_to_movie(row) -> Movie:
     return Movie(
         code=row["code"],
@@ -50,7 +69,15 @@ def _row_to_list_item(row) -> MovieListItem:
     )
 
 
+def _snapshot_movie(values: CatalogRow) -> Movie:
+    # The file only changes with the catalog; views recorded since are added on top.
+    return Movie(*values[:6], views=catalog_snapshot.snapshot.views(values[0], values[6]))
+
+
 def get_movie(code: str) -> Optional[Movie]:
+    known, values = catalog_snapshot.lookup(code)
+    if known:
+        return _snapshot_movie(values) if values else None
     row = fetchone(
         """
         SELECT code, name, type, file_id, desc, parent_code, views
@@ -61,6 +88,34 @@ def get_movie(code: str) -> Optional[Movie]:
     return _row_to_movie(row) if row else None
 
 
+def resolve_code(code: str) -> CodeLookup:
+    if not code_filter.might_exist(code):
+        code_lookups.inc(labels={"result": "filtered"})
+        return CodeLookup(None, [])
+    known, values = catalog_snapshot.lookup(code)
+    if values:
+        code_lookups.inc(labels={"result": "movie"})
+        return CodeLookup(_snapshot_movie(values), [])
+    # The exact match wins; children are only read when the code itself is not a movie.
+    rows = fetchall(
+        """
+        SELECT code, name, type, file_id, desc, parent_code, views, created_at, 1 AS exact
+        FROM movies WHERE code = ?
+        UNION ALL
+        SELECT code, name, type, file_id, desc, parent_code, views, created_at, 0 AS exact
+        FROM movies
+        WHERE parent_code = ? AND NOT EXISTS (SELECT 1 FROM movies WHERE code = ?)
+        ORDER BY exact DESC, created_at ASC
+        """,
+        (code, code, code),
+    )
+    if rows and rows[0]["exact"]:
+        code_lookups.inc(labels={"result": "movie"})
+        return CodeLookup(_row_to_movie(rows[0]), [])
+    code_lookups.inc(labels={"result": "children" if rows else "miss"})
+    return CodeLookup(None, [_row_to_list_item(row) for row in rows])
+
+
 def add_movie(
     code: str,
     name: str,
@@ -69,6 +124,7 @@ def add_movie(
     desc: str,
     parent_code: Optional[str] = None,
 ) -> None:
+    code_filter.known_codes.add(code, parent_code)
     execute(
         """
         INSERT INTO movies (code, name, type, file_id, desc, parent_code)
@@ -76,16 +132,74 @@ def add_movie(
         """,
         (code, name, content_type, file_id, desc, parent_code),
     )
+    catalog_snapshot.invalidate([code])
+
+
+def add_movies(rows: Sequence[Movie]) -> list[str]:
+    codes = [movie.code for movie in rows]
+
+    def op(conn: sqlite3.Connection) -> list[str]:
+        existing: set[str] = set()
+        for start in range(0, len(codes), CODE_LOOKUP_CHUNK):
+            chunk = codes[start : start + CODE_LOOKUP_CHUNK]
+            existing.update(
+                row["code"]
+                for row in conn.execute(
+                    f"SELECT code FROM movies WHERE code IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        copy_rows(
+            conn,
+            "movies",
+            ("code", "name", "type", "file_id", "desc", "parent_code", "views"),
+            [
+                (m.code, m.name, m.type, m.file_id, m.desc, m.parent_code, m.views)
+                for m in rows
+                if m.code not in existing
+            ],
+        )
+        return [code for code in codes if code in existing]
+
+    if not rows:
+        return []
+    # Filter first: a false positive costs one query, a missing code would hide a new movie.
+    code_filter.known_codes.add(*(value for m in rows for value in (m.code, m.parent_code)))
+    duplicates = run_in_transaction(op)
+    catalog_snapshot.invalidate(codes)
+    return duplicates
 
 
 def update_movie_field(code: str, field: str, value: Optional[str]) -> int:
     if field not in {"name", "desc", "file_id", "type", "parent_code"}:
         raise ValueError("Invalid field")
-    return execute(f"UPDATE movies SET {field} = ? WHERE code = ?", (value, code))
+    if field == "parent_code":
+        code_filter.known_codes.add(value)
+    updated = execute(f"UPDATE movies SET {field} = ? WHERE code = ?", (value, code))
+    catalog_snapshot.invalidate([code])
+    return updated
 
 
 def delete_movie(code: str) -> int:
-    return execute("DELETE FROM movies WHERE code = ?", (code,))
+    def op(conn: sqlite3.Connection) -> int:
+        conn.execute("DELETE FROM view_rollups WHERE code = ?", (code,))
+        return conn.execute("DELETE FROM movies WHERE code = ?", (code,)).rowcount
+
+    deleted = run_in_transaction(op)
+    catalog_snapshot.invalidate([code])
+    return deleted
+
+
+EXPORT_COLUMNS = ("code", "name", "type", "file_id", "desc", "parent_code", "views", "created_at")
+
+
+def iter_movie_rows() -> Iterator[sqlite3.Row]:
+    return iter_rows(
+        """
+        SELECT code, name, type, file_id, desc, parent_code, views, created_at
+        FROM movies ORDER BY code
+        """
+    )
 
 
 def list_movies(limit: Optional[int] = None) -> list[MovieListItem]:
@@ -103,11 +217,8 @@ def list_movies(limit: Optional[int] = None) -> list[MovieListItem]:
 
 
 def movie_stats() -> tuple[int, dict[str, int]]:
-    total_row = fetchone("SELECT COUNT(*) AS cnt FROM movies")
-    total = total_row["cnt"] if total_row else 0
-    rows = fetchall("SELECT type, COUNT(*) AS cnt FROM movies GROUP BY type")
-    counts = {row["type"]: row["cnt"] for row in rows}
-    return total, counts
+    counters = stats.get_admin_stats()
+    return counters.movie_count, counters.movie_types
 
 
 def get_random_movies(limit: int) -> list[MovieListItem]:
@@ -134,5 +245,79 @@ def get_children(parent_code: str) -> list[MovieListItem]:
     return [_row_to_list_item(row) for row in rows]
 
 
-def increment_views(code: str) -> None:
-    execute("UPDATE movies SET views = COALESCE(views, 0) + 1 WHERE code = ?", (code,))
+def increment_views(code: str, now: Optional[float] = None) -> None:
+    global _last_pruned_hour
+    now = time.time() if now is None else now
+    hour = int(now) // HOUR_SECONDS * HOUR_SECONDS
+    day = int(now) // DAY_SECONDS * DAY_SECONDS
+    prune_before = hour - HOURLY_ROLLUP_RETENTION_HOURS * HOUR_SECONDS
+    should_prune = _last_pruned_hour != hour
+
+    def op(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "UPDATE movies SET views = COALESCE(views, 0) + 1 WHERE code = ?", (code,)
+        )
+        conn.executemany(
+            """
+            INSERT INTO view_rollups (period, bucket, code, count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT(period, bucket, code) DO UPDATE SET count = view_rollups.count + 1
+            """,
+            (("hour", hour, code), ("day", day, code)),
+        )
+        if should_prune:
+            conn.execute(
+                "DELETE FROM view_rollups WHERE period = 'hour' AND bucket < ?",
+                (prune_before,),
+            )
+
+    run_in_transaction(op)
+    catalog_snapshot.add_view(code)
+    _last_pruned_hour = hour
+
+
+def get_top_movies(limit: int) -> list[MovieListItem]:
+    rows = fetchall(
+        """
+        SELECT code, name, desc, type, views, parent_code
+        FROM movies ORDER BY views DESC LIMIT ?
+        """,
+        (limit,),
+    )
+    return [_row_to_list_item(row) for row in rows]
+
+
+def get_trending_movies(
+    hours: int, limit: int, now: Optional[float] = None
+) -> list[MovieListItem]:
+    now = time.time() if now is None else now
+    since = int(now) // HOUR_SECONDS * HOUR_SECONDS - (hours - 1) * HOUR_SECONDS
+    return _rollup_leaders("hour", since, limit)
+
+
+def get_top_movies_for_days(
+    days: int, limit: int, now: Optional[float] = None
+) -> list[MovieListItem]:
+    now = time.time() if now is None else now
+    since = int(now) // DAY_SECONDS * DAY_SECONDS - (days - 1) * DAY_SECONDS
+    return _rollup_leaders("day", since, limit)
+
+
+def _rollup_leaders(period: str, since: int, limit: int) -> list[MovieListItem]:
+    rows = fetchall(
+        """
+        SELECT m.code, m.name, m.desc, m.type, r.cnt AS views, m.parent_code
+        FROM (
+            SELECT code, SUM(count) AS cnt
+            FROM view_rollups
+            WHERE period = ? AND bucket >= ?
+            GROUP BY code
+            ORDER BY cnt DESC
+            LIMIT ?
+        ) AS r
+        JOIN movies AS m ON m.code = r.code
+        ORDER BY r.cnt DESC
+        """,
+        (period, since, limit),
+    )
+    return [_row_to_list_item(row) for row in rows]
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+from db import fetchall, run_in_transaction
+
+
+def load_entries(kind: str) -> dict[int, bytes]:
+    rows = fetchall("SELECT key, data FROM persistence WHERE kind = ?", (kind,))
+    return {row["key"]: row["data"] for row in rows}
+
+
+def save_entries(entries: Iterable[tuple[str, int, Optional[bytes]]]) -> int:
+    now = int(time.time())
+    upserts = []
+    deletes = []
+    for kind, key, data in entries:
+        if data is None:
+            deletes.append((kind, key))
+        else:
+            upserts.append((kind, key, data, now))
+
+    def op(conn: sqlite3.Connection) -> int:
+        if upserts:
+            conn.executemany(
+                """
+                INSERT INTO persistence (kind, key, data, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(kind, key) DO UPDATE SET
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+                """,
+                upserts,
+            )
+        if deletes:
+            conn.executemany("DELETE FROM persistence WHERE kind = ? AND key = ?", deletes)
+        return len(upserts) + len(deletes)
+
+    return run_in_transaction(op)
+
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from db import fetchall
+
+
+@dataclass(frozen=True)
+class AdminStats:
+    user_count: int
+    premium_count: int
+    movie_count: int
+    movie_types: dict[str, int]
+
+
+def get_counters() -> dict[str, int]:
+    rows = fetchall("SELECT name, value FROM stats_counters")
+    return {row["name"]: int(row["value"]) for row in rows}
+
+
+def get_admin_stats() -> AdminStats:
+    counters = get_counters()
+    return AdminStats(
+        user_count=counters.get("users", 0),
+        premium_count=counters.get("premium_users", 0),
+        movie_count=counters.get("movies", 0),
+        movie_types={
+            name.split(":", 1)[1]: value
+            for name, value in counters.items()
+            if name.startswith("movies:")
+        },
+    )
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import sqlite3
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Protocol
+from typing import Iterable, Iterator, Optional, Protocol
 
-from db import execute, fetchall, fetchone
+from config import CACHE_ENABLED, PREMIUM_CACHE_SIZE
+from db import execute, fetchall, fetchone, iter_rows
+from repositories import stats
+
+PremiumRow = tuple[bool, Optional[str]]
+
+_premium_cache: OrderedDict[int, PremiumRow] = OrderedDict()
+_premium_lock = threading.Lock()
+_premium_generation = 0
 
 
 class TelegramUser(Protocol):
@@ -34,25 +45,65 @@ def upsert_user(user: Optional[TelegramUser]) -> None:
     )
 
 
+EXPORT_COLUMNS = ("user_id", "username", "first_name", "is_premium", "premium_until", "created_at")
+
+
+def iter_user_rows() -> Iterator[sqlite3.Row]:
+    return iter_rows(
+        """
+        SELECT user_id, username, first_name, is_premium, premium_until, created_at
+        FROM users ORDER BY user_id
+        """
+    )
+
+
 def get_all_user_ids() -> list[int]:
     rows = fetchall("SELECT user_id FROM users")
     return [row["user_id"] for row in rows]
 
 
 def get_user_count() -> int:
-    row = fetchone("SELECT COUNT(*) AS cnt FROM users")
-    return int(row["cnt"]) if row else 0
-
-
-def is_user_premium(user_id: int) -> bool:
+    return stats.get_admin_stats().user_count
+
+
+def invalidate_premium(keys: Optional[Iterable[str]] = None) -> None:
+    global _premium_generation
+    with _premium_lock:
+        _premium_generation += 1
+        if keys is None:
+            _premium_cache.clear()
+            return
+        for key in keys:
+            _premium_cache.pop(int(key), None)
+
+
+def _premium_row(user_id: int) -> PremiumRow:
+    if CACHE_ENABLED:
+        with _premium_lock:
+            cached = _premium_cache.get(user_id)
+            if cached is not None:
+                _premium_cache.move_to_end(user_id)
+                return cached
+            generation = _premium_generation
     row = fetchone(
         "SELECT is_premium, premium_until FROM users WHERE user_id = ?",
         (user_id,),
     )
-    if not row or not row["is_premium"]:
+    value = (bool(row["is_premium"]), row["premium_until"]) if row else (False, None)
+    if CACHE_ENABLED:
+        with _premium_lock:
+            if generation == _premium_generation:
+                _premium_cache[user_id] = value
+                if len(_premium_cache) > PREMIUM_CACHE_SIZE:
+                    _premium_cache.popitem(last=False)
+    return value
+
+
+def is_user_premium(user_id: int) -> bool:
+    is_premium, premium_until = _premium_row(user_id)
+    if not is_premium:
         return False
 
-    premium_until = row["premium_until"]
     if not premium_until:
         return True
 
@@ -80,6 +131,7 @@ def set_user_premium(user_id: int, months: int = 1) -> None:
         """,
         (user_id, expiry_date.isoformat()),
     )
+    invalidate_premium([str(user_id)])
 
 
 def remove_user_premium(user_id: int) -> None:
@@ -87,11 +139,12 @@ def remove_user_premium(user_id: int) -> None:
         "UPDATE users SET is_premium = 0, premium_until = NULL WHERE user_id = ?",
         (user_id,),
     )
+    invalidate_premium([str(user_id)])
 
 
 def get_premium_stats() -> PremiumStats:
-    premium_row = fetchone("SELECT COUNT(*) AS cnt FROM users WHERE is_premium = 1")
-    total_row = fetchone("SELECT COUNT(*) AS cnt FROM users")
-    premium_count = int(premium_row["cnt"]) if premium_row else 0
-    total_count = int(total_row["cnt"]) if total_row else 0
-    return PremiumStats(premium_count=premium_count, total_count=total_count)
+    counters = stats.get_admin_stats()
+    return PremiumStats(
+        premium_count=counters.premium_count,
+        total_count=counters.user_count,
+    )
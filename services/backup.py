@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import shutil
+import sqlite3
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Iterator, Optional, Sequence
+
+from config import (
+    BACKUP_DIR,
+    BACKUP_KEEP,
+    BACKUP_MAX_RESTARTS,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_SLEEP,
+)
+from db import backup_to
+from logging_conf import get_logger
+from repositories import movies, users
+
+logger = get_logger(__name__)
+
+EXPORT_FORMATS = ("jsonl", "csv")
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BackupResult:
+    path: str
+    size: int
+    pages: int
+    restarts: int
+    paged: bool
+    seconds: float
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    path: str
+    size: int
+    counts: dict[str, int]
+    seconds: float
+
+
+def _prune_backups(directory: str, keep: int) -> None:
+    if keep <= 0:
+        return
+    backups = sorted(glob.glob(os.path.join(directory, "bot_*.db.gz")))
+    for path in backups[:-keep]:
+        os.remove(path)
+
+
+def create_backup(
+    directory: str = BACKUP_DIR,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    sleep: float = BACKUP_STEP_SLEEP,
+    max_restarts: int = BACKUP_MAX_RESTARTS,
+    keep: int = BACKUP_KEEP,
+) -> BackupResult:
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    raw_path = os.path.join(directory, f"bot_{stamp}.db.tmp")
+    path = os.path.join(directory, f"bot_{stamp}.db.gz")
+    state = {"remaining": -1, "total": 0, "restarts": 0}
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        # Writes from other connections restart the backup from page one.
+        if 0 <= state["remaining"] < remaining:
+            state["restarts"] += 1
+            if state["restarts"] > max_restarts:
+                raise _TooManyRestarts
+        state["remaining"] = remaining
+        state["total"] = total
+
+    paged = True
+    try:
+        try:
+            backup_to(raw_path, pages, sleep, progress)
+        except _TooManyRestarts:
+            logger.warning(
+                "Backup %s marta qayta boshlandi, bitta qadamda nusxalanadi", max_restarts
+            )
+            os.remove(raw_path)
+            paged = False
+            backup_to(raw_path, -1, 0)
+
+        check = sqlite3.connect(raw_path)
+        try:
+            result = check.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            check.close()
+        if result != "ok":
+            raise RuntimeError(f"Backup tekshiruvdan o'tmadi: {result}")
+
+        with open(raw_path, "rb") as source, gzip.open(path, "wb", compresslevel=6) as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+    _prune_backups(directory, keep)
+    backup = BackupResult(
+        path=path,
+        size=os.path.getsize(path),
+        pages=state["total"],
+        restarts=state["restarts"],
+        paged=paged,
+        seconds=time.perf_counter() - started,
+    )
+    logger.info("Backup tayyor: %s (%s bayt, %.1fs)", path, backup.size, backup.seconds)
+    return backup
+
+
+def _write_rows(
+    file_obj: io.TextIOBase, fmt: str, columns: Sequence[str], rows: Iterator[sqlite3.Row]
+) -> int:
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(file_obj)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(tuple(row))
+            count += 1
+        return count
+    for row in rows:
+        file_obj.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        file_obj.write("\n")
+        count += 1
+    return count
+
+
+def export_catalog(directory: str = BACKUP_DIR, fmt: str = "jsonl") -> ExportResult:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    path = os.path.join(directory, f"export_{time.strftime('%Y%m%d_%H%M%S')}_{fmt}.zip")
+    sources = (
+        ("movies", movies.EXPORT_COLUMNS, movies.iter_movie_rows),
+        ("users", users.EXPORT_COLUMNS, users.iter_user_rows),
+    )
+    counts: dict[str, int] = {}
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, columns, iter_rows in sources:
+            with archive.open(f"{name}.{fmt}", "w", force_zip64=True) as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                counts[name] = _write_rows(text, fmt, columns, iter_rows())
+                text.flush()
+                text.detach()
+
+    export = ExportResult(
+        path=path,
+        size=os.path.getsize(path),
+        counts=counts,
+        seconds=time.perf_counter() - started,
+    )
+    logger.info("Eksport tayyor: %s %s", path, counts)
+    return export
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Online SQLite backup and catalog export")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backup_parser = sub.add_parser("backup")
+    backup_parser.add_argument("--dir", default=BACKUP_DIR)
+    backup_parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP)
+    backup_parser.add_argument("--sleep", type=float, default=BACKUP_STEP_SLEEP)
+    export_parser = sub.add_parser("export")
+    export_parser.add_argument("--dir", default=BACKUP_DIR)
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    args = parser.parse_args(argv)
+
+    if args.command == "backup":
+        result = create_backup(args.dir, args.pages, args.sleep)
+        print(
+            f"{result.path} {format_size(result.size)} "
+            f"pages={result.pages} restarts={result.restarts} {result.seconds:.2f}s"
+        )
+    else:
+        export = export_catalog(args.dir, args.format)
+        print(f"{export.path} {format_size(export.size)} {export.counts} {export.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from config import BATCH_UPLOAD_IDLE_SECONDS, IMPORT_BATCH_SIZE
+from logging_conf import get_logger
+from repositories import movies
+
+logger = get_logger(__name__)
+
+Notify = Callable[[str], Awaitable[object]]
+
+
+@dataclass(frozen=True)
+class PendingItem:
+    message_id: int
+    file_id: str
+    content_type: str
+    caption: str
+
+
+@dataclass
+class FlushResult:
+    added: list[str]
+    skipped: list[str]
+
+
+def first_free_episode(parent_code: str, prefix: str) -> int:
+    pattern = re.compile(rf"^{re.escape(prefix)}(\d+)$")
+    numbers = [
+        int(match.group(1))
+        for item in movies.get_children(parent_code)
+        if (match := pattern.match(item.code))
+    ]
+    return max(numbers, default=0) + 1
+
+
+class BatchUploadSession:
+    def __init__(
+        self,
+        parent_code: str,
+        prefix: str,
+        notify: Notify,
+        idle_seconds: float = BATCH_UPLOAD_IDLE_SECONDS,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> None:
+        self.parent_code = parent_code
+        self.prefix = prefix
+        self.notify = notify
+        self.idle_seconds = idle_seconds
+        self.batch_size = batch_size
+        self.next_episode: Optional[int] = None
+        self.total_added = 0
+        self._items: list[PendingItem] = []
+        self._last_item = 0.0
+        self._idle_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def add(self, item: PendingItem) -> None:
+        self._items.append(item)
+        self._last_item = time.monotonic()
+        if self._idle_task is None or self._idle_task.done():
+            self._idle_task = asyncio.create_task(self._flush_when_idle())
+
+    async def _flush_when_idle(self) -> None:
+        while True:
+            delay = self._last_item + self.idle_seconds - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        try:
+            result = await self.flush()
+        except Exception as exc:
+            logger.error("Serial yuklashda xatolik: %s", exc)
+            await self.notify("❌ Qismlarni saqlashda xatolik yuz berdi.")
+            return
+        if result.added or result.skipped:
+            await self.notify(self.format_result(result))
+
+    def _movie(self, item: PendingItem, episode: int) -> movies.Movie:
+        code = f"{self.prefix}{episode}"
+        caption = item.caption.strip()
+        name = caption.splitlines()[0][:120] if caption else f"{self.parent_code} {episode}-qism"
+        return movies.Movie(
+            code=code,
+            name=name,
+            type=item.content_type,
+            file_id=item.file_id,
+            desc=caption or name,
+            parent_code=self.parent_code,
+            views=0,
+        )
+
+    async def flush(self) -> FlushResult:
+        async with self._lock:
+            items = sorted(self._items, key=lambda item: item.message_id)
+            self._items = []
+            if not items:
+                return FlushResult([], [])
+            if self.next_episode is None:
+                self.next_episode = await asyncio.to_thread(
+                    first_free_episode, self.parent_code, self.prefix
+                )
+
+            added: list[str] = []
+            skipped: list[str] = []
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start : start + self.batch_size]
+                rows = [
+                    self._movie(item, self.next_episode + offset)
+                    for offset, item in enumerate(chunk)
+                ]
+                self.next_episode += len(chunk)
+                existing = set(await asyncio.to_thread(movies.add_movies, rows))
+                added.extend(row.code for row in rows if row.code not in existing)
+                skipped.extend(row.code for row in rows if row.code in existing)
+            self.total_added += len(added)
+            return FlushResult(added, skipped)
+
+    def format_result(self, result: FlushResult) -> str:
+        lines = [f"✅ {len(result.added)} ta qism qo'shildi ({self.parent_code})."]
+        if result.added:
+            lines.append(f"🆔 {result.added[0]} … {result.added[-1]}")
+        if result.skipped:
+            lines.append(f"⚠️ Mavjud kodlar o'tkazib yuborildi: {', '.join(result.skipped)}")
+        lines.append(f"➡️ Keyingi kod: {self.prefix}{self.next_episode}")
+        return "\n".join(lines)
+
+
+_sessions: dict[int, BatchUploadSession] = {}
+
+
+def get_session(user_id: int) -> Optional[BatchUploadSession]:
+    return _sessions.get(user_id)
+
+
+def start_session(
+    user_id: int, parent_code: str, prefix: str, notify: Notify
+) -> BatchUploadSession:
+    session = BatchUploadSession(parent_code, prefix, notify)
+    _sessions[user_id] = session
+    return session
+
+
+async def finish_session(user_id: int) -> Optional[tuple[BatchUploadSession, FlushResult]]:
+    session = _sessions.pop(user_id, None)
+    if session is None:
+        return None
+    return session, await session.flush()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Generic, Optional, TypeVar
+
+from logging_conf import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class BatchWriter:
+    def __init__(self, *, batch_size: int, flush_interval: float) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def pending(self) -> int:
+        raise NotImplementedError
+
+    async def flush(self) -> int:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def _notify(self) -> None:
+        if self._wakeup and self.pending() >= self.batch_size:
+            self._wakeup.set()
+
+    async def _tick(self) -> None:
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._tick()
+
+
+class QueuedBatchWriter(BatchWriter, Generic[T]):
+    error_message = "Navbatni yozishda xatolik: %s"
+
+    def __init__(self, *, batch_size: int, flush_interval: float, max_queue: int) -> None:
+        super().__init__(batch_size=batch_size, flush_interval=flush_interval)
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._queue: deque[T] = deque()
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def _enqueue(self, item: T) -> None:
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(item)
+        self._notify()
+
+    def _write(self, batch: list[T]) -> None:
+        raise NotImplementedError
+
+    def _report(self, exc: Exception) -> None:
+        logger.error(self.error_message, exc)
+
+    async def flush(self) -> int:
+        total = 0
+        while self._queue:
+            batch = [
+                self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as exc:
+                self._report(exc)
+                # Failed rows go back in front for the next tick; the oldest give way
+                # once the queue is full again.
+                self._queue.extendleft(reversed(batch))
+                while len(self._queue) > self.max_queue:
+                    self._queue.popleft()
+                    self.dropped += 1
+                break
+            total += len(batch)
+        self.written += total
+        return total
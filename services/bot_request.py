@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import httpx
+from telegram.request import BaseRequest, HTTPXRequest, RequestData
+
+import metrics
+from config import (
+    BOT_API_CONNECT_TIMEOUT,
+    BOT_API_HTTP2,
+    BOT_API_KEEPALIVE,
+    BOT_API_KEEPALIVE_EXPIRY,
+    BOT_API_METHOD_TIMEOUTS,
+    BOT_API_POOL_SIZE,
+    BOT_API_POOL_TIMEOUT,
+    BOT_API_READ_TIMEOUT,
+    BOT_API_WRITE_TIMEOUT,
+    GET_UPDATES_CONNECT_TIMEOUT,
+    GET_UPDATES_HTTP2,
+    GET_UPDATES_POOL_SIZE,
+    GET_UPDATES_POOL_TIMEOUT,
+    GET_UPDATES_READ_TIMEOUT,
+)
+from services.outbound import OutboundQueue
+
+
+class InstrumentedRequest(HTTPXRequest):
+    def __init__(
+        self,
+        *args: Any,
+        queue: Optional[OutboundQueue] = None,
+        keepalive: int = 0,
+        keepalive_expiry: Optional[float] = 5.0,
+        method_timeouts: Optional[dict[str, float]] = None,
+        **kwargs: Any,
+    ) -> None:
+        # Read by _build_client, which HTTPXRequest.__init__ already calls.
+        self.queue = queue
+        self.keepalive = keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.method_timeouts = method_timeouts or {}
+        super().__init__(*args, **kwargs)
+
+    # Private PTB hook, hence the exact python-telegram-bot pin in requirements.txt.
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = self._client_kwargs["limits"]
+        self._client_kwargs["limits"] = httpx.Limits(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=self.keepalive or limits.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return super()._build_client()
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        **kwargs: Any,
+    ) -> tuple[int, bytes]:
+        name = url.rsplit("/", 1)[-1]
+        read_timeout = self.method_timeouts.get(name)
+        if (
+            read_timeout is not None
+            and kwargs.get("read_timeout", BaseRequest.DEFAULT_NONE) is BaseRequest.DEFAULT_NONE
+        ):
+            kwargs["read_timeout"] = read_timeout
+        if self.queue is None:
+            return await self._timed_request(name, url, method, request_data, **kwargs)
+        async with self.queue.slot(name):
+            return await self._timed_request(name, url, method, request_data, **kwargs)
+
+    async def _timed_request(
+        self,
+        name: str,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData],
+        **kwargs: Any,
+    ) -> tuple[int, bytes]:
+        labels = {"method": name}
+        with metrics.track(metrics.api_seconds, metrics.api_errors, labels):
+            code, payload = await super().do_request(url, method, request_data, **kwargs)
+        if code >= 400:
+            metrics.api_errors.inc(labels=labels)
+        return code, payload
+
+
+def build_request(
+    queue: Optional[OutboundQueue] = None, **overrides: Any
+) -> InstrumentedRequest:
+    options: dict[str, Any] = {
+        "connection_pool_size": BOT_API_POOL_SIZE,
+        "keepalive": BOT_API_KEEPALIVE,
+        "keepalive_expiry": BOT_API_KEEPALIVE_EXPIRY,
+        "http_version": "2" if BOT_API_HTTP2 else "1.1",
+        "connect_timeout": BOT_API_CONNECT_TIMEOUT,
+        "read_timeout": BOT_API_READ_TIMEOUT,
+        "write_timeout": BOT_API_WRITE_TIMEOUT,
+        "pool_timeout": BOT_API_POOL_TIMEOUT,
+        "method_timeouts": BOT_API_METHOD_TIMEOUTS,
+    }
+    options.update(overrides)
+    return InstrumentedRequest(queue=queue, **options)
+
+
+def build_get_updates_request(**overrides: Any) -> InstrumentedRequest:
+    options: dict[str, Any] = {
+        "connection_pool_size": GET_UPDATES_POOL_SIZE,
+        "keepalive_expiry": BOT_API_KEEPALIVE_EXPIRY,
+        "http_version": "2" if GET_UPDATES_HTTP2 else "1.1",
+        "connect_timeout": GET_UPDATES_CONNECT_TIMEOUT,
+        # Bot.get_updates adds the long-polling timeout on top of this.
+        "read_timeout": GET_UPDATES_READ_TIMEOUT,
+        "pool_timeout": GET_UPDATES_POOL_TIMEOUT,
+    }
+    options.update(overrides)
+    return InstrumentedRequest(**options)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, TextIO
+
+from config import IMPORT_BATCH_SIZE, IMPORT_REPORT_LIMIT
+from logging_conf import get_logger
+from repositories import movies
+
+logger = get_logger(__name__)
+
+CONTENT_TYPES = {"video", "document", "photo", "text"}
+SUPPORTED_EXTENSIONS = (".csv", ".jsonl", ".ndjson")
+
+
+@dataclass(frozen=True)
+class RowError:
+    line: int
+    code: str
+    message: str
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    sample_errors: list[RowError] = field(default_factory=list)
+
+
+def is_supported(file_name: str) -> bool:
+    return file_name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+def _iter_csv(file_obj: TextIO) -> Iterator[tuple[int, Optional[dict[str, Any]], str]]:
+    reader = csv.DictReader(file_obj)
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield reader.line_num, None, f"CSV xatosi: {exc}"
+            continue
+        yield reader.line_num, record, ""
+
+
+def _iter_jsonl(file_obj: TextIO) -> Iterator[tuple[int, Optional[dict[str, Any]], str]]:
+    for line_no, line in enumerate(file_obj, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_no, None, f"JSON xatosi: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Qator JSON obyekt emas"
+            continue
+        yield line_no, record, ""
+
+
+def iter_records(
+    file_obj: TextIO, file_name: str
+) -> Iterator[tuple[int, Optional[dict[str, Any]], str]]:
+    if file_name.lower().endswith(".csv"):
+        return _iter_csv(file_obj)
+    return _iter_jsonl(file_obj)
+
+
+def _text(record: dict[str, Any], key: str) -> str:
+    value = record.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def validate_record(record: dict[str, Any]) -> movies.Movie:
+    code = _text(record, "code").upper()
+    if not code:
+        raise ValueError("code bo'sh")
+    name = _text(record, "name")
+    if not name:
+        raise ValueError("name bo'sh")
+    file_id = _text(record, "file_id")
+    content_type = (_text(record, "type") or "video").lower()
+    if content_type not in CONTENT_TYPES:
+        raise ValueError(f"type noto'g'ri: {content_type}")
+    if not file_id and content_type != "text":
+        raise ValueError("file_id bo'sh")
+    parent_code = _text(record, "parent_code").upper()
+    if parent_code in {"", "-", "NONE", "NULL"}:
+        parent_code = ""
+    raw_views = _text(record, "views") or "0"
+    try:
+        views = int(raw_views)
+    except ValueError:
+        raise ValueError(f"views butun son emas: {raw_views}") from None
+    if views < 0:
+        raise ValueError("views manfiy")
+    return movies.Movie(
+        code=code,
+        name=name,
+        type=content_type,
+        file_id=file_id,
+        desc=_text(record, "desc"),
+        parent_code=parent_code or None,
+        views=views,
+    )
+
+
+def import_file(
+    path: str,
+    file_name: Optional[str] = None,
+    errors_path: Optional[str] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportReport:
+    report = ImportReport()
+    seen: set[str] = set()
+    batch: list[movies.Movie] = []
+    batch_lines: dict[str, int] = {}
+    error_file = open(errors_path, "w", encoding="utf-8", newline="") if errors_path else None
+    error_writer = csv.writer(error_file) if error_file else None
+    if error_writer:
+        error_writer.writerow(["line", "code", "error"])
+
+    def fail(line: int, code: str, message: str) -> None:
+        report.failed += 1
+        if len(report.sample_errors) < IMPORT_REPORT_LIMIT:
+            report.sample_errors.append(RowError(line, code, message))
+        if error_writer:
+            error_writer.writerow([line, code, message])
+
+    def flush() -> None:
+        existing = movies.add_movies(batch)
+        for code in existing:
+            fail(batch_lines[code], code, "kod bazada allaqachon mavjud")
+        report.inserted += len(batch) - len(existing)
+        batch.clear()
+        batch_lines.clear()
+
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as file_obj:
+            for line, record, error in iter_records(file_obj, file_name or path):
+                report.total += 1
+                if record is None:
+                    fail(line, "", error)
+                    continue
+                try:
+                    movie = validate_record(record)
+                except ValueError as exc:
+                    fail(line, _text(record, "code"), str(exc))
+                    continue
+                if movie.code in seen:
+                    fail(line, movie.code, "kod faylda takrorlangan")
+                    continue
+                seen.add(movie.code)
+                batch.append(movie)
+                batch_lines[movie.code] = line
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+    finally:
+        if error_file:
+            error_file.close()
+
+    logger.info(
+        "Import yakunlandi: %s qator, %s qo'shildi, %s xato",
+        report.total,
+        report.inserted,
+        report.failed,
+    )
+    return report
+
+
+def format_report(report: ImportReport) -> str:
+    lines = [
+        "📥 Import yakunlandi.",
+        f"📄 Qatorlar: {report.total}",
+        f"✅ Qo'shildi: {report.inserted}",
+        f"❌ Xato: {report.failed}",
+    ]
+    if report.sample_errors:
+        lines.append("")
+        lines.extend(
+            f"{item.line}-qator {item.code or '-'}: {item.message}"
+            for item in report.sample_errors
+        )
+        if report.failed > len(report.sample_errors):
+            lines.append("…to'liq ro'yxat hujjatda.")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    from db import init_db
+
+    parser = argparse.ArgumentParser(description="Bulk catalog import from CSV/JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--errors", help="Xato qatorlarni shu CSV faylga yozish")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    if not is_supported(args.path):
+        raise SystemExit(f"Qo'llab-quvvatlanadigan formatlar: {', '.join(SUPPORTED_EXTENSIONS)}")
+    init_db()
+    report = import_file(args.path, errors_path=args.errors, batch_size=args.batch_size)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
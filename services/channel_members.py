@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Iterable, Optional
+
+from config import (
+    CHANNEL_MEMBERS_BATCH_SIZE,
+    CHANNEL_MEMBERS_FLUSH_INTERVAL,
+    CHANNEL_MEMBERS_TTL,
+)
+from logging_conf import get_logger
+from repositories import channel_members
+from repositories.force_channels import ForceChannel
+from services.batch_writer import BatchWriter
+
+logger = get_logger(__name__)
+
+SUBSCRIBED_STATUSES = frozenset({"member", "administrator", "creator"})
+
+MemberKey = tuple[str, int]
+
+
+def resolve_channel_id(
+    channels: Iterable[ForceChannel], chat_id: int, username: Optional[str]
+) -> Optional[str]:
+    handle = f"@{username}".lower() if username else None
+    for channel in channels:
+        if channel.channel_id == str(chat_id):
+            return channel.channel_id
+        if handle and channel.channel_id.lower() == handle:
+            return channel.channel_id
+    return None
+
+
+class ChannelMemberWriter(BatchWriter):
+    def __init__(
+        self,
+        *,
+        batch_size: int = CHANNEL_MEMBERS_BATCH_SIZE,
+        flush_interval: float = CHANNEL_MEMBERS_FLUSH_INTERVAL,
+        ttl: int = CHANNEL_MEMBERS_TTL,
+    ) -> None:
+        super().__init__(batch_size=batch_size, flush_interval=flush_interval)
+        self.ttl = ttl
+        self._pending: dict[MemberKey, channel_members.MemberStatus] = {}
+        self._flushing: dict[MemberKey, channel_members.MemberStatus] = {}
+
+    def record(
+        self, channel_id: str, user_id: int, status: str, ts: Optional[int] = None
+    ) -> None:
+        key = (channel_id, user_id)
+        entry = channel_members.MemberStatus(
+            channel_id=channel_id,
+            user_id=user_id,
+            status=status,
+            updated_at=int(time.time()) if ts is None else ts,
+        )
+        current = self._pending.get(key)
+        if current and current.updated_at > entry.updated_at:
+            return
+        self._pending[key] = entry
+        self._notify()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def lookup(
+        self, user_id: int, channel_ids: list[str], now: Optional[float] = None
+    ) -> dict[str, str]:
+        result: dict[str, str] = {}
+        missing: list[str] = []
+        for channel_id in channel_ids:
+            key = (channel_id, user_id)
+            entry = self._pending.get(key) or self._flushing.get(key)
+            if entry:
+                result[channel_id] = entry.status
+            else:
+                missing.append(channel_id)
+        if missing:
+            cutoff = (time.time() if now is None else now) - self.ttl
+            for channel_id, row in channel_members.get_statuses(user_id, missing).items():
+                if row.updated_at >= cutoff:
+                    result[channel_id] = row.status
+        return result
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        self._flushing = self._pending
+        self._pending = {}
+        rows = list(self._flushing.values())
+        total = 0
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start : start + self.batch_size]
+                await asyncio.to_thread(channel_members.upsert_statuses, batch)
+                total += len(batch)
+        except Exception as exc:
+            logger.error("Kanal a'zolarini yozishda xatolik: %s", exc)
+            for row in rows[total:]:
+                self._pending.setdefault((row.channel_id, row.user_id), row)
+        finally:
+            self._flushing = {}
+        self.written += total
+        return total
+
+
+writer = ChannelMemberWriter()
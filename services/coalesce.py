@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+from config import DUPLICATE_REQUEST_WINDOW
+from metrics import coalesced_requests
+
+
+class RequestCoalescer:
+    def __init__(self, window: float = DUPLICATE_REQUEST_WINDOW) -> None:
+        self.window = window
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._recent: OrderedDict[Hashable, float] = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        recent = self._recent
+        while recent:
+            key, finished = next(iter(recent.items()))
+            if now - finished < self.window:
+                break
+            del recent[key]
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[bool]],
+        now: Optional[float] = None,
+    ) -> bool:
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            coalesced_requests.inc(labels={"kind": "inflight"})
+            await asyncio.shield(inflight)
+            return False
+
+        self._evict(time.monotonic() if now is None else now)
+        if key in self._recent:
+            coalesced_requests.inc(labels={"kind": "repeat"})
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            ok = await factory()
+        finally:
+            del self._inflight[key]
+            future.set_result(None)
+        # Only completed sends are remembered, so a retry after a failure goes through.
+        if ok and self.window > 0:
+            self._recent[key] = time.monotonic() if now is None else now
+            self._recent.move_to_end(key)
+        return True
+
+
+coalescer = RequestCoalescer()
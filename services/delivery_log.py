@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from config import (
+    DELIVERY_BATCH_SIZE,
+    DELIVERY_COMPACT_INTERVAL,
+    DELIVERY_FLUSH_INTERVAL,
+    DELIVERY_QUEUE_MAX,
+    DELIVERY_RETENTION_DAYS,
+)
+from logging_conf import get_logger
+from repositories import deliveries
+from services.batch_writer import QueuedBatchWriter
+
+logger = get_logger(__name__)
+
+
+class DeliveryLogWriter(QueuedBatchWriter[deliveries.DeliveryEvent]):
+    error_message = "Delivery log yozishda xatolik: %s"
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = DELIVERY_BATCH_SIZE,
+        flush_interval: float = DELIVERY_FLUSH_INTERVAL,
+        max_queue: int = DELIVERY_QUEUE_MAX,
+        retention_days: int = DELIVERY_RETENTION_DAYS,
+        compact_interval: float = DELIVERY_COMPACT_INTERVAL,
+    ) -> None:
+        super().__init__(batch_size=batch_size, flush_interval=flush_interval, max_queue=max_queue)
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self._last_compact = 0.0
+
+    def record(self, chat_id: int, code: str, ok: bool = True) -> None:
+        self._enqueue(
+            deliveries.DeliveryEvent(ts=int(time.time()), chat_id=chat_id, code=code, ok=ok)
+        )
+
+    def _write(self, batch: list[deliveries.DeliveryEvent]) -> None:
+        deliveries.insert_deliveries(batch)
+
+    async def compact(self) -> int:
+        before = int(time.time()) - self.retention_days * deliveries.DAY_SECONDS
+        removed = await asyncio.to_thread(deliveries.compact_deliveries, before)
+        if removed:
+            logger.info("Delivery log siqildi: %s ta yozuv kunlik agregatga o'tdi", removed)
+        return removed
+
+    async def _tick(self) -> None:
+        await self.flush()
+        if time.monotonic() - self._last_compact >= self.compact_interval:
+            self._last_compact = time.monotonic()
+            try:
+                await self.compact()
+            except Exception as exc:
+                logger.error("Delivery log siqishda xatolik: %s", exc)
+
+
+writer = DeliveryLogWriter()
@@ -3,16 +3,23 @@ from __future__ import annotations
 from telegram.ext import ContextTypes
 
 from logging_conf import get_logger
+from metrics import membership_checks, timed
 from repositories import force_channels, users
+from services import channel_members
 
 logger = get_logger(__name__)
 
+_TABLE_LABELS = {"source": "table"}
+_API_LABELS = {"source": "api"}
 
+
+@timed("is_user_subscribed")
 async def is_user_subscribed(
     user_id: int,
     context: ContextTypes.DEFAULT_TYPE,
     *,
     is_admin: bool,
+    recheck_unsubscribed: bool = False,
 ) -> bool:
     if is_admin:
         return True
@@ -24,17 +31,27 @@ async def is_user_subscribed(
     if not channels:
         return True
 
+    known = channel_members.writer.lookup(user_id, [channel.channel_id for channel in channels])
     for channel in channels:
-        try:
-            member = await context.bot.get_chat_member(channel.channel_id, user_id)
-            if member.status not in ("member", "administrator", "creator"):
+        status = known.get(channel.channel_id)
+        if status is not None and (
+            status in channel_members.SUBSCRIBED_STATUSES or not recheck_unsubscribed
+        ):
+            membership_checks.inc(labels=_TABLE_LABELS)
+        else:
+            membership_checks.inc(labels=_API_LABELS)
+            try:
+                member = await context.bot.get_chat_member(channel.channel_id, user_id)
+            except Exception as exc:
+                logger.error(
+                    "Force subscribe tekshiruvida xatolik (%s): %s",
+                    channel.channel_id,
+                    exc,
+                )
                 return False
-        except Exception as exc:
-            logger.error(
-                "Force subscribe tekshiruvida xatolik (%s): %s",
-                channel.channel_id,
-                exc,
-            )
+            status = member.status
+            channel_members.writer.record(channel.channel_id, user_id, status)
+        if status not in channel_members.SUBSCRIBED_STATUSES:
             return False
 
     return True
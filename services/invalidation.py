@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+from config import CHANGE_LOG_RETENTION, CHANGE_POLL_INTERVAL
+from db import ERRORS, backend, open_connection
+from logging_conf import get_logger
+from metrics import cache_invalidations
+from repositories import catalog_snapshot, change_log, code_filter, force_channels, users
+from storage.base import Connection
+
+logger = get_logger(__name__)
+
+# None means "everything for this entity": the log was pruned past us or the DB was replaced.
+Handler = Callable[[Optional[Iterable[str]]], None]
+
+READ_LIMIT = 10000
+PRUNE_INTERVAL = 600.0
+
+
+class ChangeWatcher:
+    def __init__(
+        self,
+        *,
+        path: Optional[str] = backend.path,
+        interval: float = CHANGE_POLL_INTERVAL,
+        retention: int = CHANGE_LOG_RETENTION,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self.retention = retention
+        self.versions: dict[str, int] = {}
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._conn: Optional[Connection] = None
+        self._inode: Optional[int] = None
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._last_prune = 0.0
+
+    def subscribe(self, entity: str, handler: Handler) -> None:
+        self._handlers[entity].append(handler)
+
+    def _notify(self, entity: str, keys: Optional[set[str]]) -> None:
+        cache_invalidations.inc(len(keys) if keys else 1, labels={"entity": entity})
+        for handler in self._handlers.get(entity, ()):
+            try:
+                handler(keys)
+            except Exception as exc:
+                logger.error("%s keshini yangilashda xatolik: %s", entity, exc)
+
+    def _open(self) -> None:
+        self.close()
+        self._conn = open_connection()
+        self._inode = os.stat(self.path).st_ino if self.path else None
+        self._data_version = change_log.data_version(self._conn)
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def sync(self) -> int:
+        with self._lock:
+            return self._sync()
+
+    def _replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return False
+
+    def _sync(self) -> int:
+        if self._conn is None:
+            self._open()
+            self.versions = change_log.get_versions(self._conn)
+            return 0
+        if self.path and self._replaced():
+            logger.warning("Baza fayli almashtirildi, barcha keshlar tozalanadi")
+            self._open()
+            for entity in self._handlers:
+                self._notify(entity, None)
+            self.versions = change_log.get_versions(self._conn)
+            return len(self._handlers)
+
+        # data_version stays put until something commits, so idle polls are one query.
+        version = change_log.data_version(self._conn)
+        if version == self._data_version:
+            return 0
+        self._data_version = version
+
+        invalidated = 0
+        for entity, seq in change_log.get_versions(self._conn).items():
+            known = self.versions.get(entity, 0)
+            if seq == known:
+                continue
+            changes = []
+            if seq > known:
+                changes = change_log.read_changes(self._conn, entity, known, READ_LIMIT)
+            complete = bool(changes) and changes[0].seq == known + 1
+            if seq < known or not complete or len(changes) >= READ_LIMIT:
+                self._notify(entity, None)
+            else:
+                self._notify(entity, {item.key for item in changes})
+            self.versions[entity] = seq
+            invalidated += 1
+        return invalidated
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self.sync()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self.close()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._closing:
+                break
+            try:
+                await asyncio.to_thread(self.sync)
+                if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                    self._last_prune = time.monotonic()
+                    await asyncio.to_thread(change_log.prune, int(time.time()) - self.retention)
+            except ERRORS as exc:
+                logger.error("O'zgarishlar jurnalini o'qishda xatolik: %s", exc)
+
+
+watcher = ChangeWatcher()
+watcher.subscribe("movies", code_filter.invalidate)
+watcher.subscribe("movies", catalog_snapshot.invalidate)
+watcher.subscribe("force_channels", force_channels.invalidate_cache)
+watcher.subscribe("premium", users.invalidate_premium)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
+
+import metrics
+from config import OUTBOUND_BURST, OUTBOUND_CONCURRENCY, OUTBOUND_RATE, SUPERVISOR_WORKERS
+from logging_conf import get_logger
+
+logger = get_logger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    DELIVERY = 1
+    ADMIN = 2
+    BROADCAST = 3
+
+
+# Calls Telegram counts against the per-bot message limit; the rest only need a connection.
+RATE_LIMITED_PREFIXES = ("send", "copyMessage", "forwardMessage")
+
+_current: ContextVar[Priority] = ContextVar("outbound_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def priority(level: Priority) -> Iterator[None]:
+    token = _current.set(level)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def prioritized(level: Priority) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with priority(level):
+                return await func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class OutboundQueue:
+    def __init__(
+        self,
+        *,
+        rate: float = OUTBOUND_RATE,
+        burst: int = OUTBOUND_BURST,
+        concurrency: int = OUTBOUND_CONCURRENCY,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.concurrency = max(concurrency, 1)
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        # Separate heaps so an empty token bucket only holds back rate-limited calls.
+        self._limited: list[tuple[int, int, asyncio.Future]] = []
+        self._unlimited: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def pending(self) -> int:
+        return len(self._limited) + len(self._unlimited)
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        # Whatever is still queued goes out unthrottled instead of hanging shutdown.
+        for heap in (self._limited, self._unlimited):
+            while heap:
+                _, _, future = heapq.heappop(heap)
+                if not future.done():
+                    self._in_flight += 1
+                    future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, method: str) -> AsyncIterator[None]:
+        level = _current.get()
+        labels = {"class": level.name.lower()}
+        started = time.perf_counter()
+        if self._task:
+            await self._acquire(level, method.startswith(RATE_LIMITED_PREFIXES))
+        else:
+            self._in_flight += 1
+        metrics.outbound_wait_seconds.observe(time.perf_counter() - started, labels=labels)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            if self._wakeup:
+                self._wakeup.set()
+            metrics.outbound_seconds.observe(time.perf_counter() - started, labels=labels)
+
+    async def _acquire(self, level: Priority, limited: bool) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heap = self._limited if limited else self._unlimited
+        heapq.heappush(heap, (level, next(self._seq), future))
+        self._wakeup.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the caller was cancelled: hand the slot back.
+                self._in_flight -= 1
+                self._wakeup.set()
+            raise
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _dispatch(self) -> Optional[float]:
+        self._refill(time.monotonic())
+        while self._in_flight < self.concurrency:
+            _prune(self._limited)
+            _prune(self._unlimited)
+            has_token = self.rate <= 0 or self._tokens >= 1
+            if self._limited and has_token and (
+                not self._unlimited or self._limited[0] < self._unlimited[0]
+            ):
+                heap = self._limited
+                if self.rate > 0:
+                    self._tokens -= 1
+            elif self._unlimited:
+                heap = self._unlimited
+            else:
+                break
+            _, _, future = heapq.heappop(heap)
+            self._in_flight += 1
+            future.set_result(None)
+        if self._limited and self.rate > 0 and self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        return None
+
+    async def _run(self) -> None:
+        while not self._closing:
+            self._wakeup.clear()
+            try:
+                delay = self._dispatch()
+            except Exception as exc:
+                logger.error("Chiquvchi navbatda xatolik: %s", exc)
+                delay = 1.0
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _prune(heap: list[tuple[int, int, asyncio.Future]]) -> None:
+    # Callers cancelled while queued leave a finished future behind.
+    while heap and heap[0][2].done():
+        heapq.heappop(heap)
+
+
+# Telegram's limit is per bot, so supervisor workers split it between them.
+queue = OutboundQueue(rate=OUTBOUND_RATE / max(SUPERVISOR_WORKERS, 1))
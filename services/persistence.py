@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import pickle
+from typing import Any, Optional
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from config import PERSISTENCE_FLUSH_INTERVAL
+from logging_conf import get_logger
+from repositories import persistence
+
+logger = get_logger(__name__)
+
+USER_KIND = "user"
+CHAT_KIND = "chat"
+
+EntryKey = tuple[str, int]
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class SQLitePersistence(BasePersistence[dict, dict, dict]):
+    def __init__(self, update_interval: float = PERSISTENCE_FLUSH_INTERVAL) -> None:
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.written = 0
+        self.skipped = 0
+        self._persisted: dict[EntryKey, bytes] = {}
+        self._pending: dict[EntryKey, Optional[bytes]] = {}
+        self._flushing: Optional[asyncio.Future] = None
+
+    async def _load(self, kind: str) -> dict[int, dict]:
+        rows = await asyncio.to_thread(persistence.load_entries, kind)
+        result: dict[int, dict] = {}
+        for key, blob in rows.items():
+            try:
+                result[key] = pickle.loads(blob)
+            except Exception:
+                logger.exception("Persistence yozuvini o'qib bo'lmadi: %s/%s", kind, key)
+                continue
+            self._persisted[(kind, key)] = _digest(blob)
+        return result
+
+    async def get_user_data(self) -> dict[int, dict]:
+        return await self._load(USER_KIND)
+
+    async def get_chat_data(self) -> dict[int, dict]:
+        return await self._load(CHAT_KIND)
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name: str, key: Any, new_state: Optional[object]) -> None:
+        return None
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        await self._mark(USER_KIND, user_id, data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        await self._mark(CHAT_KIND, chat_id, data)
+
+    async def update_bot_data(self, data: dict) -> None:
+        return None
+
+    async def update_callback_data(self, data: Any) -> None:
+        return None
+
+    async def drop_user_data(self, user_id: int) -> None:
+        await self._mark(USER_KIND, user_id, None)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        await self._mark(CHAT_KIND, chat_id, None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        return None
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        return None
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        return None
+
+    async def _mark(self, kind: str, key: int, data: Optional[dict]) -> None:
+        entry = (kind, key)
+        blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL) if data else None
+        persisted = self._persisted.get(entry)
+        if entry not in self._pending:
+            if blob is None and persisted is None:
+                self.skipped += 1
+                return
+            if blob is not None and persisted == _digest(blob):
+                self.skipped += 1
+                return
+        self._pending[entry] = blob
+        # Application.update_persistence() gathers all update_* calls, so they
+        # land in the same loop iteration and share a single transaction.
+        if self._flushing is None:
+            self._flushing = asyncio.ensure_future(self._flush_soon())
+        await asyncio.shield(self._flushing)
+
+    async def _flush_soon(self) -> None:
+        await asyncio.sleep(0)
+        self._flushing = None
+        await self._write_pending()
+
+    async def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = {}
+        try:
+            await asyncio.to_thread(
+                persistence.save_entries,
+                [(kind, key, blob) for (kind, key), blob in batch.items()],
+            )
+        except Exception:
+            for entry, blob in batch.items():
+                self._pending.setdefault(entry, blob)
+            raise
+        for entry, blob in batch.items():
+            if blob is None:
+                self._persisted.pop(entry, None)
+            else:
+                self._persisted[entry] = _digest(blob)
+        self.written += len(batch)
+
+    async def flush(self) -> None:
+        if self._flushing is not None:
+            await asyncio.shield(self._flushing)
+        await self._write_pending()
+        logger.info("Persistence saqlandi: %s yozuv, %s o'zgarmagan", self.written, self.skipped)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+from config import PROFILE_SAMPLE_INTERVAL_MS
+from logging_conf import get_logger
+
+logger = get_logger(__name__)
+
+MODES = ("cprofile", "sample")
+
+_active_lock = threading.Lock()
+_active = False
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def is_running() -> bool:
+    return _active
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename.rsplit("/", 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def _record(self, frame: Optional[FrameType]) -> None:
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        if labels:
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 40) -> str:
+        self_counts: Counter[str] = Counter()
+        total_counts: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+        total = max(self.samples, 1)
+        lines = [f"{'self%':>7} {'total%':>7}  function"]
+        for label, count in self_counts.most_common(limit):
+            lines.append(
+                f"{100 * count / total:>6.1f}% {100 * total_counts[label] / total:>6.1f}%  {label}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+class SignalSampler(StackSampler):
+    # SIGPROF fires on CPU time and runs between bytecodes of the main thread,
+    # so samples are not biased towards GIL-releasing calls.
+    def start(self) -> None:
+        self._previous = signal.signal(signal.SIGPROF, self._on_signal)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+
+    def _on_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        self._record(frame)
+
+
+class ThreadSampler(StackSampler):
+    def __init__(self, interval: float, thread_id: int) -> None:
+        super().__init__(interval)
+        self.thread_id = thread_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._record(sys._current_frames().get(self.thread_id))
+
+
+def make_sampler(interval: float) -> StackSampler:
+    if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+        return SignalSampler(interval)
+    return ThreadSampler(interval, threading.get_ident())
+
+
+def _pstats_report(profile: cProfile.Profile, limit: int) -> str:
+    buffer = io.StringIO()
+    stats = pstats.Stats(profile, stream=buffer)
+    stats.strip_dirs()
+    buffer.write("=== cumulative ===\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    buffer.write("\n=== tottime ===\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+    return buffer.getvalue()
+
+
+async def profile_for(seconds: float, mode: str = "cprofile", limit: int = 40) -> str:
+    global _active
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode: {mode}")
+    with _active_lock:
+        if _active:
+            raise ProfilerBusyError("Profiling is already running")
+        _active = True
+
+    started = time.time()
+    try:
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+            body = _pstats_report(profile, limit)
+        else:
+            sampler = make_sampler(PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+            body = (
+                f"sampler: {type(sampler).__name__}\n"
+                f"samples: {sampler.samples}\n\n=== top functions ===\n"
+                + sampler.top_functions(limit)
+                + "\n=== collapsed stacks ===\n"
+                + sampler.collapsed()
+            )
+    finally:
+        with _active_lock:
+            _active = False
+
+    header = (
+        f"mode: {mode}\n"
+        f"started: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))}\n"
+        f"duration: {seconds:g}s\n\n"
+    )
+    logger.info("Profiling tugadi (%s, %ss)", mode, seconds)
+    return header + body
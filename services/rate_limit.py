@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import RATE_LIMIT_MAX_USERS, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW
+
+
+class SlidingWindowLimiter:
+    # Sliding-window counter: per key only the current and previous fixed
+    # window counts are kept, weighted by how far the current window has run.
+    def __init__(
+        self,
+        limit: int = RATE_LIMIT_REQUESTS,
+        window: float = RATE_LIMIT_WINDOW,
+        max_keys: int = RATE_LIMIT_MAX_USERS,
+    ) -> None:
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.dropped = 0
+        # key -> [window index, previous count, current count, warned]
+        self._entries: OrderedDict[int, list] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, current_window: int) -> None:
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if len(entries) <= self.max_keys and entry[0] >= current_window - 1:
+                break
+            del entries[key]
+
+    def hit(self, key: int, now: Optional[float] = None) -> tuple[bool, bool]:
+        if self.limit <= 0:
+            return True, False
+        now = time.monotonic() if now is None else now
+        current_window = int(now // self.window)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = [current_window, 0, 0, False]
+            self._entries[key] = entry
+        else:
+            self._entries.move_to_end(key)
+            if entry[0] != current_window:
+                entry[1] = entry[2] if entry[0] == current_window - 1 else 0
+                entry[2] = 0
+                entry[0] = current_window
+                entry[3] = False
+        self._evict(current_window)
+
+        elapsed = now / self.window - current_window
+        estimate = entry[1] * (1.0 - elapsed) + entry[2]
+        if estimate >= self.limit:
+            self.dropped += 1
+            first = not entry[3]
+            entry[3] = True
+            return False, first
+        entry[2] += 1
+        self.allowed += 1
+        return True, False
+
+
+limiter = SlidingWindowLimiter()
@@ -5,44 +5,31 @@ from telegram.ext import ContextTypes
 from logging_conf import get_logger
 from repositories import movies
 from keyboards import movie_action_keyboard, not_found_keyboard
+from rendering import render_caption
+from services import delivery_log, outbound
 
 logger = get_logger(__name__)
 
 
 def _build_caption(movie: movies.Movie, code: str) -> str:
-    name = movie.name or movie.desc or "Nom mavjud emas"
-    desc = movie.desc or ""
-    return (
-        f"🎬 {name}\n\n"
-        f"🆔 Kod: {code}\n"
-        f"📝 {desc}\n"
-        f"📥 Yuklab olingan: {movie.views + 1}\n\n"
-        f"@PrimeKin0Bot - 🎬 Eng zo'r kino va seriallar shu yerda"
-    )
+    return render_caption(movie, code)
 
 
-async def send_movie_by_code(
-    chat_id: int,
-    code: str,
-    context: ContextTypes.DEFAULT_TYPE,
-) -> None:
-    movie = movies.get_movie(code)
-    if not movie:
-        await context.bot.send_message(
-            chat_id,
-            f"⚠️ Bunday koddagi kino topilmadi.\n🆔 Kod: {code}",
-            reply_markup=not_found_keyboard(),
-        )
-        return
-    await send_movie_to_chat(chat_id, movie, code, context)
+async def send_not_found(chat_id: int, code: str, context: ContextTypes.DEFAULT_TYPE) -> None:
+    await context.bot.send_message(
+        chat_id,
+        f"⚠️ Bunday koddagi kino topilmadi.\n🆔 Kod: {code}",
+        reply_markup=not_found_keyboard(),
+    )
 
 
+@outbound.prioritized(outbound.Priority.DELIVERY)
 async def send_movie_to_chat(
     chat_id: int,
     movie: movies.Movie,
     code: str,
     context: ContextTypes.DEFAULT_TYPE,
-) -> None:
+) -> bool:
     caption = _build_caption(movie, code)
     keyboard = movie_action_keyboard(code, include_menu=True)
     content_type = (movie.type or "document").lower()
@@ -78,9 +65,13 @@ async def send_movie_to_chat(
             )
 
         movies.increment_views(code)
+        delivery_log.writer.record(chat_id, code)
+        return True
     except Exception as exc:
         logger.error("Kontentni yuborishda xatolik: %s", exc)
+        delivery_log.writer.record(chat_id, code, ok=False)
         await context.bot.send_message(
             chat_id,
             "❌ Kontentni yuborishda xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring.",
         )
+        return False
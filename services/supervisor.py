@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import signal
+import threading
+import urllib.parse
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Optional
+
+import httpx
+
+from config import (
+    BOT_API_BASE_URL,
+    BOT_TOKEN,
+    GET_UPDATES_CONNECT_TIMEOUT,
+    GET_UPDATES_HTTP2,
+    GET_UPDATES_READ_TIMEOUT,
+    SUPERVISOR_POLL_TIMEOUT,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from logging_conf import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+DEFAULT_BASE_URL = "https://api.telegram.org/bot"
+MEMBER_UPDATES = ("chat_member", "my_chat_member")
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+WEBHOOK_MAX_BODY = 1024 * 1024
+
+
+def partition_key(update: dict[str, Any]) -> int:
+    # chat_member updates belong to the member, not to whoever changed the status.
+    for key in MEMBER_UPDATES:
+        member = update.get(key)
+        if member:
+            return member["new_chat_member"]["user"]["id"]
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        sender = value.get("from") or value.get("user")
+        if sender:
+            return sender["id"]
+        chat = value.get("chat")
+        if chat:
+            return chat["id"]
+    return update.get("update_id", 0)
+
+
+def worker_main(index: int, conn: Connection, token: str) -> None:
+    # Ctrl+C reaches the whole process group; workers stop when the supervisor says so.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging()
+    asyncio.run(_serve_worker(index, conn, token))
+
+
+async def _serve_worker(index: int, conn: Connection, token: str) -> None:
+    from telegram import Update
+
+    import app as bot_app
+
+    if bot_app.metrics_server:
+        bot_app.metrics_server.port += index + 1
+    application = bot_app.build_application(bot_app.create_builder(token).updater(None))
+
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+    send_lock = threading.Lock()
+
+    def send(message: tuple[str, Any]) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def read() -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = ("stop", None)
+            loop.call_soon_threadsafe(inbox.put_nowait, message)
+            if message[0] == "stop":
+                return
+
+    threading.Thread(target=read, name=f"worker-{index}-reader", daemon=True).start()
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        send(("ready", index))
+        logger.info("👷 Worker %s ishga tushdi", index)
+        while True:
+            kind, payload = await inbox.get()
+            if kind == "update":
+                await application.update_queue.put(Update.de_json(payload, application.bot))
+            elif kind == "stop":
+                break
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+    logger.info("👷 Worker %s to'xtadi", index)
+
+
+@dataclass
+class WorkerHandle:
+    index: int
+    process: multiprocessing.process.BaseProcess
+    conn: Connection
+    lock: threading.Lock
+
+    def send(self, message: tuple[str, Any]) -> bool:
+        try:
+            with self.lock:
+                self.conn.send(message)
+        except (BrokenPipeError, OSError):
+            return False
+        return True
+
+
+class Supervisor:
+    def __init__(self, workers: int, token: str = BOT_TOKEN) -> None:
+        self.workers = max(workers, 1)
+        self.token = token
+        self.dispatched = 0
+        self.restarts = 0
+        self._handles: list[WorkerHandle] = []
+        self._ready: set[int] = set()
+        self._ready_event = threading.Event()
+        self._context = multiprocessing.get_context("spawn")
+        self._relay: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def _spawn(self, index: int) -> WorkerHandle:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, child_conn, self.token),
+            name=f"bot-worker-{index}",
+        )
+        process.start()
+        child_conn.close()
+        return WorkerHandle(index, process, parent_conn, threading.Lock())
+
+    def start(self) -> None:
+        self._handles = [self._spawn(index) for index in range(self.workers)]
+        self._relay = threading.Thread(
+            target=self._relay_loop, name="supervisor-relay", daemon=True
+        )
+        self._relay.start()
+        logger.info("🧩 Supervisor: %s ta worker", self.workers)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready_event.wait(timeout)
+
+    def dispatch(self, update: dict[str, Any]) -> None:
+        handle = self._handles[partition_key(update) % self.workers]
+        if not handle.send(("update", update)):
+            logger.error(
+                "Worker %s ga update yuborilmadi: %s", handle.index, update.get("update_id")
+            )
+            return
+        self.dispatched += 1
+
+    def check_workers(self) -> None:
+        for pos, handle in enumerate(self._handles):
+            if self._stopping or handle.process.is_alive():
+                continue
+            logger.error(
+                "Worker %s to'xtab qoldi (exit %s), qayta ishga tushirilmoqda",
+                handle.index,
+                handle.process.exitcode,
+            )
+            handle.conn.close()
+            self._handles[pos] = self._spawn(handle.index)
+            self.restarts += 1
+
+    def _relay_loop(self) -> None:
+        while not self._stopping:
+            conns = [handle.conn for handle in self._handles if not handle.conn.closed]
+            try:
+                ready = wait(conns, timeout=1.0)
+            except OSError:
+                continue
+            for conn in ready:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    conn.close()
+                    continue
+                if message[0] == "ready":
+                    self._ready.add(message[1])
+                    if len(self._ready) >= self.workers:
+                        self._ready_event.set()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self._stopping = True
+        for handle in self._handles:
+            handle.send(("stop", None))
+        for handle in self._handles:
+            handle.process.join(timeout)
+            if handle.process.is_alive():
+                logger.warning("Worker %s to'xtamadi, majburan yopilmoqda", handle.index)
+                handle.process.terminate()
+                handle.process.join(5)
+            handle.conn.close()
+        if self._relay:
+            self._relay.join(2)
+            self._relay = None
+
+    def _api_url(self) -> str:
+        return f"{BOT_API_BASE_URL or DEFAULT_BASE_URL}{self.token}/"
+
+    async def poll(self) -> None:
+        from telegram import Update
+
+        timeout = httpx.Timeout(
+            SUPERVISOR_POLL_TIMEOUT + GET_UPDATES_READ_TIMEOUT, connect=GET_UPDATES_CONNECT_TIMEOUT
+        )
+        async with httpx.AsyncClient(
+            base_url=self._api_url(), timeout=timeout, http2=GET_UPDATES_HTTP2
+        ) as client:
+            await client.post("deleteWebhook")
+            offset = 0
+            while True:
+                try:
+                    response = await client.post(
+                        "getUpdates",
+                        json={
+                            "offset": offset,
+                            "timeout": SUPERVISOR_POLL_TIMEOUT,
+                            "allowed_updates": Update.ALL_TYPES,
+                        },
+                    )
+                    data = response.json()
+                except (httpx.HTTPError, ValueError) as exc:
+                    logger.warning("getUpdates xatoligi: %s", exc)
+                    await asyncio.sleep(1)
+                    continue
+                if not data.get("ok"):
+                    retry = data.get("parameters", {}).get("retry_after", 1)
+                    logger.warning("getUpdates rad etildi: %s", data.get("description"))
+                    await asyncio.sleep(retry)
+                    continue
+                for update in data["result"]:
+                    self.dispatch(update)
+                    offset = update["update_id"] + 1
+                self.check_workers()
+
+    async def serve_webhook(self) -> None:
+        from telegram import Update
+
+        path = urllib.parse.urlsplit(WEBHOOK_URL).path or "/"
+        payload: dict[str, Any] = {"url": WEBHOOK_URL, "allowed_updates": Update.ALL_TYPES}
+        if WEBHOOK_SECRET:
+            payload["secret_token"] = WEBHOOK_SECRET
+        async with httpx.AsyncClient(base_url=self._api_url(), timeout=30) as client:
+            response = await client.post("setWebhook", json=payload)
+            logger.info("setWebhook: %s", response.json().get("description"))
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await self._handle_webhook(reader, writer, path)
+            except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+                pass
+            except Exception as exc:
+                logger.error("Webhook so'rovida xatolik: %s", exc)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, WEBHOOK_LISTEN, WEBHOOK_PORT)
+        logger.info("🌐 Webhook: %s:%s%s", WEBHOOK_LISTEN, WEBHOOK_PORT, path)
+        try:
+            while True:
+                await asyncio.sleep(5)
+                self.check_workers()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def _handle_webhook(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str
+    ) -> None:
+        while True:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=60)
+            if not request_line:
+                return
+            headers: dict[str, str] = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request_line.decode("latin-1").split()
+            length_header = headers.get("content-length", "0") or "0"
+            status = "200 OK"
+            if len(parts) < 2 or parts[0] != "POST" or parts[1].split("?", 1)[0] != path:
+                status = "404 Not Found"
+            elif WEBHOOK_SECRET and headers.get(SECRET_HEADER) != WEBHOOK_SECRET:
+                status = "403 Forbidden"
+            elif not length_header.isdigit():
+                status = "400 Bad Request"
+            elif int(length_header) > WEBHOOK_MAX_BODY:
+                status = "413 Payload Too Large"
+            if status != "200 OK":
+                # The body is never read, so the connection cannot be reused.
+                await self._respond(writer, status, keep_alive=False)
+                return
+            length = int(length_header)
+            body = await reader.readexactly(length) if length else b""
+            try:
+                self.dispatch(json.loads(body))
+            except (ValueError, TypeError, KeyError) as exc:
+                logger.warning("Webhook update o'qilmadi: %s", exc)
+                status = "400 Bad Request"
+            await self._respond(writer, status, keep_alive=True)
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: str, keep_alive: bool) -> None:
+        connection = "keep-alive" if keep_alive else "close"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: {connection}\r\n\r\n".encode(
+                "latin-1"
+            )
+        )
+        await writer.drain()
+
+    async def run(self) -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        self.start()
+        ingress = asyncio.create_task(self.serve_webhook() if WEBHOOK_URL else self.poll())
+        stopped = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({ingress, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (ingress, stopped):
+                task.cancel()
+            await asyncio.gather(ingress, stopped, return_exceptions=True)
+            await asyncio.to_thread(self.stop)
+        if ingress.done() and not ingress.cancelled() and ingress.exception():
+            raise ingress.exception()
+
+
+def run_supervisor(workers: int) -> None:
+    asyncio.run(Supervisor(workers).run())
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, ContextManager, Iterable, Optional, Protocol, Sequence
+
+
+class Cursor(Protocol):
+    rowcount: int
+
+    def fetchone(self) -> Any: ...
+
+    def fetchall(self) -> list[Any]: ...
+
+    def fetchmany(self, size: int) -> list[Any]: ...
+
+
+class Connection(Protocol):
+    # The sqlite3.Connection subset repositories rely on; rows are indexable by name.
+    def execute(self, query: str, params: Sequence[object] = ...) -> Cursor: ...
+
+    def executemany(self, query: str, params_seq: Iterable[Sequence[object]]) -> Cursor: ...
+
+    def close(self) -> None: ...
+
+
+class Backend(ABC):
+    name: str
+    errors: tuple[type[Exception], ...]
+    # Local database file, if any; used for backups and replaced-file detection.
+    path: Optional[str] = None
+
+    @abstractmethod
+    def connect(self) -> Connection:
+        ...
+
+    @abstractmethod
+    def session(self, snapshot: bool = False) -> ContextManager[Connection]:
+        ...
+
+    @abstractmethod
+    def is_retryable(self, exc: BaseException) -> bool:
+        ...
+
+    @abstractmethod
+    def copy_rows(
+        self,
+        conn: Connection,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[object]],
+    ) -> int:
+        ...
+
+    @abstractmethod
+    def data_version(self, conn: Connection) -> int:
+        ...
+
+    def init_schema(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from config import DATABASE_URL, DB_PATH, DB_TIMEOUT, PG_STATEMENT_CACHE_SIZE
+from storage.postgres import STATS_REBUILD, PostgresBackend
+from storage.sqlite import SQLiteBackend
+
+TABLES = {
+    "movies": ("code", "name", "type", "file_id", "desc", "parent_code", "views", "created_at"),
+    "users": ("user_id", "username", "first_name", "is_premium", "premium_until", "created_at"),
+    "force_channels": ("id", "channel_id", "channel_link", "created_at"),
+    "view_rollups": ("period", "bucket", "code", "count"),
+    "deliveries": ("id", "ts", "chat_id", "code", "ok"),
+    "delivery_daily": ("day", "code", "deliveries", "failures", "users"),
+    "channel_members": ("channel_id", "user_id", "status", "updated_at"),
+    "persistence": ("kind", "key", "data", "updated_at"),
+}
+TRIGGER_TABLES = ("movies", "users", "force_channels")
+SERIAL_TABLES = ("force_channels", "deliveries")
+COPY_BATCH = 10000
+
+
+def copy_sqlite_to_postgres(
+    source: SQLiteBackend, target: PostgresBackend, batch_size: int = COPY_BATCH
+) -> dict[str, int]:
+    target.init_schema()
+    counts: dict[str, int] = {}
+    with source.session() as src, target.session() as dst:
+        dst.execute(f"TRUNCATE {', '.join(TABLES)}, change_log, change_seq RESTART IDENTITY")
+        # Counters and the change log are rebuilt once instead of per copied row.
+        for table in TRIGGER_TABLES:
+            dst.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+        for table, columns in TABLES.items():
+            cursor = src.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            copied = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                copied += target.copy_rows(dst, table, columns, rows)
+            counts[table] = copied
+        for table in TRIGGER_TABLES:
+            dst.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        for table in SERIAL_TABLES:
+            dst.execute(
+                f"""
+                SELECT setval(
+                    pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false
+                )
+                FROM {table}
+                """
+            ).fetchone()
+        dst.execute(STATS_REBUILD)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copy the SQLite database into PostgreSQL")
+    parser.add_argument("source", nargs="?", default=DB_PATH)
+    parser.add_argument("--dsn", default=DATABASE_URL)
+    parser.add_argument("--batch-size", type=int, default=COPY_BATCH)
+    args = parser.parse_args()
+    target = PostgresBackend(
+        args.dsn,
+        min_size=1,
+        max_size=2,
+        statement_cache_size=PG_STATEMENT_CACHE_SIZE,
+        timeout=DB_TIMEOUT,
+    )
+    started = time.perf_counter()
+    try:
+        counts = copy_sqlite_to_postgres(
+            SQLiteBackend(args.source, DB_TIMEOUT), target, args.batch_size
+        )
+    finally:
+        target.close()
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+    print(f"⏱ {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
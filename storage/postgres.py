@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import re
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Awaitable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+from storage.base import Backend
+
+T = TypeVar("T")
+
+FETCH_CHUNK = 1000
+SCHEMA_LOCK_ID = 4823101
+
+# Repositories write SQLite-flavoured SQL: "?" placeholders and a bare `desc` column.
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\?|(?<![\"\w])desc(?![\"\w])")
+_RETURNING = re.compile(r"\bRETURNING\b", re.IGNORECASE)
+_ROW_STATEMENTS = {"SELECT", "WITH", "VALUES", "SHOW"}
+
+_CREATED_AT = "TEXT DEFAULT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')"
+
+STATS_REBUILD = """
+    DELETE FROM stats_counters;
+    INSERT INTO stats_counters (name, value)
+    SELECT 'movies', COUNT(*) FROM movies
+    UNION ALL
+    SELECT 'movies:' || type, COUNT(*) FROM movies GROUP BY type
+    UNION ALL
+    SELECT 'users', COUNT(*) FROM users
+    UNION ALL
+    SELECT 'premium_users', COUNT(*) FROM users WHERE is_premium = 1;
+"""
+
+# Codes use the "C" collation so ORDER BY code matches the byte order of the catalog snapshot.
+SCHEMA = f"""
+    SELECT pg_advisory_xact_lock({SCHEMA_LOCK_ID});
+
+    CREATE TABLE IF NOT EXISTS movies (
+        code TEXT COLLATE "C" PRIMARY KEY,
+        name TEXT NOT NULL DEFAULT '',
+        type TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        "desc" TEXT NOT NULL,
+        parent_code TEXT COLLATE "C",
+        views INTEGER DEFAULT 0,
+        created_at {_CREATED_AT}
+    );
+    CREATE TABLE IF NOT EXISTS users (
+        user_id BIGINT PRIMARY KEY,
+        username TEXT,
+        first_name TEXT,
+        is_premium INTEGER DEFAULT 0,
+        premium_until TEXT,
+        created_at {_CREATED_AT}
+    );
+    CREATE TABLE IF NOT EXISTS force_channels (
+        id BIGSERIAL PRIMARY KEY,
+        channel_id TEXT NOT NULL UNIQUE,
+        channel_link TEXT NOT NULL,
+        created_at {_CREATED_AT}
+    );
+    CREATE TABLE IF NOT EXISTS view_rollups (
+        period TEXT NOT NULL,
+        bucket BIGINT NOT NULL,
+        code TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (period, bucket, code)
+    );
+    CREATE TABLE IF NOT EXISTS deliveries (
+        id BIGSERIAL PRIMARY KEY,
+        ts BIGINT NOT NULL,
+        chat_id BIGINT NOT NULL,
+        code TEXT NOT NULL,
+        ok INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE TABLE IF NOT EXISTS delivery_daily (
+        day BIGINT NOT NULL,
+        code TEXT NOT NULL,
+        deliveries INTEGER NOT NULL DEFAULT 0,
+        failures INTEGER NOT NULL DEFAULT 0,
+        users INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, code)
+    );
+    CREATE TABLE IF NOT EXISTS channel_members (
+        channel_id TEXT NOT NULL,
+        user_id BIGINT NOT NULL,
+        status TEXT NOT NULL,
+        updated_at BIGINT NOT NULL,
+        PRIMARY KEY (channel_id, user_id)
+    );
+    CREATE TABLE IF NOT EXISTS persistence (
+        kind TEXT NOT NULL,
+        key BIGINT NOT NULL,
+        data BYTEA NOT NULL,
+        updated_at BIGINT NOT NULL,
+        PRIMARY KEY (kind, key)
+    );
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value BIGINT NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS change_seq (
+        entity TEXT PRIMARY KEY,
+        seq BIGINT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS change_log (
+        entity TEXT NOT NULL,
+        seq BIGINT NOT NULL,
+        key TEXT NOT NULL,
+        ts BIGINT NOT NULL,
+        PRIMARY KEY (entity, seq)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_movies_views ON movies (views DESC);
+    CREATE INDEX IF NOT EXISTS idx_movies_parent ON movies (parent_code, created_at);
+    CREATE INDEX IF NOT EXISTS idx_movies_created ON movies (created_at);
+    CREATE INDEX IF NOT EXISTS idx_deliveries_ts ON deliveries (ts);
+
+    CREATE OR REPLACE FUNCTION bump_counter(counter TEXT, delta BIGINT) RETURNS void AS $$
+    BEGIN
+        INSERT INTO stats_counters (name, value) VALUES (counter, delta)
+        ON CONFLICT (name) DO UPDATE SET value = stats_counters.value + EXCLUDED.value;
+    END
+    $$ LANGUAGE plpgsql;
+
+    -- The change_seq row lock is held until commit, so sequence numbers commit in order.
+    CREATE OR REPLACE FUNCTION log_change(change_entity TEXT, change_key TEXT) RETURNS void AS $$
+    DECLARE
+        next_seq BIGINT;
+    BEGIN
+        INSERT INTO change_seq (entity, seq) VALUES (change_entity, 1)
+        ON CONFLICT (entity) DO UPDATE SET seq = change_seq.seq + 1
+        RETURNING seq INTO next_seq;
+        INSERT INTO change_log (entity, seq, key, ts)
+        VALUES (change_entity, next_seq, change_key, EXTRACT(EPOCH FROM now())::BIGINT);
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION movies_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM bump_counter('movies', 1);
+            PERFORM bump_counter('movies:' || NEW.type, 1);
+            PERFORM log_change('movies', NEW.code);
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM bump_counter('movies', -1);
+            PERFORM bump_counter('movies:' || OLD.type, -1);
+            PERFORM log_change('movies', OLD.code);
+        ELSE
+            IF OLD.type IS DISTINCT FROM NEW.type THEN
+                PERFORM bump_counter('movies:' || OLD.type, -1);
+                PERFORM bump_counter('movies:' || NEW.type, 1);
+            END IF;
+            PERFORM log_change('movies', NEW.code);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION users_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM bump_counter('users', 1);
+            IF NEW.is_premium = 1 THEN
+                PERFORM bump_counter('premium_users', 1);
+                PERFORM log_change('premium', NEW.user_id::TEXT);
+            END IF;
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM bump_counter('users', -1);
+            IF OLD.is_premium = 1 THEN
+                PERFORM bump_counter('premium_users', -1);
+            END IF;
+        ELSE
+            IF (OLD.is_premium = 1) IS DISTINCT FROM (NEW.is_premium = 1) THEN
+                PERFORM bump_counter(
+                    'premium_users', CASE WHEN NEW.is_premium = 1 THEN 1 ELSE -1 END
+                );
+            END IF;
+            PERFORM log_change('premium', NEW.user_id::TEXT);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION force_channels_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM log_change('force_channels', OLD.channel_id);
+        ELSE
+            PERFORM log_change('force_channels', NEW.channel_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS trg_movies_changed ON movies;
+    CREATE TRIGGER trg_movies_changed
+        AFTER INSERT OR DELETE OR UPDATE OF name, type, file_id, "desc", parent_code ON movies
+        FOR EACH ROW EXECUTE FUNCTION movies_changed();
+    DROP TRIGGER IF EXISTS trg_users_changed ON users;
+    CREATE TRIGGER trg_users_changed
+        AFTER INSERT OR DELETE OR UPDATE OF is_premium, premium_until ON users
+        FOR EACH ROW EXECUTE FUNCTION users_changed();
+    DROP TRIGGER IF EXISTS trg_force_channels_changed ON force_channels;
+    CREATE TRIGGER trg_force_channels_changed
+        AFTER INSERT OR UPDATE OR DELETE ON force_channels
+        FOR EACH ROW EXECUTE FUNCTION force_channels_changed();
+
+    {STATS_REBUILD}
+"""
+
+
+@lru_cache(maxsize=2048)
+def translate(query: str) -> str:
+    numbers = itertools.count(1)
+
+    def replace(match: re.Match) -> str:
+        token = match.group(0)
+        if token == "?":
+            return f"${next(numbers)}"
+        if token == "desc":
+            return '"desc"'
+        return token
+
+    return _TOKENS.sub(replace, query)
+
+
+def _returns_rows(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)
+    return (bool(head) and head[0].upper() in _ROW_STATEMENTS) or bool(_RETURNING.search(sql))
+
+
+def _status_count(status: str) -> int:
+    tail = status.rsplit(" ", 1)[-1]
+    return int(tail) if tail.isdigit() else -1
+
+
+async def _wait(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+class PostgresCursor:
+    def __init__(
+        self, conn: PostgresConnection, sql: str, args: tuple[Any, ...], rowcount: int = -1
+    ) -> None:
+        self._conn = conn
+        self._sql = sql
+        self._args = args
+        self.rowcount = rowcount
+        self._cursor: Any = None
+        self._buffer: Optional[deque] = None
+
+    def fetchone(self) -> Any:
+        return self._conn.run(self._conn.raw.fetchrow(self._sql, *self._args))
+
+    def fetchall(self) -> list[Any]:
+        return self._conn.run(self._conn.raw.fetch(self._sql, *self._args))
+
+    def fetchmany(self, size: int = FETCH_CHUNK) -> list[Any]:
+        if self._cursor is None and self._buffer is None:
+            if self._conn.raw.is_in_transaction():
+                # Exports and snapshot builds stream through a server-side cursor.
+                self._cursor = self._conn.run(self._conn.raw.cursor(self._sql, *self._args))
+            else:
+                self._buffer = deque(self.fetchall())
+        if self._cursor is not None:
+            return self._conn.run(self._cursor.fetch(size))
+        return [self._buffer.popleft() for _ in range(min(size, len(self._buffer)))]
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            rows = self.fetchmany(FETCH_CHUNK)
+            if not rows:
+                return
+            yield from rows
+
+
+class PostgresConnection:
+    def __init__(self, backend: PostgresBackend, raw: Any) -> None:
+        self._backend = backend
+        self.raw = raw
+
+    def run(self, awaitable: Awaitable[T]) -> T:
+        return self._backend.run(awaitable)
+
+    def execute(self, query: str, params: Sequence[object] = ()) -> PostgresCursor:
+        sql = translate(query)
+        args = tuple(params)
+        if _returns_rows(sql):
+            return PostgresCursor(self, sql, args)
+        # With arguments asyncpg prepares the statement and keeps it in the connection's LRU.
+        status = self.run(self.raw.execute(sql, *args))
+        return PostgresCursor(self, sql, args, _status_count(status))
+
+    def executemany(
+        self, query: str, params_seq: Iterable[Sequence[object]]
+    ) -> PostgresCursor:
+        args = [tuple(params) for params in params_seq]
+        if args:
+            self.run(self.raw.executemany(translate(query), args))
+        # asyncpg reports no counts for executemany; -1 is DB-API's "unknown".
+        return PostgresCursor(self, "", ())
+
+    def close(self) -> None:
+        if self.raw is not None:
+            self.run(self._backend.pool.release(self.raw))
+            self.raw = None
+
+
+class PostgresBackend(Backend):
+    name = "postgres"
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        min_size: int,
+        max_size: int,
+        statement_cache_size: int,
+        timeout: float,
+    ) -> None:
+        try:
+            import asyncpg
+        except ImportError as exc:
+            raise RuntimeError(
+                "DB_BACKEND=postgres uchun asyncpg kerak: pip install -r requirements-postgres.txt"
+            ) from exc
+        if not dsn:
+            raise RuntimeError("DB_BACKEND=postgres uchun DATABASE_URL berilmagan")
+        self._asyncpg = asyncpg
+        self.errors = (asyncpg.PostgresError, asyncpg.InterfaceError)
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self.timeout = timeout
+        self._pool: Any = None
+        self._pool_lock = threading.Lock()
+        # Repositories stay synchronous; the pool lives on its own loop thread.
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="postgres-loop", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, awaitable: Awaitable[T]) -> T:
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Postgres loopi ichidan sinxron DB chaqiruvi qilib bo'lmaydi")
+        return asyncio.run_coroutine_threadsafe(_wait(awaitable), self._loop).result()
+
+    @property
+    def pool(self) -> Any:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = self.run(self._create_pool())
+        return self._pool
+
+    async def _create_pool(self) -> Any:
+        # Pool() binds to the loop it is constructed on, so it must be built on ours.
+        return await self._asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            statement_cache_size=self.statement_cache_size,
+            command_timeout=self.timeout,
+        )
+
+    def connect(self) -> PostgresConnection:
+        return PostgresConnection(self, self.run(self.pool.acquire()))
+
+    @contextmanager
+    def session(self, snapshot: bool = False) -> Iterator[PostgresConnection]:
+        conn = self.connect()
+        transaction = conn.raw.transaction(
+            isolation="repeatable_read" if snapshot else "read_committed", readonly=snapshot
+        )
+        started = False
+        try:
+            self.run(transaction.start())
+            started = True
+            yield conn
+            self.run(transaction.commit())
+        except Exception:
+            if started:
+                self.run(transaction.rollback())
+            raise
+        finally:
+            conn.close()
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        return isinstance(
+            exc, (self._asyncpg.SerializationError, self._asyncpg.DeadlockDetectedError)
+        )
+
+    def copy_rows(
+        self,
+        conn: PostgresConnection,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[object]],
+    ) -> int:
+        records = [tuple(row) for row in rows]
+        if not records:
+            return 0
+        status = self.run(
+            conn.raw.copy_records_to_table(table, records=records, columns=list(columns))
+        )
+        return _status_count(status)
+
+    def data_version(self, conn: PostgresConnection) -> int:
+        # change_seq only grows, so its sum moves exactly when a tracked change commits.
+        return conn.execute(
+            "SELECT CAST(COALESCE(SUM(seq), 0) AS BIGINT) FROM change_seq"
+        ).fetchone()[0]
+
+    def init_schema(self) -> None:
+        with self.session() as conn:
+            self.run(conn.raw.execute(SCHEMA))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self.run(self._pool.close())
+            self._pool = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+# config is read once per process, so the backend is picked here, before any test module
+# imports it; the DB-free tests never touch the database but still import config.
+if os.getenv("DATABASE_URL"):
+    os.environ["DB_BACKEND"] = "postgres"
+os.environ["CATALOG_SNAPSHOT_ENABLED"] = "0"
+os.environ["CACHE_ENABLED"] = "0"
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="primekino_"), "bot.db"))
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog_store import CatalogFile, open_catalog, write_catalog  # noqa: E402
+
+ROWS = [
+    ("A1", "Kino", "video", "FILE-A1", "Tavsif", None, 7),
+    ("S1E1", "Serial 1", "video", "FILE-S1E1", "", "S1", 0),
+    ("Ö2", "Ünicode 🎬", "document", "FILE-O2", None, "S1", 12),
+]
+
+
+def test_roundtrip_lookup(tmp_path):
+    path = str(tmp_path / "catalog")
+    assert write_catalog(path, sorted(ROWS, key=lambda row: row[0].encode()), seq=42) == 3
+    catalog = CatalogFile(path)
+    try:
+        assert (catalog.seq, catalog.count) == (42, 3)
+        for row in ROWS:
+            assert catalog.get(row[0]) == row
+        assert catalog.get("NOPE") is None
+        assert catalog.get("") is None
+    finally:
+        catalog.close()
+
+
+def test_unsorted_rows_are_rejected_and_leave_no_file(tmp_path):
+    path = str(tmp_path / "catalog")
+    with pytest.raises(ValueError):
+        write_catalog(path, [ROWS[1], ROWS[0]])
+    assert os.listdir(tmp_path) == []
+
+
+def test_open_catalog_ignores_missing_or_corrupt_files(tmp_path):
+    path = tmp_path / "catalog"
+    assert open_catalog(str(path)) is None
+    path.write_bytes(b"not a catalog" * 10)
+    assert open_catalog(str(path)) is None
+
+
+def test_snapshot_views_count_on_top_of_the_file(tmp_path, monkeypatch):
+    from repositories.catalog_snapshot import CatalogSnapshot
+
+    path = str(tmp_path / "catalog")
+    snapshot = CatalogSnapshot(path, max_age=3600)
+    views = {"A1": 7}
+
+    def build() -> tuple[CatalogFile, bool]:
+        write_catalog(path, [ROWS[0][:6] + (views["A1"],)])
+        return CatalogFile(path), True
+
+    monkeypatch.setattr(snapshot, "_build_or_open", build)
+    snapshot.refresh()
+    for _ in range(3):
+        snapshot.add_view("A1")
+        views["A1"] += 1
+    known, row = snapshot.lookup("A1")
+    assert known and snapshot.views("A1", row[6]) == 10
+
+    # The rebuilt file holds those views, so the in-process counter drops them.
+    snapshot.refresh()
+    known, row = snapshot.lookup("A1")
+    assert row[6] == 10 and snapshot.views("A1", row[6]) == 10
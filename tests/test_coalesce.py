@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.coalesce import RequestCoalescer  # noqa: E402
+
+
+def _factory(calls: list[str], ok: bool = True, delay: float = 0.0):
+    async def send() -> bool:
+        calls.append("send")
+        await asyncio.sleep(delay)
+        return ok
+
+    return send
+
+
+def test_concurrent_duplicates_share_one_send():
+    coalescer = RequestCoalescer(window=5)
+    calls: list[str] = []
+
+    async def main() -> list[bool]:
+        return await asyncio.gather(
+            *(coalescer.run((1, "A1"), _factory(calls, delay=0.01)) for _ in range(3))
+        )
+
+    assert asyncio.run(main()) == [True, False, False]
+    assert calls == ["send"]
+
+
+def test_repeat_within_window_is_dropped_then_allowed():
+    coalescer = RequestCoalescer(window=5)
+    calls: list[str] = []
+
+    async def main() -> list[bool]:
+        return [
+            await coalescer.run((1, "A1"), _factory(calls), now=100.0),
+            await coalescer.run((1, "A1"), _factory(calls), now=103.0),
+            await coalescer.run((2, "A1"), _factory(calls), now=103.0),
+            await coalescer.run((1, "A1"), _factory(calls), now=105.0),
+        ]
+
+    assert asyncio.run(main()) == [True, False, True, True]
+    assert len(calls) == 3
+
+
+def test_failed_send_is_not_remembered():
+    coalescer = RequestCoalescer(window=5)
+    calls: list[str] = []
+
+    async def main() -> list[bool]:
+        return [
+            await coalescer.run((1, "A1"), _factory(calls, ok=False), now=100.0),
+            await coalescer.run((1, "A1"), _factory(calls), now=101.0),
+        ]
+
+    assert asyncio.run(main()) == [True, True]
+    assert len(calls) == 2
+
+
+def test_zero_window_only_merges_in_flight_requests():
+    coalescer = RequestCoalescer(window=0)
+    calls: list[str] = []
+
+    async def main() -> None:
+        await coalescer.run((1, "A1"), _factory(calls), now=100.0)
+        await coalescer.run((1, "A1"), _factory(calls), now=100.0)
+
+    asyncio.run(main())
+    assert len(calls) == 2
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from repositories import code_filter  # noqa: E402
+from repositories.code_filter import BloomFilter, KnownCodes  # noqa: E402
+
+
+def test_bloom_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    for idx in range(2000):
+        bloom.add(f"A{idx}")
+    assert all(f"A{idx}" in bloom for idx in range(2000))
+    false_positives = sum(f"B{idx}" in bloom for idx in range(10000))
+    assert false_positives < 300
+    assert not bloom.overfilled
+    bloom.add("extra")
+    assert bloom.overfilled
+
+
+def _fake_catalog(monkeypatch, codes: list[str]) -> None:
+    monkeypatch.setattr(code_filter, "fetchone", lambda sql: {"cnt": len(codes)})
+    monkeypatch.setattr(code_filter, "iter_rows", lambda sql: ({"code": c} for c in codes))
+
+
+def test_known_codes_pass_everything_until_built(monkeypatch):
+    _fake_catalog(monkeypatch, ["A1", "S1"])
+    known = KnownCodes(error_rate=0.001, min_capacity=100)
+    assert not known.ready and known.might_contain("NOPE")
+    assert known.rebuild() == 2
+    assert known.ready
+    assert known.might_contain("A1") and known.might_contain("S1")
+    assert not known.might_contain("NOPE")
+
+    known.add("NEW", None)
+    assert known.might_contain("NEW")
+    known.reset()
+    assert known.might_contain("NOPE")
+
+
+def test_overfilled_filter_falls_back_and_rebuilds(monkeypatch):
+    _fake_catalog(monkeypatch, ["A1"])
+    known = KnownCodes(error_rate=0.01, min_capacity=2)
+    rebuilds: list[bool] = []
+    monkeypatch.setattr(known, "rebuild_soon", lambda: rebuilds.append(True))
+    known.rebuild()
+    known.add("B1", "C1")
+    assert not known.ready and rebuilds == [True]
+    assert known.might_contain("ANY")
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.outbound import OutboundQueue, Priority, priority  # noqa: E402
+
+
+async def _call(queue: OutboundQueue, method: str, level: Priority, order: list[str]) -> None:
+    with priority(level):
+        async with queue.slot(method):
+            order.append(f"{level.name.lower()}:{method}")
+            await asyncio.sleep(0.01)
+
+
+def test_higher_priority_waiters_go_first():
+    async def main() -> list[str]:
+        queue = OutboundQueue(rate=0, burst=1, concurrency=1)
+        queue.start()
+        order: list[str] = []
+        blocker = asyncio.create_task(_call(queue, "sendMessage", Priority.ADMIN, order))
+        await asyncio.sleep(0)
+        await asyncio.gather(
+            _call(queue, "sendMessage", Priority.BROADCAST, order),
+            _call(queue, "copyMessage", Priority.DELIVERY, order),
+            _call(queue, "sendMessage", Priority.INTERACTIVE, order),
+            blocker,
+        )
+        await queue.stop()
+        return order
+
+    assert asyncio.run(main()) == [
+        "admin:sendMessage",
+        "interactive:sendMessage",
+        "delivery:copyMessage",
+        "broadcast:sendMessage",
+    ]
+
+
+def test_unlimited_calls_pass_throttled_sends():
+    async def main() -> list[str]:
+        queue = OutboundQueue(rate=1, burst=1, concurrency=4)
+        queue.start()
+        order: list[str] = []
+        sends = [_call(queue, "sendMessage", Priority.INTERACTIVE, order) for _ in range(2)]
+        answer = _call(queue, "answerCallbackQuery", Priority.BROADCAST, order)
+        done, pending = await asyncio.wait(
+            [asyncio.create_task(item) for item in (*sends, answer)], timeout=0.3
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await queue.stop()
+        return order
+
+    # One token: the second send waits ~1s, the unlimited answer does not wait behind it.
+    assert sorted(asyncio.run(main())) == [
+        "broadcast:answerCallbackQuery",
+        "interactive:sendMessage",
+    ]
+
+
+def test_stop_releases_queued_waiters():
+    async def main() -> int:
+        queue = OutboundQueue(rate=0.01, burst=1, concurrency=4)
+        queue.start()
+        order: list[str] = []
+        tasks = [
+            asyncio.create_task(_call(queue, "sendMessage", Priority.BROADCAST, order))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        await asyncio.gather(*tasks)
+        return len(order)
+
+    assert asyncio.run(main()) == 3
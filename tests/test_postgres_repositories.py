@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Runs only against a throwaway database, e.g.
+# DATABASE_URL=postgresql://postgres@127.0.0.1:5432/primekino_test python -m pytest tests
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+if not DATABASE_URL:
+    pytest.skip("DATABASE_URL berilmagan", allow_module_level=True)
+pytest.importorskip("asyncpg")
+
+import db  # noqa: E402
+from repositories import (  # noqa: E402
+    change_log,
+    channel_members,
+    deliveries,
+    force_channels,
+    movies,
+    persistence,
+    stats,
+    users,
+)
+from storage.postgres import translate  # noqa: E402
+
+
+def _movie(code: str, parent_code: str | None = None, type_: str = "video") -> movies.Movie:
+    return movies.Movie(
+        code=code,
+        name=f"Kino {code}",
+        type=type_,
+        file_id=f"FILE-{code}",
+        desc="Tavsif 'qo''shtirnoq' ? bilan",
+        parent_code=parent_code,
+        views=0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    db.init_db()
+    with db.db_session() as conn:
+        conn.execute(
+            """
+            TRUNCATE movies, users, force_channels, view_rollups, deliveries, delivery_daily,
+                channel_members, persistence, change_log RESTART IDENTITY
+            """
+        )
+        conn.execute("DELETE FROM stats_counters")
+    yield
+
+
+def test_translate_rewrites_placeholders_and_desc_outside_literals():
+    assert translate("SELECT desc FROM movies WHERE code = ? AND name = 'a?desc'") == (
+        "SELECT \"desc\" FROM movies WHERE code = $1 AND name = 'a?desc'"
+    )
+    assert translate("ORDER BY views DESC, code") == "ORDER BY views DESC, code"
+
+
+def test_movie_crud_and_resolve():
+    movies.add_movie("A1", "Kino", "video", "FILE-A1", "Tavsif")
+    duplicates = movies.add_movies([_movie("S1E1", "S1"), _movie("S1E2", "S1"), _movie("A1")])
+    assert duplicates == ["A1"]
+
+    movie = movies.get_movie("A1")
+    assert movie is not None and movie.file_id == "FILE-A1" and movie.desc == "Tavsif"
+    assert movies.get_movie("NOPE") is None
+
+    lookup = movies.resolve_code("S1")
+    assert lookup.movie is None
+    assert [item.code for item in lookup.children] == ["S1E1", "S1E2"]
+
+    assert movies.update_movie_field("A1", "desc", "Yangi") == 1
+    assert movies.get_movie("A1").desc == "Yangi"
+    assert movies.delete_movie("S1E2") == 1
+    assert movies.delete_movie("S1E2") == 0
+
+    total, by_type = movies.movie_stats()
+    assert total == 2 and by_type == {"video": 2}
+    assert {item.code for item in movies.list_movies()} == {"A1", "S1E1"}
+    assert len(movies.get_random_movies(5)) == 2
+
+
+def test_views_rollups_and_rankings():
+    movies.add_movies([_movie("A1"), _movie("B2")])
+    now = time.time()
+    for _ in range(3):
+        movies.increment_views("B2", now=now)
+    movies.increment_views("A1", now=now)
+
+    assert movies.get_movie("B2").views == 3
+    assert [item.code for item in movies.get_top_movies(2)] == ["B2", "A1"]
+    assert [item.code for item in movies.get_trending_movies(24, 2)] == ["B2", "A1"]
+    assert [item.code for item in movies.get_top_movies_for_days(1, 2)] == ["B2", "A1"]
+
+
+def test_users_premium_and_counters():
+    for user_id in (10, 11):
+        users.upsert_user(SimpleNamespace(id=user_id, username=None, first_name=f"U{user_id}"))
+    users.upsert_user(SimpleNamespace(id=10, username="renamed", first_name="U10"))
+
+    assert sorted(users.get_all_user_ids()) == [10, 11]
+    assert users.get_user_count() == 2
+    users.set_user_premium(11, months=1)
+    assert users.is_user_premium(11) and not users.is_user_premium(10)
+    assert users.get_premium_stats() == users.PremiumStats(premium_count=1, total_count=2)
+    users.remove_user_premium(11)
+    assert not users.is_user_premium(11)
+    assert stats.get_counters()["users"] == 2
+
+
+def test_force_channels_ignore_duplicates():
+    force_channels.add_force_channel("@kanal", "https://t.me/kanal")
+    force_channels.add_force_channel("@kanal", "https://t.me/kanal")
+    channels = force_channels.get_force_channels()
+    assert [channel.channel_id for channel in channels] == ["@kanal"]
+    assert force_channels.remove_force_channel_by_channel_id("@kanal") == 1
+
+
+def test_deliveries_insert_compact_and_reports():
+    day = deliveries.DAY_SECONDS
+    base = (int(time.time()) // day - 3) * day
+    events = [
+        deliveries.DeliveryEvent(ts=base + 60, chat_id=1, code="A1", ok=True),
+        deliveries.DeliveryEvent(ts=base + 120, chat_id=2, code="A1", ok=False),
+        deliveries.DeliveryEvent(ts=base + day + 60, chat_id=1, code="B2", ok=True),
+    ]
+    assert deliveries.insert_deliveries(events) == 3
+
+    summary = deliveries.get_summary(base)
+    assert (summary.deliveries, summary.failures, summary.users) == (2, 1, 2)
+    assert sorted(deliveries.get_top_codes(base, 5)) == [("A1", 1), ("B2", 1)]
+
+    assert deliveries.compact_deliveries(base + day) == 2
+    assert deliveries.get_daily_totals(base) == [(base, 1), (base + day, 1)]
+
+
+def test_channel_members_upsert_keeps_newest():
+    rows = [
+        channel_members.MemberStatus("@kanal", 5, "member", 200),
+        channel_members.MemberStatus("@kanal", 5, "left", 100),
+    ]
+    channel_members.upsert_statuses(rows[:1])
+    channel_members.upsert_statuses(rows[1:])
+    assert channel_members.get_statuses(5, ["@kanal"])["@kanal"].status == "member"
+
+
+def test_persistence_roundtrip():
+    persistence.save_entries([("user_data", 7, b"\x00data"), ("user_data", 8, b"x")])
+    persistence.save_entries([("user_data", 8, None)])
+    assert persistence.load_entries("user_data") == {7: b"\x00data"}
+
+
+def test_change_log_tracks_movie_and_premium_changes():
+    with db.db_session() as conn:
+        version = change_log.data_version(conn)
+        seqs = change_log.get_versions(conn)
+    movies.add_movie("A1", "Kino", "video", "FILE-A1", "Tavsif")
+    users.upsert_user(SimpleNamespace(id=10, username=None, first_name="U10"))
+    users.set_user_premium(10)
+
+    with db.db_session() as conn:
+        assert change_log.data_version(conn) > version
+        changes = change_log.read_changes(conn, "movies", seqs.get("movies", 0), 10)
+        premium = change_log.read_changes(conn, "premium", seqs.get("premium", 0), 10)
+    assert [change.key for change in changes] == ["A1"]
+    assert [change.key for change in premium] == ["10"]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.rate_limit import SlidingWindowLimiter  # noqa: E402
+
+
+def test_blocks_over_limit_and_warns_once():
+    limiter = SlidingWindowLimiter(limit=3, window=10, max_keys=100)
+    assert [limiter.hit(1, now=100.0) for _ in range(3)] == [(True, False)] * 3
+    assert limiter.hit(1, now=101.0) == (False, True)
+    assert limiter.hit(1, now=102.0) == (False, False)
+    assert limiter.hit(2, now=102.0) == (True, False)
+    assert (limiter.allowed, limiter.dropped) == (4, 2)
+
+
+def test_previous_window_is_weighted_by_overlap():
+    limiter = SlidingWindowLimiter(limit=4, window=10, max_keys=100)
+    for _ in range(4):
+        limiter.hit(1, now=105.0)
+    # 25% into the next window: 4 * 0.75 = 3 estimated, one more fits.
+    assert limiter.hit(1, now=112.5) == (True, False)
+    assert limiter.hit(1, now=112.5) == (False, True)
+    # Two windows later the old count no longer applies.
+    assert limiter.hit(1, now=130.0) == (True, False)
+
+
+def test_idle_and_excess_keys_are_evicted():
+    limiter = SlidingWindowLimiter(limit=1, window=10, max_keys=2)
+    for key in (1, 2, 3):
+        limiter.hit(key, now=100.0)
+    assert len(limiter) == 2
+    limiter.hit(4, now=200.0)
+    assert len(limiter) == 1
+
+
+def test_zero_limit_disables():
+    limiter = SlidingWindowLimiter(limit=0, window=10, max_keys=2)
+    assert all(limiter.hit(1, now=100.0) == (True, False) for _ in range(10))
+    assert len(limiter) == 0
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.supervisor import partition_key  # noqa: E402
+
+
+def test_messages_and_callbacks_route_by_sender():
+    message = {"update_id": 1, "message": {"from": {"id": 10}, "chat": {"id": -100}}}
+    callback = {"update_id": 2, "callback_query": {"from": {"id": 10}, "data": "pick:A1"}}
+    assert partition_key(message) == partition_key(callback) == 10
+
+
+def test_member_updates_route_by_the_member():
+    update = {
+        "update_id": 3,
+        "chat_member": {
+            "from": {"id": 99},
+            "chat": {"id": -100},
+            "new_chat_member": {"user": {"id": 10}, "status": "member"},
+        },
+    }
+    assert partition_key(update) == 10
+
+
+def test_chat_only_and_empty_updates():
+    assert partition_key({"update_id": 4, "channel_post": {"chat": {"id": -100}}}) == -100
+    assert partition_key({"update_id": 5}) == 5
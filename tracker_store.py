@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from services.batch_writer import QueuedBatchWriter
+
+DB_PATH = "kanal_a'zolari.db"
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+JOIN = "join"
+LEAVE = "leave"
+
+
+@dataclass(frozen=True)
+class MemberEvent:
+    user_id: int
+    username: str
+    full_name: str
+    channel_id: int
+    event: str
+    date: str
+
+
+def now_text() -> str:
+    return datetime.now().strftime(DATE_FORMAT)
+
+
+class MemberEventWriter(QueuedBatchWriter[MemberEvent]):
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue: int = 100000,
+    ) -> None:
+        super().__init__(batch_size=batch_size, flush_interval=flush_interval, max_queue=max_queue)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        if self._conn:
+            return
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS members (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    full_name TEXT,
+                    joined_date TEXT,
+                    channel_id INTEGER
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS member_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    channel_id INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    event_date TEXT NOT NULL
+                )
+                """
+            )
+        self._conn = conn
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def record(self, event: MemberEvent) -> None:
+        self._enqueue(event)
+
+    def _write(self, batch: list[MemberEvent]) -> None:
+        assert self._conn is not None
+        joins = [
+            (item.user_id, item.username, item.full_name, item.date, item.channel_id)
+            for item in batch
+            if item.event == JOIN
+        ]
+        with self._conn:
+            if joins:
+                # INSERT OR IGNORE - birinchi qo'shilgan sana saqlanib qoladi
+                self._conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO members
+                        (user_id, username, full_name, joined_date, channel_id)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    joins,
+                )
+            self._conn.executemany(
+                """
+                INSERT INTO member_events (user_id, channel_id, event, event_date)
+                VALUES (?, ?, ?, ?)
+                """,
+                [(item.user_id, item.channel_id, item.event, item.date) for item in batch],
+            )
+
+    def _report(self, exc: Exception) -> None:
+        print(f"Bazaga yozishda xatolik: {exc}")
+
+    def start(self) -> None:
+        self.open()
+        super().start()
+
+    async def stop(self) -> None:
+        await super().stop()
+        self.close()
+
+    async def _tick(self) -> None:
+        started = time.perf_counter()
+        count = await self.flush()
+        if count:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"{count} ta hodisa yozildi ({elapsed_ms:.1f} ms)")